@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_project.settings')
+# Route the read-heavy inventory pages to their async views
+os.environ.setdefault('INVENTORY_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Pick up queued jobs with the first request, under the in-process job runner
+from inventory_app.jobs import start_runner  # noqa: E402
+
+start_runner()
@@ -30,14 +30,19 @@ INSTALLED_APPS = [
     'inventory_app',
 ]
 
+# EmployeeBackend logs users in. ModelBackend stays listed so sessions that
+# were started with it before are still accepted.
 AUTHENTICATION_BACKENDS = [
+'inventory_app.backends.EmployeeBackend',
 'django.contrib.auth.backends.ModelBackend',
 ]
 
 
 MIDDLEWARE = [
+    'inventory_app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'inventory_app.assets.StaticAssetMiddleware',
+    'inventory_app.sessions.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -49,7 +54,7 @@ ROOT_URLCONF = 'django_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'inventory_app.metrics.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,6 +63,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'inventory_app.context_processors.current_employee',
             ],
         },
     },
@@ -76,6 +82,108 @@ DATABASES = {
     }
 }
 
+# Production SQLite profile, selected with INVENTORY_DB_PROFILE=production:
+# WAL and tuned pragmas, write transactions that wait for the lock instead of
+# failing, and connections kept open between requests.
+if os.environ.get('INVENTORY_DB_PROFILE') == 'production':
+    from inventory_app.sqlite_backend.base import PRODUCTION_PRAGMAS
+
+    DATABASES['default'].update({
+        'ENGINE': 'inventory_app.sqlite_backend',
+        'CONN_MAX_AGE': int(os.environ.get('INVENTORY_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': PRODUCTION_PRAGMAS,
+        },
+    })
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# A file cache by default, shared by every worker process on the machine, so
+# the version stamps that invalidate cached fragments and reports reach them
+# all. Set INVENTORY_CACHE_BACKEND and INVENTORY_CACHE_LOCATION to use another
+# backend, e.g. django.core.cache.backends.redis.RedisCache with a redis://
+# URL when workers run on several machines.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('INVENTORY_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('INVENTORY_CACHE_LOCATION') or BASE_DIR / 'cache',
+    }
+}
+
+# Session storage, chosen with INVENTORY_SESSION_STRATEGY:
+# - 'db' reads django_session on every authenticated request (Django's default)
+# - 'cached_db' serves sessions from the 'sessions' cache; only misses read
+#   the database, and writes go to both
+# - 'signed_cookies' keeps the session in a signed cookie, with no server-side
+#   storage, but a session then cannot be ended before it expires
+# For cached_db, INVENTORY_SESSION_CACHE picks a file cache, shared by every
+# worker process, or a local-memory one, only safe with a single process
+# since a logout in one would not reach the others.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+INVENTORY_SESSION_STRATEGY = os.environ.get('INVENTORY_SESSION_STRATEGY', 'db')
+SESSION_ENGINE = SESSION_ENGINES[INVENTORY_SESSION_STRATEGY]
+SESSION_CACHE_ALIAS = 'sessions'
+if os.environ.get('INVENTORY_SESSION_CACHE', 'file') == 'locmem':
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'inventory-sessions',
+    }
+else:
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('INVENTORY_SESSION_CACHE_DIR') or BASE_DIR / 'session_cache',
+    }
+
+# Tests run with private caches, as do the loadtest and benchmark commands,
+# so their throwaway data never reaches the live ones
+TEST_RUNNER = 'inventory_app.testing.TestRunner'
+
+# Seconds to keep rendered inventory fragments and valuation reports. With a
+# shared cache they are invalidated on every item write, so this only bounds
+# memory use. A local-memory cache is private to each process, and another
+# process's writes do not reach it, so there they only live for a minute.
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    INVENTORY_FRAGMENT_TIMEOUT = 60
+else:
+    INVENTORY_FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+
+# Serve the read-heavy inventory pages with async views. Only worth it under
+# an ASGI server, so django_project/asgi.py turns it on.
+INVENTORY_ASYNC_VIEWS = os.environ.get('INVENTORY_ASYNC_VIEWS') == '1'
+
+
+# Queries slower than this many milliseconds are logged as warnings by
+# inventory_app.metrics. Set INVENTORY_SLOW_QUERY_MS empty or to 0 to turn it off.
+INVENTORY_SLOW_QUERY_MS = float(os.environ.get('INVENTORY_SLOW_QUERY_MS', '100') or 0) or None
+
+
+# The bulk edit posts five fields for each of up to 500 items, past Django's
+# default limit of 1000 fields per request
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 3000
+
+
+# Background jobs (exports, imports, rollup rebuilds) are queued in the
+# database. With INVENTORY_JOB_RUNNER=thread they run in a pool of
+# INVENTORY_JOB_THREADS threads inside the web process; with worker they wait
+# for `manage.py run_jobs`. Result files and uploads go to INVENTORY_JOB_DIR.
+# Either runner requeues jobs left running for INVENTORY_JOB_STALE_AFTER
+# seconds, e.g. by a killed process, and deletes finished jobs and their
+# files after INVENTORY_JOB_KEEP_DAYS days.
+INVENTORY_JOB_RUNNER = os.environ.get('INVENTORY_JOB_RUNNER', 'thread')
+INVENTORY_JOB_THREADS = int(os.environ.get('INVENTORY_JOB_THREADS', 2))
+INVENTORY_JOB_DIR = os.environ.get('INVENTORY_JOB_DIR') or BASE_DIR / 'job_files'
+INVENTORY_JOB_STALE_AFTER = int(os.environ.get('INVENTORY_JOB_STALE_AFTER', 3600))
+INVENTORY_JOB_KEEP_DAYS = int(os.environ.get('INVENTORY_JOB_KEEP_DAYS', 7))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -122,6 +230,21 @@ STATICFILES_DIRS = [
 os.path.join(BASE_DIR, 'static')
 ]
 
+# collectstatic writes every static file here under a content-hashed name,
+# with gzip (and, when the brotli package is installed, brotli) variants of
+# the text files. StaticAssetMiddleware serves them from here with
+# far-future caching, so no CDN or separate file server is needed.
+STATIC_ROOT = os.environ.get('INVENTORY_STATIC_ROOT') or BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'inventory_app.assets.CompressedManifestStaticFilesStorage',
+    },
+}
+
 MEDIA_URL = '/images/'
 
 # Redirect user to index page when logging inA
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_project.settings')
 
 application = get_wsgi_application()
+
+# Pick up queued jobs with the first request, under the in-process job runner
+from inventory_app.jobs import start_runner  # noqa: E402
+
+start_runner()
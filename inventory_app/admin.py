@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Item, Employee
+from .models import Item, Employee, Location
 
 # Register your models here.
 admin.site.register(Item)
-admin.site.register(Employee)
\ No newline at end of file
+admin.site.register(Employee)
+admin.site.register(Location)
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class InventoryAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory_app'
+
+    def ready(self):
+        from django.core import checks
+        from django.db.models.signals import post_migrate
+
+        # Connect the app's signal receivers
+        from . import signals  # noqa: F401
+        from .assets import check_vendor_assets
+        from .search import ensure_search_index
+
+        post_migrate.connect(ensure_search_index, sender=self)
+        checks.register(check_vendor_assets, checks.Tags.staticfiles, deploy=True)
@@ -0,0 +1,207 @@
+import base64
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core import checks
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .exports import is_installed
+
+# Third-party files served from our own static files instead of a CDN, so
+# pages render without internet access. Each is pinned to a version and to
+# the Subresource Integrity hash the CDN link used; the vendor_assets command
+# downloads them once, checks the hash and writes them under
+# inventory_app/static/, where they are committed. Until a file is there,
+# pages link the CDN copy and manage.py check --deploy warns about it.
+VENDOR_ASSETS = {
+    'bootstrap': {
+        'path': 'vendor/bootstrap/5.3.1/css/bootstrap.min.css',
+        'url': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.1/dist/css/bootstrap.min.css',
+        'integrity': 'sha384-4bw+/aepP/YC94hEpVNVgiZdgIC5+VKNBQNGCHeKRQN+PtmoHDEXuppvnDJzQIu9',
+    },
+}
+
+# Text formats worth compressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml')
+# Smaller files gain less than the extra header costs
+COMPRESS_MIN_SIZE = 256
+# A variant is only kept if it saves at least this fraction of the size
+COMPRESS_MIN_SAVING = 0.05
+
+# Hashed names never change content, so browsers may keep them for a year
+# without asking again. Anything else is revalidated after a minute.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'public, max-age=60'
+
+# (encoding, file suffix, Accept-Encoding token) in order of preference
+ENCODINGS = (('br', '.br', 'br'), ('gzip', '.gz', 'gzip'))
+
+
+def integrity(data):
+    # The Subresource Integrity hash of some bytes, as in VENDOR_ASSETS
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+def compressors():
+    # {file suffix: function compressing bytes} for the available encodings.
+    # Brotli needs the optional brotli package; gzip is always there.
+    available = {'.gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if is_installed('brotli'):
+        import brotli
+
+        available['.br'] = lambda data: brotli.compress(data, quality=11)
+    return available
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # ManifestStaticFilesStorage, which collectstatic uses to write a copy of
+    # every file under a content-hashed name, that also writes .gz (and .br)
+    # variants of the hashed text files for StaticAssetMiddleware to serve
+    # without compressing on each request.
+
+    def stored_name(self, name):
+        # Before collectstatic has written a manifest (development, tests)
+        # files are referred to by their plain names and served by the
+        # staticfiles finders. Once there is one, a missing entry is an error.
+        if not self.manifest_hash:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        available = compressors()
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name, available)
+
+    def compress(self, name, available):
+        with self.open(name) as file:
+            data = file.read()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return
+        for suffix, compress in available.items():
+            compressed = compress(data)
+            if len(compressed) <= len(data) * (1 - COMPRESS_MIN_SAVING):
+                with open(self.path(name + suffix), 'wb') as file:
+                    file.write(compressed)
+
+
+@lru_cache(maxsize=None)
+def vendored(name):
+    # Whether the vendored copy of VENDOR_ASSETS[name] is in the static files
+    return finders.find(VENDOR_ASSETS[name]['path']) is not None
+
+
+def check_vendor_assets(app_configs, **kwargs):
+    # Deployment check: every vendored file is present, or pages load it from
+    # the CDN, and matches its hash
+    errors = []
+    for name, asset in VENDOR_ASSETS.items():
+        path = finders.find(asset['path'])
+        if path is None:
+            errors.append(checks.Warning(
+                f'The vendored {name} file {asset["path"]} is missing, so pages load it from {asset["url"]}.',
+                hint='Run manage.py vendor_assets and commit the file.',
+                id='inventory_app.W001',
+            ))
+            continue
+        with open(path, 'rb') as file:
+            if integrity(file.read()) != asset['integrity']:
+                errors.append(checks.Error(
+                    f'The vendored {name} file {asset["path"]} does not match its integrity hash.',
+                    hint='Run manage.py vendor_assets to fetch it again.',
+                    id='inventory_app.E002',
+                ))
+    return errors
+
+
+class StaticAssetMiddleware:
+    # Serves the files collectstatic wrote to STATIC_ROOT, so a deployment
+    # needs no separate static file server. Hashed names get far-future,
+    # immutable caching, and the pre-compressed variant the client accepts is
+    # sent instead of the file. Does nothing until a manifest has been
+    # collected; the development server serves static files itself.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.hashed_names = self.load_hashed_names()
+
+    def load_hashed_names(self):
+        if not self.root:
+            return None
+        try:
+            with open(os.path.join(self.root, CompressedManifestStaticFilesStorage.manifest_name)) as file:
+                return set(json.load(file)['paths'].values())
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        # Only requests for static files touch the file system, with a stat
+        # or two, so they are served on the event loop
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        if self.hashed_names is None or request.method not in ('GET', 'HEAD'):
+            return None
+        if not request.path.startswith(self.prefix):
+            return None
+        name = posixpath.normpath(request.path[len(self.prefix):]).lstrip('/')
+        if name.startswith('..') or name == '.':
+            return None
+        path = os.path.join(self.root, *name.split('/'))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path) or name.endswith(tuple(suffix for encoding, suffix, token in ENCODINGS)):
+            return None
+
+        immutable = name in self.hashed_names
+        if not immutable and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            return HttpResponseNotModified()
+
+        content_type, original_encoding = mimetypes.guess_type(name)
+        encoding = None
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if original_encoding is None:
+            for candidate, suffix, token in ENCODINGS:
+                if token in accepted and os.path.isfile(path + suffix):
+                    encoding, path = candidate, path + suffix
+                    break
+
+        response = FileResponse(open(path, 'rb'), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else MUTABLE_CACHE_CONTROL
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        return response
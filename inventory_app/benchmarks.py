@@ -0,0 +1,797 @@
+import asyncio
+import datetime
+import importlib
+import io
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import DatabaseError, connection
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.utils import ConnectionHandler
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from .assets import vendored
+from .exports import EXPORT_COLUMNS, CsvExporter, available_exporters, item_rows
+from .forecasting import HISTORY_DAYS, consumption_history, forecast, forecast_demand
+from .fragments import fragment_timeout
+from .imports import import_items, read_rows
+from .locations import book_deltas, book_unlocated_stock, location_totals
+from .models import Item, Location, LocationStock, StockMovement
+from .pagination import keyset_paginate
+from .reorder import LOW_STOCK_KEYS, PURCHASE_COLUMNS, low_stock, purchase_rows
+from . import urls
+from .search import search_items
+from .stock import transfer_stock
+from .valuation import cached_valuation_report, valuation_report
+from .sqlite_backend.base import PRODUCTION_PRAGMAS
+from .testing import isolated_caches
+from .views import LOW_STOCK_PAGE_SIZE, ItemListView
+
+
+@contextmanager
+def benchmark_database(name=None):
+    # Run against a throwaway copy of the schema, and private caches, so
+    # benchmarks never touch real data. SQLite test databases live in memory
+    # unless a file `name` is given, which is needed when several threads
+    # write at once.
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if name is not None:
+        test_settings['NAME'] = name
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with isolated_caches():
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+
+
+def seed_items(count, batch_size=5000):
+    categories = [value for value, label in Item.CATEGORY]
+    rng = random.Random(count)
+    Item.objects.bulk_create(
+        (
+            Item(
+                name=f'Item {number:06d}',
+                category=rng.choice(categories),
+                cost=round(rng.uniform(0.5, 50), 2),
+                amount=rng.randint(0, 500),
+            )
+            for number in range(count)
+        ),
+        batch_size=batch_size,
+    )
+
+
+def measure(func, repeat=3):
+    # Wall time over `repeat` runs, then one extra run under tracemalloc for the
+    # peak of Python-level allocations (memory allocated inside C extensions is
+    # not counted).
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'best_s': round(min(timings), 4),
+        'median_s': round(statistics.median(timings), 4),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def _consume(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+def _legacy_pandas_xlsx():
+    # The export as it was before streaming: every Item loaded, copied into a DataFrame
+    import pandas as pd
+
+    items = Item.objects.all()
+    data = {
+        'Name': [item.name for item in items],
+        'Category': [item.category for item in items],
+        'Cost': [item.cost for item in items],
+        'Amount': [item.amount for item in items],
+    }
+    output = io.BytesIO()
+    pd.DataFrame(data).to_excel(output, index=False)
+    return output.getbuffer().nbytes
+
+
+def benchmark_exports(items=10000, repeat=3, **options):
+    with benchmark_database():
+        seed_items(items)
+        cases = {
+            name: (lambda exporter=exporter: _consume(exporter.stream(EXPORT_COLUMNS, item_rows())))
+            for name, exporter in available_exporters().items()
+        }
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            pass
+        else:
+            cases['pandas-xlsx (legacy)'] = _legacy_pandas_xlsx
+
+        results = []
+        for case, func in cases.items():
+            size = func()
+            results.append({'suite': 'exports', 'case': case, 'rows': items, 'bytes': size, **measure(func, repeat)})
+        return results
+
+
+def benchmark_imports(items=10000, repeat=3, **options):
+    # Import a CSV of `items` new rows, then re-import it with every amount changed
+    categories = [value for value, label in Item.CATEGORY]
+    columns = EXPORT_COLUMNS
+    created = b''.join(CsvExporter().stream(
+        columns, ((f'Item {number:06d}', categories[number % len(categories)], 1.5, number) for number in range(items))
+    ))
+    updated = b''.join(CsvExporter().stream(
+        columns, ((f'Item {number:06d}', categories[number % len(categories)], 1.5, number + 1) for number in range(items))
+    ))
+
+    results = []
+    for case, payload in (('create', created), ('update', updated)):
+        timings = []
+        for _ in range(repeat):
+            with benchmark_database():
+                if case == 'update':
+                    import_items(read_rows(io.BytesIO(created), 'items.csv'))
+                start = time.perf_counter()
+                result = import_items(read_rows(io.BytesIO(payload), 'items.csv'))
+                timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results.append({
+            'suite': 'imports', 'case': case, 'rows': items,
+            'created': result.created, 'updated': result.updated,
+            'best_s': round(best, 4), 'rows_per_s': round(items / best),
+        })
+    return results
+
+
+def benchmark_search(items=100000, repeat=3, **options):
+    # Ranked search latency over a seeded catalogue
+    queries = ['Item 0421', 'dairy', 'Item 09', 'protein 0001', 'bev']
+    with benchmark_database():
+        seed_items(items)
+        results = []
+        for query in queries:
+            matches = len(search_items(query))
+            timings = []
+            for _ in range(max(repeat, 5)):
+                start = time.perf_counter()
+                search_items(query)
+                timings.append(time.perf_counter() - start)
+            results.append({
+                'suite': 'search', 'case': query, 'rows': items, 'matches': matches,
+                'best_ms': round(min(timings) * 1000, 2), 'median_ms': round(statistics.median(timings) * 1000, 2),
+            })
+        return results
+
+
+def benchmark_cache(items=10000, repeat=3, **options):
+    # List and detail page latency with the fragment cache on and off
+    with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+        seed_items(items)
+        client = Client()
+        first = keyset_paginate(Item.objects.all(), ('name', 'pk'), ItemListView.paginate_by)
+        pages = {
+            'list': reverse('inventory'),
+            'list (page 2)': reverse('inventory') + f'?after={first.next_cursor}',
+            'detail': reverse('item-detail', args=[first.object_list[0].pk]),
+        }
+
+        results = []
+        for case, timeout in (('uncached', 0), ('cached', fragment_timeout())):
+            with override_settings(INVENTORY_FRAGMENT_TIMEOUT=timeout):
+                cache.clear()
+                for page, url in pages.items():
+                    client.get(url)
+                    timings = []
+                    for _ in range(max(repeat, 20)):
+                        start = time.perf_counter()
+                        client.get(url)
+                        timings.append(time.perf_counter() - start)
+                    results.append({
+                        'suite': 'cache', 'case': f'{page} {case}', 'rows': items,
+                        'best_ms': round(min(timings) * 1000, 2), 'median_ms': round(statistics.median(timings) * 1000, 2),
+                    })
+        return results
+
+
+@contextmanager
+def routed_views(use_async):
+    # Route the read-heavy pages to their sync or async views, as the WSGI and
+    # ASGI entry points do
+    def route(value):
+        with override_settings(INVENTORY_ASYNC_VIEWS=value):
+            importlib.reload(urls)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    route(use_async)
+    try:
+        yield
+    finally:
+        route(settings.INVENTORY_ASYNC_VIEWS)
+
+
+@contextmanager
+def query_latency(seconds):
+    # Add a fixed delay to every query, standing in for the network round trip
+    # to a database server, which an in-memory SQLite database does not have
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def add_delay(connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    if seconds:
+        connection_created.connect(add_delay)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(add_delay)
+
+
+def _wsgi_get(handler, path, query):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': io.StringIO(),
+    }
+    statuses = []
+    response = handler(environ, lambda status, headers: statuses.append(status))
+    try:
+        for chunk in response:
+            pass
+    finally:
+        response.close()
+    return statuses[0]
+
+
+async def _asgi_get(handler, path, query):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'testserver')], 'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await handler(scope, receive, send)
+    return messages[0]['status']
+
+
+def _load_result(mode, page, timings, elapsed, **extra):
+    timings.sort()
+    return {
+        'suite': 'concurrency', 'case': f'{page} {mode}', **extra, 'requests': len(timings),
+        'req_per_s': round(len(timings) / elapsed), 'p50_ms': round(timings[len(timings) // 2] * 1000, 2),
+        'p95_ms': round(timings[int(len(timings) * 0.95)] * 1000, 2),
+    }
+
+
+def _run_wsgi(handler, path, query, concurrency, threads, per_user):
+    # `concurrency` clients sending requests back to back to a server with
+    # `threads` worker threads; a request waits for a free thread
+    workers = threading.Semaphore(threads)
+    timings = []
+
+    def user():
+        for _ in range(per_user):
+            start = time.perf_counter()
+            with workers:
+                _wsgi_get(handler, path, query)
+            timings.append(time.perf_counter() - start)
+        connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(user) for _ in range(concurrency)]:
+            future.result()
+    return timings, time.perf_counter() - start
+
+
+def _run_asgi(handler, path, query, concurrency, per_user):
+    # The same clients against one event loop
+    timings = []
+
+    async def user():
+        for _ in range(per_user):
+            start = time.perf_counter()
+            await _asgi_get(handler, path, query)
+            timings.append(time.perf_counter() - start)
+
+    async def main():
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return timings, time.perf_counter() - start
+
+
+def benchmark_concurrency(items=10000, repeat=3, concurrency=32, threads=8, latency_ms=5, **options):
+    # Sync views behind a thread-per-request WSGI server against async views
+    # under ASGI, driven in-process through Django's own handlers so both run
+    # on the same hardware with no server or network in between. Fragment
+    # caching is off, so every request reads the database.
+    pages = {'index': ('/', ''), 'list': (reverse('inventory'), ''), 'detail': (reverse('item-detail', args=[1]), '')}
+    per_user = max(repeat, 5)
+    results = []
+    with benchmark_database(), override_settings(ALLOWED_HOSTS=['testserver'], INVENTORY_FRAGMENT_TIMEOUT=0):
+        seed_items(items)
+        with query_latency(latency_ms / 1000):
+            for page, (path, query) in pages.items():
+                with routed_views(False):
+                    timings, elapsed = _run_wsgi(WSGIHandler(), path, query, concurrency, threads, per_user)
+                results.append(_load_result(f'wsgi ({threads} threads)', page, timings, elapsed, concurrency=concurrency))
+                with routed_views(True):
+                    timings, elapsed = _run_asgi(ASGIHandler(), path, query, concurrency, per_user)
+                results.append(_load_result('asgi', page, timings, elapsed, concurrency=concurrency))
+    return results
+
+
+# Database settings compared by the sqlite suite. The default profile also
+# reconnects for every operation, as Django does per request without CONN_MAX_AGE.
+SQLITE_PROFILES = {
+    'default': ({'ENGINE': 'django.db.backends.sqlite3'}, True),
+    'production': (
+        {
+            'ENGINE': 'inventory_app.sqlite_backend',
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'pragmas': PRODUCTION_PRAGMAS},
+        },
+        False,
+    ),
+}
+
+
+def _sqlite_worker(handler, operation, reconnect, deadline, counts):
+    database = handler['default']
+    done = errors = 0
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        try:
+            operation(database, rng)
+            done += 1
+        except DatabaseError:
+            errors += 1
+        if reconnect:
+            database.close()
+    database.close()
+    counts.append((done, errors))
+
+
+def _read_page(database, rng):
+    # The inventory list query
+    with database.cursor() as cursor:
+        cursor.execute(
+            'SELECT id, name, category, cost, amount FROM inventory_app_item WHERE amount >= %s ORDER BY amount, id LIMIT 50',
+            [rng.randint(0, 500)],
+        )
+        cursor.fetchall()
+
+
+def _write_item(item_count):
+    # Read an item and write it back in one transaction, like the update form
+    def write(database, rng):
+        database.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+        try:
+            with database.cursor() as cursor:
+                pk = rng.randint(1, item_count)
+                cursor.execute('SELECT amount FROM inventory_app_item WHERE id = %s', [pk])
+                amount = cursor.fetchone()[0]
+                cursor.execute('UPDATE inventory_app_item SET amount = %s WHERE id = %s', [amount + 1, pk])
+            database.commit()
+        except DatabaseError:
+            database.rollback()
+            raise
+        finally:
+            database.set_autocommit(True)
+    return write
+
+
+def benchmark_sqlite(items=10000, concurrency=32, seconds=3, **options):
+    # Concurrent reads and read-modify-write transactions against a file
+    # database with the stock settings and with the production profile.
+    # A quarter of the `concurrency` threads write.
+    writers = max(1, concurrency // 4)
+    categories = [value for value, label in Item.CATEGORY]
+    results = []
+    for profile, (database_settings, reconnect) in SQLITE_PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            handler = ConnectionHandler({'default': {**database_settings, 'NAME': os.path.join(directory, 'bench.sqlite3')}})
+            database = handler['default']
+            with database.schema_editor() as editor:
+                editor.create_model(Item)
+            with database.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO inventory_app_item (name, category, cost, amount) VALUES (%s, %s, %s, %s)',
+                    [(f'Item {number:06d}', categories[number % len(categories)], 1.5, number % 500) for number in range(items)],
+                )
+            database.close()
+
+            reads, writes = [], []
+            deadline = time.perf_counter() + seconds
+            threads = [
+                threading.Thread(target=_sqlite_worker, args=(handler, _read_page, reconnect, deadline, reads))
+                for _ in range(concurrency - writers)
+            ] + [
+                threading.Thread(target=_sqlite_worker, args=(handler, _write_item(items), reconnect, deadline, writes))
+                for _ in range(writers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        results.append({
+            'suite': 'sqlite', 'case': profile, 'rows': items, 'readers': concurrency - writers, 'writers': writers,
+            'reads_per_s': round(sum(done for done, errors in reads) / seconds),
+            'writes_per_s': round(sum(done for done, errors in writes) / seconds),
+            'read_errors': sum(errors for done, errors in reads),
+            'write_errors': sum(errors for done, errors in writes),
+        })
+    return results
+
+
+def _python_reorder_loop():
+    # Low-stock detection done item by item in Python, for comparison
+    suggestions = []
+    for item in Item.objects.all():
+        if item.amount < item.reorder_level:
+            suggestions.append((item, max(item.target_level, item.reorder_level) - item.amount))
+    return len(suggestions)
+
+
+def benchmark_reorder(items=10000, repeat=3, **options):
+    # Low-stock detection and the purchase list. Every item gets par levels,
+    # about one in ten of them above the amount on hand.
+    with benchmark_database():
+        seed_items(items)
+        Item.objects.update(reorder_level=(F('id') * 7919) % 100, target_level=(F('id') * 7919) % 100 + 200)
+        low = low_stock().count()
+        cases = {
+            'low stock page': lambda: len(keyset_paginate(low_stock(), LOW_STOCK_KEYS, LOW_STOCK_PAGE_SIZE)),
+            'low stock count': lambda: low_stock().count(),
+            'purchase list csv': lambda: _consume(CsvExporter().stream(PURCHASE_COLUMNS, purchase_rows())),
+            'python loop (legacy)': _python_reorder_loop,
+        }
+        return [
+            {'suite': 'reorder', 'case': case, 'rows': items, 'low': low, **measure(func, repeat)}
+            for case, func in cases.items()
+        ]
+
+
+def seed_consumption(days, batch_size=5000):
+    # One consumption movement per item on roughly half of the last `days`
+    # days, heavier at weekends
+    rng = random.Random(days)
+    today = timezone.now().date()
+    item_ids = list(Item.objects.values_list('pk', flat=True))
+    movements = []
+    for offset in range(days):
+        day = today - datetime.timedelta(days=offset)
+        created_at = timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+        weekend = day.weekday() >= 5
+        movements.extend(
+            StockMovement(item_id=item_id, delta=-rng.randint(1, 20 if weekend else 8), reason='adjustment', created_at=created_at)
+            for item_id in item_ids
+            if rng.random() < 0.5
+        )
+    StockMovement.objects.bulk_create(movements, batch_size=batch_size)
+    return len(movements)
+
+
+def benchmark_forecast(items=10000, repeat=3, **options):
+    # Forecasting every item from HISTORY_DAYS of ledger history
+    with benchmark_database():
+        seed_items(items)
+        movements = seed_consumption(HISTORY_DAYS)
+        today = timezone.now().date()
+        start = today - datetime.timedelta(days=HISTORY_DAYS - 1)
+        item_ids, matrix = consumption_history(today)
+        cases = {
+            'history query': lambda: consumption_history(today),
+            'forecast (numpy)': lambda: forecast(matrix, start),
+            'forecast_demand (end to end)': lambda: forecast_demand(today),
+        }
+        return [
+            {'suite': 'forecast', 'case': case, 'rows': items, 'movements': movements, **measure(func, repeat)}
+            for case, func in cases.items()
+        ]
+
+
+def seed_locations(count, batch_size=5000):
+    # `count` stores besides the default location, each holding a few units
+    # of roughly a third of the items; the default location holds the rest
+    rng = random.Random(count)
+    Location.objects.get_or_create(is_default=True, defaults={'name': 'Main'})
+    stores = Location.objects.bulk_create(Location(name=f'Store {number:03d}') for number in range(count))
+    item_ids = list(Item.objects.values_list('pk', flat=True))
+    LocationStock.objects.bulk_create(
+        (
+            LocationStock(location=store, item_id=item_id, amount=rng.randint(1, 20))
+            for store in stores
+            for item_id in item_ids
+            if rng.random() < 0.3
+        ),
+        batch_size=batch_size,
+    )
+    book_unlocated_stock()
+    return stores
+
+
+def benchmark_locations(items=10000, repeat=3, locations=20, **options):
+    # Per-location totals, a single location's export, a transfer and booking
+    # an import-sized batch of changes to the default location
+    with benchmark_database():
+        seed_items(items)
+        stores = seed_locations(locations)
+        main = Location.objects.get(is_default=True)
+        item_ids = list(Item.objects.values_list('pk', flat=True)[:2000])
+        rng = random.Random(items)
+        deltas = {item_id: rng.randint(-5, 5) or 1 for item_id in item_ids}
+        rows = LocationStock.objects.count()
+        # An item the default location has plenty of, to transfer from
+        moved = LocationStock.objects.filter(location=main).order_by('-amount').values_list('item_id', flat=True)[0]
+        cases = {
+            'location totals': location_totals,
+            'location export csv': lambda: _consume(CsvExporter().stream(EXPORT_COLUMNS, item_rows(location_id=stores[0].pk))),
+            'transfer': lambda: transfer_stock(moved, main.pk, stores[-1].pk, 1),
+            'book 2000 changes': lambda: book_deltas(main.pk, deltas),
+        }
+        return [
+            {'suite': 'locations', 'case': case, 'rows': items, 'locations': locations + 1, 'stock_rows': rows, **measure(func, repeat)}
+            for case, func in cases.items()
+        ]
+
+
+def _python_valuation_loop():
+    # The valuation summed item by item in Python, for comparison
+    totals = {}
+    for item in Item.objects.all():
+        totals[item.category] = totals.get(item.category, 0) + item.amount * item.cost
+    return sum(totals.values())
+
+
+def benchmark_valuation(items=10000, repeat=3, **options):
+    # The valuation report from database aggregates, uncached and from the
+    # cache, against the per-item loop
+    with benchmark_database():
+        seed_items(items)
+
+        def uncached():
+            cache.clear()
+            return cached_valuation_report()
+
+        cached_valuation_report()
+        cases = {
+            'report (aggregates)': valuation_report,
+            'report (cache miss)': uncached,
+            'report (cache hit)': cached_valuation_report,
+            'python loop (legacy)': _python_valuation_loop,
+        }
+        return [
+            {'suite': 'valuation', 'case': case, 'rows': items, **measure(func, repeat)}
+            for case, func in cases.items()
+        ]
+
+
+# Packages a worker should not load until an export needs them
+STARTUP_HEAVY_PACKAGES = ('numpy', 'pandas', 'openpyxl', 'pyarrow')
+
+# Modules imported by a cold worker: the WSGI application alone, and with the
+# URLconf (and so every view) that the first request loads
+STARTUP_CASES = {
+    'wsgi': ['django_project.wsgi'],
+    'wsgi+urls': ['django_project.wsgi', 'django_project.urls'],
+}
+
+_STARTUP_SCRIPT = """
+import json, sys
+{imports}
+try:
+    import resource
+except ImportError:
+    rss_kb = None
+else:
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'rss_kb': rss_kb, 'packages': sorted({{name.partition('.')[0] for name in sys.modules}})}}))
+"""
+
+
+def startup_profile(modules):
+    # Import `modules` in a fresh interpreter under `python -X importtime`.
+    # Returns the import time of those modules (cumulative, in ms), the peak
+    # RSS in MB (None where the resource module is missing, as on Windows)
+    # and which of the heavy packages got loaded.
+    script = _STARTUP_SCRIPT.format(imports='\n'.join(f'import {module}' for module in modules))
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'django_project.settings'}
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    # Lines look like "import time: <self us> | <cumulative us> | <indent><name>",
+    # nested imports indented under the module that triggered them
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if self_us.strip().isdigit():
+            cumulative[name[1:].rstrip()] = int(cumulative_us)
+    report = json.loads(completed.stdout)
+    return {
+        'import_ms': round(sum(cumulative.get(module, 0) for module in modules) / 1000, 1),
+        'rss_mb': round(report['rss_kb'] / 1024, 1) if report['rss_kb'] else None,
+        'heavy': [package for package in STARTUP_HEAVY_PACKAGES if package in report['packages']],
+    }
+
+
+def benchmark_startup(repeat=3, **options):
+    # Cold-start cost of a worker process, each case in `repeat` fresh interpreters
+    results = []
+    for case, modules in STARTUP_CASES.items():
+        runs = [startup_profile(modules) for _ in range(repeat)]
+        results.append({
+            'suite': 'startup', 'case': case,
+            'import_ms': statistics.median(run['import_ms'] for run in runs),
+            'rss_mb': statistics.median(run['rss_mb'] for run in runs) if runs[0]['rss_mb'] else None,
+            'heavy': ','.join(runs[0]['heavy']) or '-',
+        })
+    return results
+
+
+# URLs of the stylesheets, scripts and images a page loads
+ASSET_URL_PATTERN = re.compile(r'<(?:link|script|img)\b[^>]*?\b(?:href|src)="([^"]+)"')
+
+
+def page_weight(path, accept_encoding):
+    # What a first visit to `path` downloads: the requests made, the bytes
+    # from our server, the requests that go to another host, and how many
+    # requests a repeat visit makes again because the response may not be
+    # reused without asking
+    client = Client()
+    html = client.get(path, HTTP_ACCEPT_ENCODING=accept_encoding).content
+    weight = {'requests': 1, 'bytes': len(html), 'external_requests': 0, 'repeat_requests': 1}
+    for url in ASSET_URL_PATTERN.findall(html.decode()):
+        weight['requests'] += 1
+        if url.startswith(('http://', 'https://', '//')):
+            weight['external_requests'] += 1
+            weight['repeat_requests'] += 1
+            continue
+        response = client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+        weight['bytes'] += len(b''.join(response.streaming_content) if response.streaming else response.content)
+        if 'immutable' not in response.get('Cache-Control', ''):
+            weight['repeat_requests'] += 1
+    return weight
+
+
+def benchmark_static(**options):
+    # Page weight of the home page with static files under their plain names,
+    # uncompressed and briefly cached, as before the asset pipeline, and with
+    # the collected hashed, pre-compressed files
+    cases = {
+        'plain names (before)': ('django.contrib.staticfiles.storage.StaticFilesStorage', ''),
+        'hashed + gzip': ('inventory_app.assets.CompressedManifestStaticFilesStorage', 'gzip'),
+        'hashed + br/gzip': ('inventory_app.assets.CompressedManifestStaticFilesStorage', 'br, gzip'),
+    }
+    results = []
+    with benchmark_database(), tempfile.TemporaryDirectory() as root:
+        with override_settings(STATIC_ROOT=root, DEBUG=False, ALLOWED_HOSTS=['testserver']):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            for case, (backend, accept_encoding) in cases.items():
+                storages = {**settings.STORAGES, 'staticfiles': {'BACKEND': backend}}
+                with override_settings(STORAGES=storages):
+                    results.append({
+                        'suite': 'static', 'case': case, 'vendored': vendored('bootstrap'),
+                        **page_weight(reverse('index'), accept_encoding),
+                    })
+    return results
+
+
+def _throughput(func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return round(count / (time.perf_counter() - start), 1)
+
+
+def benchmark_sessions(items=10000, repeat=3, **options):
+    # Login and inventory list throughput, and the django_session queries of
+    # a list request, under each session strategy. Passwords use a fast
+    # hasher so the login figures show the session cost, not PBKDF2.
+    # The load test imports this module, so its helpers are imported here.
+    from .loadtest import LOADTEST_PASSWORD, seed_users
+
+    requests = max(repeat, 1) * 100
+    results = []
+    with benchmark_database(), tempfile.TemporaryDirectory() as cache_dir:
+        seed_items(items)
+        usernames = [user.username for user in seed_users(50)]
+        strategies = {
+            'db': ('db', None),
+            'cached_db (locmem)': ('cached_db', {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-sessions'}),
+            'cached_db (file)': ('cached_db', {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir}),
+            'signed_cookies': ('signed_cookies', None),
+        }
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher']
+        with override_settings(ALLOWED_HOSTS=['testserver'], PASSWORD_HASHERS=hashers):
+            User.objects.update(password=make_password(LOADTEST_PASSWORD))
+            for case, (strategy, session_cache) in strategies.items():
+                caches = {**settings.CACHES, 'sessions': session_cache or settings.CACHES['sessions']}
+                with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[strategy], CACHES=caches):
+                    def login():
+                        Client().post(reverse('login'), {'username': random.choice(usernames), 'password': LOADTEST_PASSWORD})
+
+                    client = Client()
+                    client.post(reverse('login'), {'username': usernames[0], 'password': LOADTEST_PASSWORD})
+                    url = reverse('inventory')
+                    client.get(url)
+                    with CaptureQueriesContext(connection) as queries:
+                        client.get(url)
+                    session_queries = sum('django_session' in query['sql'] for query in queries)
+                    results.append({
+                        'suite': 'sessions', 'case': case,
+                        'logins_per_s': _throughput(login, requests // 4),
+                        'list_per_s': _throughput(lambda: client.get(url), requests),
+                        'session_queries': session_queries,
+                    })
+                    Session.objects.all().delete()
+    return results
+
+
+# Benchmark suites runnable through `manage.py benchmark <suite>`
+SUITES = {
+    'exports': benchmark_exports,
+    'imports': benchmark_imports,
+    'search': benchmark_search,
+    'cache': benchmark_cache,
+    'concurrency': benchmark_concurrency,
+    'sqlite': benchmark_sqlite,
+    'startup': benchmark_startup,
+    'reorder': benchmark_reorder,
+    'forecast': benchmark_forecast,
+    'locations': benchmark_locations,
+    'valuation': benchmark_valuation,
+    'static': benchmark_static,
+    'sessions': benchmark_sessions,
+}
@@ -0,0 +1,13 @@
+from .models import Employee
+
+
+def current_employee(request):
+    # The signed-in user's Employee, already loaded with the user by
+    # EmployeeBackend. None for anonymous users and users without one.
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'current_employee': None}
+    try:
+        return {'current_employee': user.employee}
+    except Employee.DoesNotExist:
+        return {'current_employee': None}
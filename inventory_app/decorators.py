@@ -1,15 +1,47 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.views import redirect_to_login
 from django.http import HttpResponse
 
+from .roles import get_user_roles
+
+
+def async_login_required(login_url=None):
+    # login_required for async views, which django.contrib.auth's decorator
+    # does not wrap before Django 5.0
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper_func(request, *args, **kwargs):
+            if await sync_to_async(lambda: request.user.is_authenticated)():
+                return await view_func(request, *args, **kwargs)
+            return redirect_to_login(request.get_full_path(), login_url)
+        return wrapper_func
+    return decorator
+
 
 def allowed_users(allowed_roles=[]):
+    # allowed_roles may be a single group name or a list of them; the user
+    # needs to be in at least one of the groups
+    if isinstance(allowed_roles, str):
+        allowed_roles = [allowed_roles]
+    allowed_roles = frozenset(allowed_roles)
+
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper_func(request, *args, **kwargs):
+                if await sync_to_async(get_user_roles)(request.user) & allowed_roles:
+                    return await view_func(request, *args, **kwargs)
+                else:
+                    return HttpResponse('You are not authorized to view this page')
+            return async_wrapper_func
+
+        @wraps(view_func)
         def wrapper_func(request, *args, **kwargs):
-            group = None 
-            if request.user.groups.exists():
-                group = request.user.groups.all()[0].name
-            if group in allowed_roles:
+            if get_user_roles(request.user) & allowed_roles:
                 return view_func(request, *args, **kwargs)
             else:
                 return HttpResponse('You are not authorized to view this page')
         return wrapper_func
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,284 @@
+import csv
+import importlib.util
+import io
+import json
+import tempfile
+from decimal import Decimal
+from functools import lru_cache
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import Item
+
+# (field, label) pairs written to every inventory export
+EXPORT_COLUMNS = [
+    ('name', 'Name'),
+    ('category', 'Category'),
+    ('cost', 'Cost'),
+    ('amount', 'Amount'),
+]
+
+
+class ItemJSONEncoder(DjangoJSONEncoder):
+    # Costs and values stay JSON numbers rather than DjangoJSONEncoder's
+    # strings. Two decimal places survive the float round trip exactly.
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super().default(o)
+
+
+# Rows fetched from the DB cursor per round-trip
+ROW_CHUNK_SIZE = 2000
+# Bytes sent to the client per streamed chunk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _export_items(location_id=None):
+    # The items to export with their company-wide amount, or with the amount
+    # held at one location, joined from its stock rows in the same query
+    items = Item.objects.order_by('pk')
+    if location_id is not None:
+        items = items.filter(location_stock__location_id=location_id).annotate(
+            location_amount=F('location_stock__amount'),
+        )
+    fields = [field for field, label in EXPORT_COLUMNS]
+    if location_id is not None:
+        fields[fields.index('amount')] = 'location_amount'
+    return items, fields
+
+
+def item_rows(chunk_size=ROW_CHUNK_SIZE, location_id=None):
+    # Read plain tuples in chunks instead of loading every Item instance at once
+    items, fields = _export_items(location_id)
+    return items.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+async def aitem_rows(chunk_size=ROW_CHUNK_SIZE, location_id=None):
+    # item_rows() for async views. It reads values() rather than values_list(),
+    # whose aiterator() runs the query on the event loop thread in Django 4.2.
+    items, fields = _export_items(location_id)
+    rows = items.values(*fields).aiterator(chunk_size=chunk_size)
+    async for row in rows:
+        yield tuple(row[field] for field in fields)
+
+
+def _stream_file(file, chunk_size=STREAM_CHUNK_SIZE):
+    file.seek(0)
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def achunked(rows, size):
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@lru_cache(maxsize=None)
+def is_installed(package):
+    # Whether a top-level package can be imported, without importing it
+    return importlib.util.find_spec(package) is not None
+
+
+class Exporter:
+    # Base class for export formats. Subclasses turn (field, label) columns and an
+    # iterable of row tuples into an iterator of bytes for a StreamingHttpResponse.
+    format = None
+    content_type = None
+    extension = None
+    # Third-party packages the format needs. They are heavy (openpyxl pulls in
+    # NumPy when it is installed), so stream() imports them on first use rather
+    # than every worker paying for them at startup.
+    requires = ()
+
+    def is_available(self):
+        return all(is_installed(package) for package in self.requires)
+
+    def filename(self, name):
+        return f'{name}.{self.extension}'
+
+    def stream(self, columns, rows):
+        raise NotImplementedError
+
+    async def astream(self, columns, rows):
+        # stream() for async rows, as an async iterator of bytes. stream() runs
+        # in the request's sync thread and pulls its rows from the event loop
+        # a chunk at a time, so encoding never blocks the loop. The row queries
+        # are run back on that same thread, on its database connection.
+        chunks = achunked(rows, ROW_CHUNK_SIZE)
+
+        def sync_rows():
+            while True:
+                try:
+                    chunk = async_to_sync(chunks.__anext__)()
+                except StopAsyncIteration:
+                    return
+                yield from chunk
+
+        output = self.stream(columns, sync_rows())
+        next_chunk = sync_to_async(next)
+        while (chunk := await next_chunk(output, None)) is not None:
+            yield chunk
+
+
+# Exporters by format name, in order of preference when the client has none
+EXPORTERS = {}
+
+
+def register(exporter_class):
+    EXPORTERS[exporter_class.format] = exporter_class()
+    return exporter_class
+
+
+def available_exporters():
+    return {name: exporter for name, exporter in EXPORTERS.items() if exporter.is_available()}
+
+
+def _quality(media_type):
+    # A media type's q value. One that is not a number from 0 to 1 counts as
+    # 0, so a malformed Accept header is refused rather than an error.
+    try:
+        quality = float(media_type.params.get('q', 1))
+    except ValueError:
+        return 0
+    return quality if 0 <= quality <= 1 else 0
+
+
+def negotiate_format(request):
+    # An explicit ?format= wins, otherwise pick the best match from the Accept header
+    exporters = available_exporters()
+    requested = request.GET.get('format')
+    if requested:
+        return requested if requested in exporters else None
+
+    accepted = sorted(request.accepted_types, key=lambda media_type: -_quality(media_type))
+    for media_type in accepted:
+        if not _quality(media_type):
+            continue
+        for name, exporter in exporters.items():
+            if media_type.match(exporter.content_type):
+                return name
+    return None
+
+
+@register
+class CsvExporter(Exporter):
+    format = 'csv'
+    content_type = 'text/csv'
+    extension = 'csv'
+
+    def stream(self, columns, rows):
+        # Rows are buffered up to STREAM_CHUNK_SIZE so each chunk is a sensible size
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([label for field, label in columns])
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= STREAM_CHUNK_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+
+@register
+class JsonLinesExporter(Exporter):
+    format = 'jsonl'
+    content_type = 'application/x-ndjson'
+    extension = 'jsonl'
+
+    def stream(self, columns, rows):
+        fields = [field for field, label in columns]
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write(json.dumps(dict(zip(fields, row)), cls=ItemJSONEncoder))
+            buffer.write('\n')
+            if buffer.tell() >= STREAM_CHUNK_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+
+@register
+class XlsxExporter(Exporter):
+    format = 'xlsx'
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    extension = 'xlsx'
+    requires = ('openpyxl',)
+
+    def stream(self, columns, rows):
+        from openpyxl import Workbook
+
+        # openpyxl's write-only mode serialises each row as it is appended, so only
+        # the current row is held in memory. The finished workbook is spooled to a
+        # temporary file and sent on in fixed-size chunks.
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Sheet1')
+        sheet.append([label for field, label in columns])
+        for row in rows:
+            sheet.append(row)
+
+        with tempfile.TemporaryFile() as workbook_file:
+            workbook.save(workbook_file)
+            yield from _stream_file(workbook_file)
+
+
+@register
+class ParquetExporter(Exporter):
+    format = 'parquet'
+    content_type = 'application/vnd.apache.parquet'
+    extension = 'parquet'
+    requires = ('pyarrow',)
+
+    def stream(self, columns, rows):
+        # Rows are written as one row group per chunk, so memory is bounded by ROW_CHUNK_SIZE
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        fields = [field for field, label in columns]
+        with tempfile.TemporaryFile() as parquet_file:
+            writer = None
+            for chunk in chunked(rows, ROW_CHUNK_SIZE):
+                data = {field: list(values) for field, values in zip(fields, zip(*chunk))}
+                if writer is None:
+                    table = pa.table(data)
+                    # Decimal columns are inferred just wide enough for the
+                    # first chunk; widen them so later chunks fit too
+                    schema = pa.schema([
+                        field.with_type(pa.decimal128(38, field.type.scale)) if pa.types.is_decimal(field.type) else field
+                        for field in table.schema
+                    ])
+                    table = table.cast(schema)
+                    writer = pq.ParquetWriter(parquet_file, schema)
+                else:
+                    table = pa.table(data, schema=writer.schema)
+                writer.write_table(table)
+            if writer is None:
+                table = pa.table({field: pa.array([], pa.string()) for field in fields})
+                writer = pq.ParquetWriter(parquet_file, table.schema)
+                writer.write_table(table)
+            writer.close()
+            yield from _stream_file(parquet_file)
@@ -0,0 +1,129 @@
+import datetime
+
+import numpy as np
+from django.db import transaction
+from django.db.models import CharField, DateField, F, Sum
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from . import fragments
+from .models import Item, ItemForecast, StockMovement
+
+# Days of consumption history read for each forecast
+HISTORY_DAYS = 56
+# Weight of the newest day in exponential smoothing
+SMOOTHING_ALPHA = 0.3
+# Ledger entries that count as consumption when they take stock away. Deleting
+# an item is not demand for it.
+CONSUMPTION_REASONS = ('update', 'adjustment', 'import')
+
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def consumption_history(today, days=HISTORY_DAYS):
+    # (item ids, matrix) where matrix[i, d] is how much of item_ids[i] was
+    # used on day d, the last of the `days` columns being `today`. The ledger
+    # is summed per item and day by the database in one query. Days are UTC
+    # dates, cast in SQL and returned as ISO strings for NumPy to parse in one
+    # go: TruncDate calls a Python function per row on SQLite, and so does
+    # converting date results, which together made the query four times
+    # slower.
+    start = today - datetime.timedelta(days=days - 1)
+    since = datetime.datetime.combine(start, datetime.time.min, tzinfo=datetime.timezone.utc)
+    until = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time.min, tzinfo=datetime.timezone.utc)
+
+    item_ids = np.fromiter(Item.objects.order_by('pk').values_list('pk', flat=True), dtype=np.int64)
+    rows = list(
+        StockMovement.objects.filter(
+            created_at__gte=since, created_at__lt=until, delta__lt=0, reason__in=CONSUMPTION_REASONS,
+        )
+        .annotate(day=Cast(Cast('created_at', DateField()), CharField()))
+        .values('item_id', 'day')
+        .annotate(used=-Sum(F('delta')))
+        .order_by()
+        .values_list('item_id', 'day', 'used')
+    )
+    matrix = np.zeros((len(item_ids), days))
+    if rows and len(item_ids):
+        ids, dates, used = zip(*rows)
+        ids = np.array(ids, dtype=np.int64)
+        columns = (np.array(dates, dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(np.int64)
+        positions = np.minimum(np.searchsorted(item_ids, ids), len(item_ids) - 1)
+        # Movements of items deleted since are dropped
+        known = item_ids[positions] == ids
+        matrix[positions[known], columns[known]] = np.array(used, dtype=float)[known]
+    return item_ids, matrix
+
+
+def weekday_factors(matrix, weekdays):
+    # (items, 7) demand on each weekday relative to the item's average day.
+    # Items with no demand get a flat 1.
+    onehot = (weekdays[:, np.newaxis] == np.arange(7)).astype(float)
+    per_weekday = (matrix @ onehot) / np.maximum(onehot.sum(axis=0), 1)
+    average = matrix.mean(axis=1, keepdims=True)
+    return np.divide(per_weekday, average, out=np.ones_like(per_weekday), where=average > 0)
+
+
+def exponential_smoothing(matrix, alpha=SMOOTHING_ALPHA):
+    # The final level of simple exponential smoothing for every row at once,
+    # as the equivalent weighted sum: the first day starts the level and day
+    # t of n is weighted alpha * (1 - alpha) ** (n - 1 - t)
+    days = matrix.shape[1]
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (days - 1)
+    return matrix @ weights
+
+
+def forecast(matrix, start, alpha=SMOOTHING_ALPHA, horizon=7):
+    # Moving averages, weekday factors, the deseasonalised smoothed level and
+    # a `horizon`-day forecast for every row of a history matrix starting on
+    # date `start`
+    days = matrix.shape[1]
+    weekdays = (start.weekday() + np.arange(days)) % 7
+    factors = weekday_factors(matrix, weekdays)
+    day_factors = factors[:, weekdays]
+    deseasonalised = np.divide(matrix, day_factors, out=np.zeros_like(matrix), where=day_factors > 0)
+    level = exponential_smoothing(deseasonalised, alpha)
+    upcoming = (start.weekday() + days + np.arange(horizon)) % 7
+    return {
+        'moving_average_7': matrix[:, -7:].mean(axis=1),
+        'moving_average_28': matrix[:, -28:].mean(axis=1),
+        'smoothed': level,
+        'weekday_factors': factors,
+        'next_week': level[:, np.newaxis] * factors[:, upcoming],
+    }
+
+
+def forecast_demand(today=None, days=HISTORY_DAYS, alpha=SMOOTHING_ALPHA, batch_size=2000):
+    # Forecast every item from its consumption history and replace the stored
+    # forecasts. Returns the number of items forecast.
+    today = today or timezone.now().date()
+    item_ids, matrix = consumption_history(today, days)
+    start = today - datetime.timedelta(days=days - 1)
+    results = forecast(matrix, start, alpha)
+
+    upcoming = [today + datetime.timedelta(days=offset) for offset in range(1, 8)]
+    now = timezone.now()
+    # Plain Python floats, rounded to what the page shows, for the JSON fields
+    columns = {name: np.round(values, 3).tolist() for name, values in results.items()}
+    forecasts = (
+        ItemForecast(
+            item_id=item_id,
+            moving_average_7=columns['moving_average_7'][row],
+            moving_average_28=columns['moving_average_28'][row],
+            smoothed=columns['smoothed'][row],
+            weekday_factors=columns['weekday_factors'][row],
+            next_week=[
+                {'date': date.isoformat(), 'weekday': WEEKDAYS[date.weekday()], 'quantity': quantity}
+                for date, quantity in zip(upcoming, columns['next_week'][row])
+            ],
+            history_days=days,
+            computed_at=now,
+        )
+        for row, item_id in enumerate(item_ids.tolist())
+    )
+    with transaction.atomic():
+        ItemForecast.objects.all().delete()
+        ItemForecast.objects.bulk_create(forecasts, batch_size=batch_size)
+        fragments.invalidate_forecasts()
+    return len(item_ids)
@@ -1,5 +1,9 @@
-from django.forms import ModelForm
-from .models import Item, Employee
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.forms import BaseModelFormSet, ModelForm, modelformset_factory
+from .models import Item, Employee, Location
+from .signals import items_changed
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django import forms
@@ -9,7 +13,139 @@ from django import forms
 class ItemForm(ModelForm):
     class Meta:
         model = Item
-        fields = ('name', 'category', 'cost', 'amount' )
+        fields = ('name', 'category', 'cost', 'amount', 'reorder_level', 'target_level')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Par levels are optional; left out, the item is never reordered
+        self.fields['reorder_level'].required = False
+        self.fields['target_level'].required = False
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in ('reorder_level', 'target_level'):
+            if cleaned_data.get(field) is None and field not in self.errors:
+                cleaned_data[field] = 0
+        reorder_level = cleaned_data.get('reorder_level')
+        target_level = cleaned_data.get('target_level')
+        if reorder_level and target_level and target_level < reorder_level:
+            self.add_error('target_level', 'The target level cannot be below the reorder level.')
+        return cleaned_data
+
+# form for one row of the bulk edit of the inventory list
+class ItemBulkEditForm(ItemForm):
+    class Meta(ItemForm.Meta):
+        fields = ('cost', 'amount', 'reorder_level', 'target_level')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['cost'].required = True
+
+# hidden id of a bulk edit row, looked up among the items the formset already
+# loaded instead of with a query per row
+class LoadedItemField(forms.ModelChoiceField):
+    def __init__(self, items, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.items = items
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.items[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+class BaseItemBulkEditFormSet(BaseModelFormSet):
+    def submitted_ids(self):
+        ids = (self.data.get(f'{self.add_prefix(index)}-id', '') for index in range(self.total_form_count()))
+        return [int(pk) for pk in ids if pk.isdigit()]
+
+    def get_queryset(self):
+        # The rows shown, or on a POST only the submitted rows, loaded in one query
+        if not hasattr(self, '_queryset'):
+            queryset = self.queryset
+            if self.is_bound:
+                queryset = queryset.filter(pk__in=self.submitted_ids())
+            self._queryset = list(queryset)
+            self._object_dict = {item.pk: item for item in self._queryset}
+        return self._queryset
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        self.get_queryset()
+        field = form.fields['id']
+        form.fields['id'] = LoadedItemField(
+            self._object_dict, field.queryset, initial=field.initial, required=False, widget=field.widget,
+        )
+
+    def save(self):
+        # Write only what differs from the stored rows, in one transaction.
+        # Rows are grouped by the fields they change and each group is one
+        # upsert, which grows linearly with the rows where bulk_update()
+        # builds a CASE WHEN per row and field. Returns the changed items.
+        groups = defaultdict(list)
+        changes = []
+        for form in self.forms:
+            item = form.instance
+            if item.pk is None:
+                continue
+            loaded = item._loaded_values
+            fields = frozenset(field for field in form._meta.fields if getattr(item, field) != loaded[field])
+            if fields:
+                groups[fields].append(item)
+                changes.append(({field: loaded[field] for field in Item.TRACKED_FIELDS}, item.tracked_values()))
+
+        with transaction.atomic():
+            for fields, items in groups.items():
+                Item.objects.bulk_create(items, update_conflicts=True, unique_fields=['id'], update_fields=sorted(fields))
+            # Bulk writes skip Item's model signals, so report the changes directly
+            if changes:
+                items_changed.send(sender=Item, changes=changes)
+        return [item for items in groups.values() for item in items]
+
+# Most rows a bulk edit shows and accepts at once
+BULK_EDIT_MAX_ROWS = 500
+
+ItemBulkEditFormSet = modelformset_factory(
+    Item, form=ItemBulkEditForm, formset=BaseItemBulkEditFormSet, extra=0, edit_only=True,
+    max_num=BULK_EDIT_MAX_ROWS, validate_max=True,
+)
+
+# form for uploading a CSV or XLSX file of items
+class ItemImportForm(forms.Form):
+    file = forms.FileField(help_text='A .csv or .xlsx file with Name, Category, Cost and Amount columns, and optionally Reorder Level and Target Level')
+
+# Bounds of the stock forms' numbers, so out-of-range input is a form error
+# rather than an integer the database cannot store: item ids are 64-bit, and
+# quantities are kept within a 32-bit integer
+MAX_ITEM_ID = 2**63 - 1
+MAX_STOCK_QUANTITY = 2**31 - 1
+
+# form for one stock adjustment: add `delta` to an item's amount, optionally
+# refusing to go below `min`
+class StockAdjustmentForm(forms.Form):
+    item = forms.IntegerField(min_value=1, max_value=MAX_ITEM_ID)
+    delta = forms.IntegerField(min_value=-MAX_STOCK_QUANTITY, max_value=MAX_STOCK_QUANTITY)
+    min = forms.IntegerField(required=False, min_value=-MAX_STOCK_QUANTITY, max_value=MAX_STOCK_QUANTITY)
+
+# form for the location a batch of stock adjustments applies to; without one
+# the change is booked to the default location
+class StockLocationForm(forms.Form):
+    location = forms.ModelChoiceField(queryset=Location.objects.all(), required=False)
+
+# form for moving stock of an item from one location to another
+class StockTransferForm(forms.Form):
+    item = forms.IntegerField(min_value=1, max_value=MAX_ITEM_ID)
+    source = forms.ModelChoiceField(queryset=Location.objects.all())
+    destination = forms.ModelChoiceField(queryset=Location.objects.all())
+    quantity = forms.IntegerField(min_value=1, max_value=MAX_STOCK_QUANTITY)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('source') is not None and cleaned_data.get('source') == cleaned_data.get('destination'):
+            self.add_error('destination', 'The destination must differ from the source.')
+        return cleaned_data
 
 # form for creating and updating employee model
 class EmployeeForm(ModelForm):
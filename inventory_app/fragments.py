@@ -0,0 +1,82 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+# Fragments are invalidated by changing their version stamp, so they can be
+# kept for a long time
+DEFAULT_FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+
+def fragment_timeout():
+    return getattr(settings, 'INVENTORY_FRAGMENT_TIMEOUT', DEFAULT_FRAGMENT_TIMEOUT)
+
+
+def _stamp_key(name):
+    return f'inventory:stamp:{name}'
+
+
+def _new_stamp():
+    return uuid.uuid4().hex
+
+
+def version_stamp(name):
+    # The current stamp for `name`. A stamp lost to eviction is replaced by a
+    # new one, which only costs a cache miss.
+    return cache.get_or_set(_stamp_key(name), _new_stamp, None)
+
+
+def table_stamp():
+    return version_stamp('item')
+
+
+def item_stamp(pk):
+    return version_stamp(f'item:{pk}')
+
+
+def forecast_stamp():
+    # One stamp for every stored forecast, as they are all replaced together
+    return version_stamp('forecast')
+
+
+async def aversion_stamp(name):
+    return await cache.aget_or_set(_stamp_key(name), _new_stamp, None)
+
+
+async def atable_stamp():
+    return await aversion_stamp('item')
+
+
+async def aitem_stamp(pk):
+    return await aversion_stamp(f'item:{pk}')
+
+
+async def aforecast_stamp():
+    return await aversion_stamp('forecast')
+
+
+async def ahas_fragment(fragment_name, vary_on):
+    # Whether {% cache ... fragment_name vary_on... %} has a stored copy, so an
+    # async view can skip fetching data the template will not use
+    return await cache.ahas_key(make_template_fragment_key(fragment_name, vary_on))
+
+
+def _invalidate(names):
+    cache.set_many({_stamp_key(name): _new_stamp() for name in names}, None)
+
+
+def invalidate_items(pks):
+    # New stamps for the given items and for the table. They are replaced
+    # straight away, so this process reads its own writes, and again once the
+    # transaction commits, so a fragment rendered from the old rows by a
+    # concurrent request before the commit is not served afterwards.
+    names = ['item'] + [f'item:{pk}' for pk in pks]
+    _invalidate(names)
+    transaction.on_commit(lambda: _invalidate(names))
+
+
+def invalidate_forecasts():
+    _invalidate(['forecast'])
+    transaction.on_commit(lambda: _invalidate(['forecast']))
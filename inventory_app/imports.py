@@ -0,0 +1,188 @@
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .exports import EXPORT_COLUMNS, chunked
+from .forms import ItemForm
+from .models import Item
+from .signals import items_changed
+
+# Rows validated and written per transaction
+IMPORT_BATCH_SIZE = 2000
+
+# Columns every file needs, and columns read only when the file has them
+IMPORT_FIELDS = ('name', 'category', 'cost', 'amount')
+OPTIONAL_IMPORT_FIELDS = ('reorder_level', 'target_level')
+# Column headers are matched case-insensitively against field names and export labels
+HEADER_ALIASES = {label.lower(): field_name for field_name, label in EXPORT_COLUMNS}
+HEADER_ALIASES.update({'reorder level': 'reorder_level', 'target level': 'target_level'})
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # (line number, {field: [messages]}) for every rejected row
+    errors: list = field(default_factory=list)
+
+
+def _normalise_header(header):
+    names = []
+    for column in header:
+        name = str(column or '').strip().lower()
+        names.append(HEADER_ALIASES.get(name, name))
+    missing = [name for name in IMPORT_FIELDS if name not in names]
+    if missing:
+        raise ImportFileError('Missing column(s): ' + ', '.join(missing))
+    return names
+
+
+def _csv_rows(file):
+    # Rows are read lazily, so errors reading the file are raised while
+    # iterating and are turned into ImportFileError here
+    try:
+        reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+        header = _normalise_header(next(reader, []))
+        for line, values in enumerate(reader, start=2):
+            if any(values):
+                yield line, dict(zip(header, values))
+    except UnicodeDecodeError as error:
+        raise ImportFileError('The file is not UTF-8 encoded: save it as a UTF-8 CSV file') from error
+    except csv.Error as error:
+        raise ImportFileError(f'The file is not a valid CSV file: {error}') from error
+
+
+def _xlsx_rows(file):
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as error:
+        raise ImportFileError('The file is not a valid .xlsx workbook') from error
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalise_header(next(rows, []))
+        for line, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield line, dict(zip(header, values))
+    except (zipfile.BadZipFile, KeyError) as error:
+        raise ImportFileError('The file is not a valid .xlsx workbook') from error
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename):
+    # Yield (line number, {column: value}) one row at a time from a CSV or XLSX file
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return _csv_rows(file)
+    if extension == '.xlsx':
+        return _xlsx_rows(file)
+    raise ImportFileError('Unsupported file type: upload a .csv or .xlsx file')
+
+
+class RowValidator:
+    # Applies ItemForm's field rules to raw rows. The form fields are built once
+    # and reused, rather than binding a new ItemForm for every row.
+    def __init__(self):
+        fields = IMPORT_FIELDS + OPTIONAL_IMPORT_FIELDS
+        self.fields = {name: form_field for name, form_field in ItemForm.base_fields.items() if name in fields}
+
+    def clean(self, row):
+        cleaned, errors = {}, {}
+        for name, form_field in self.fields.items():
+            value = row.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            # A missing or blank par level keeps the current one
+            if name in OPTIONAL_IMPORT_FIELDS and value in (None, ''):
+                continue
+            try:
+                cleaned[name] = form_field.clean(value)
+            except ValidationError as error:
+                errors[name] = error.messages
+        if cleaned.get('reorder_level') and cleaned.get('target_level') and cleaned['target_level'] < cleaned['reorder_level']:
+            errors['target_level'] = ['The target level cannot be below the reorder level.']
+        return cleaned, errors
+
+
+def _import_batch(batch, result):
+    # The rows are read and written in one transaction, so the before values
+    # reported to items_changed are the ones the upsert replaces
+    with transaction.atomic():
+        # Items are matched on name; when a name appears twice in a batch the last row wins
+        names = {cleaned['name'] for line, cleaned in batch}
+        existing = {}
+        for item in Item.objects.filter(name__in=names).order_by('-pk'):
+            existing[item.name] = item
+
+        to_create, to_update = {}, {}
+        for line, cleaned in batch:
+            item = existing.get(cleaned['name']) or to_create.get(cleaned['name'])
+            if item is None:
+                if cleaned['cost'] is None:
+                    result.errors.append((line, {'cost': ['This field is required.']}))
+                    continue
+                to_create[cleaned['name']] = Item(**cleaned)
+                continue
+
+            # A blank cost keeps the current one
+            if cleaned['cost'] is None:
+                cleaned['cost'] = item.cost
+            changed = False
+            for name, value in cleaned.items():
+                if getattr(item, name) != value:
+                    setattr(item, name, value)
+                    changed = True
+            if item.pk is None:
+                continue
+            if changed:
+                to_update[item.pk] = item
+            elif item.pk not in to_update:
+                result.unchanged += 1
+
+        Item.objects.bulk_create(to_create.values())
+        # bulk_update() builds a CASE WHEN per row and per field, which grows
+        # quadratically with the batch; an INSERT ... ON CONFLICT(id) DO UPDATE
+        # upserts the same rows in one linear statement.
+        Item.objects.bulk_create(
+            to_update.values(),
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=['category', 'cost', 'amount', 'reorder_level', 'target_level'],
+        )
+        # Bulk writes skip Item's model signals, so report the changes directly
+        changes = [(None, item.tracked_values()) for item in to_create.values()]
+        changes += [(item._loaded_values, item.tracked_values()) for item in to_update.values()]
+        items_changed.send(sender=Item, changes=changes, reason='import')
+    result.created += len(to_create)
+    result.updated += len(to_update)
+
+
+def import_items(rows, batch_size=IMPORT_BATCH_SIZE):
+    # Validate and upsert (line number, row) pairs, one transaction per batch.
+    # Invalid rows are reported in the result and do not stop the import.
+    result = ImportResult()
+    validator = RowValidator()
+    for chunk in chunked(rows, batch_size):
+        batch = []
+        for line, row in chunk:
+            cleaned, errors = validator.clean(row)
+            if errors:
+                result.errors.append((line, errors))
+            else:
+                batch.append((line, cleaned))
+        if batch:
+            _import_batch(batch, result)
+    return result
@@ -0,0 +1,273 @@
+import datetime
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .exports import EXPORT_COLUMNS, EXPORTERS, item_rows
+from .imports import import_items, read_rows
+from .models import Job
+from .rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Rejected rows kept in an import job's result; the rest are only counted
+IMPORT_ERRORS_KEPT = 100
+
+# Seconds between the thread runner's requeue and purge passes
+MAINTENANCE_INTERVAL = 3600
+
+# Job handlers by kind. A handler gets the claimed Job, may write a result
+# file with write_result(), and returns the summary shown by the status
+# endpoint.
+JOB_HANDLERS = {}
+
+
+def handler(kind):
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def job_path(name):
+    return os.path.join(settings.INVENTORY_JOB_DIR, name)
+
+
+def save_upload(upload):
+    # Copy an uploaded file to the job directory for a job to read later, and
+    # return its name there
+    os.makedirs(settings.INVENTORY_JOB_DIR, exist_ok=True)
+    name = f'upload-{uuid.uuid4().hex}{os.path.splitext(upload.name)[1].lower()}'
+    with open(job_path(name), 'wb') as file:
+        for chunk in upload.chunks():
+            file.write(chunk)
+    return name
+
+
+def write_result(job, chunks, filename, content_type):
+    # Write the job's result file chunk by chunk, so memory stays flat
+    os.makedirs(settings.INVENTORY_JOB_DIR, exist_ok=True)
+    # The name is set first, so run_job can delete a partly written file
+    job.result_file = f'job-{job.pk}-{uuid.uuid4().hex}{os.path.splitext(filename)[1]}'
+    with open(job_path(job.result_file), 'wb') as file:
+        for chunk in chunks:
+            file.write(chunk)
+    job.result_name = filename
+    job.content_type = content_type
+
+
+@handler('export')
+def export_job(job):
+    exporter = EXPORTERS[job.params['format']]
+    rows = item_rows(location_id=job.params.get('location'))
+    write_result(job, exporter.stream(EXPORT_COLUMNS, rows), exporter.filename('inventory_list'), exporter.content_type)
+    return None
+
+
+@handler('import')
+def import_job(job):
+    path = job_path(job.params['upload'])
+    try:
+        with open(path, 'rb') as file:
+            result = import_items(read_rows(file, job.params['filename']))
+    finally:
+        os.remove(path)
+    return {
+        'created': result.created,
+        'updated': result.updated,
+        'unchanged': result.unchanged,
+        'error_count': len(result.errors),
+        'errors': result.errors[:IMPORT_ERRORS_KEPT],
+    }
+
+
+@handler('rebuild_rollups')
+def rebuild_rollups_job(job):
+    return {'categories': len(rebuild_rollups())}
+
+
+def enqueue(kind, params=None, owner=None):
+    # Queue a job. Under the thread runner it starts once the surrounding
+    # transaction commits, so the job (and whatever it reads) is visible to
+    # the thread.
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job kind: {kind}')
+    job = Job.objects.create(kind=kind, params=params or {}, owner=owner)
+    if settings.INVENTORY_JOB_RUNNER == 'thread':
+        transaction.on_commit(start_threads)
+    return job
+
+
+def claim_job(worker):
+    # Mark the oldest queued job as running for `worker` and return it, or
+    # None when the queue is empty. The claim is a conditional UPDATE, so two
+    # workers, in threads or in separate processes, never get the same job.
+    while True:
+        pk = Job.objects.filter(status=Job.QUEUED).order_by('created_at', 'id').values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=timezone.now(),
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+        # Another worker claimed it first
+
+
+def run_job(job):
+    try:
+        job.result = JOB_HANDLERS[job.kind](job)
+        job.status = Job.DONE
+    except Exception as error:
+        logger.exception('Job %s (%s) failed', job.pk, job.kind)
+        job.status = Job.FAILED
+        job.error = str(error) or error.__class__.__name__
+        if job.result_file:
+            remove_file(job.result_file)
+            job.result_file = job.result_name = job.content_type = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['result', 'result_file', 'result_name', 'content_type', 'status', 'error', 'finished_at'])
+    return job
+
+
+def run_pending(worker, stop=None):
+    # Run queued jobs one after another until the queue is empty (or `stop`
+    # is set). Returns the number of jobs run.
+    count = 0
+    while stop is None or not stop.is_set():
+        job = claim_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale(before):
+    # Put jobs back in the queue that were claimed before `before` and never
+    # finished, e.g. because their worker was killed
+    return Job.objects.filter(status=Job.RUNNING, started_at__lt=before).update(
+        status=Job.QUEUED, worker='', started_at=None,
+    )
+
+
+def purge_jobs(before):
+    # Delete finished jobs created before `before`, with their result files
+    jobs = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], created_at__lt=before)
+    for name in jobs.exclude(result_file='').values_list('result_file', flat=True):
+        remove_file(name)
+    return jobs.delete()[0]
+
+
+def maintain_jobs(stale_after=None, keep_days=None):
+    # Requeue jobs running for more than `stale_after` seconds and purge those
+    # finished more than `keep_days` days ago, by default
+    # INVENTORY_JOB_STALE_AFTER and INVENTORY_JOB_KEEP_DAYS. Returns the
+    # numbers requeued and purged.
+    if stale_after is None:
+        stale_after = settings.INVENTORY_JOB_STALE_AFTER
+    if keep_days is None:
+        keep_days = settings.INVENTORY_JOB_KEEP_DAYS
+    now = timezone.now()
+    requeued = requeue_stale(now - datetime.timedelta(seconds=stale_after))
+    purged = purge_jobs(now - datetime.timedelta(days=keep_days))
+    return requeued, purged
+
+
+def remove_file(name):
+    try:
+        os.remove(job_path(name))
+    except FileNotFoundError:
+        pass
+
+
+# In-process runner: a pool of threads, each draining the queue and exiting
+# when it is empty. Enqueuing sets _wanted, so a thread that found the queue
+# empty just before a job was committed looks again instead of leaving it
+# stranded, and a burst of jobs never needs more than INVENTORY_JOB_THREADS.
+# The web server starts the pool with its first request (see start_runner), and
+# the first thread started after each MAINTENANCE_INTERVAL requeues stale and
+# purges old jobs, as run_jobs does when it starts.
+_executor = None
+_executor_lock = threading.Condition()
+_active = 0
+_wanted = False
+_next_maintenance = 0
+
+
+def _maintain():
+    global _next_maintenance
+    with _executor_lock:
+        if time.monotonic() < _next_maintenance:
+            return
+        _next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+    try:
+        requeued, purged = maintain_jobs()
+    except Exception:
+        logger.exception('Job maintenance failed')
+        return
+    if requeued or purged:
+        logger.info('Requeued %s stale job(s), purged %s old job(s)', requeued, purged)
+
+
+def _drain():
+    global _active, _wanted
+    worker = f'thread-{os.getpid()}-{threading.get_ident()}'
+    try:
+        _maintain()
+        while True:
+            run_pending(worker)
+            with _executor_lock:
+                if not _wanted:
+                    _active -= 1
+                    _executor_lock.notify_all()
+                    return
+                _wanted = False
+    except BaseException:
+        with _executor_lock:
+            _active -= 1
+            _executor_lock.notify_all()
+        raise
+    finally:
+        connections.close_all()
+
+
+def start_threads():
+    global _executor, _active, _wanted
+    with _executor_lock:
+        _wanted = True
+        if _active >= settings.INVENTORY_JOB_THREADS:
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.INVENTORY_JOB_THREADS, thread_name_prefix='inventory-job')
+        _active += 1
+    _executor.submit(_drain)
+
+
+def start_runner():
+    # Called by the WSGI and ASGI entry points. Under the thread runner, the
+    # pool starts with the first request the process serves, to run the jobs
+    # a previous process left queued or running without waiting for the next
+    # enqueue.
+    if settings.INVENTORY_JOB_RUNNER == 'thread':
+        request_started.connect(_start_on_first_request, dispatch_uid='inventory_app.jobs.start_runner')
+
+
+def _start_on_first_request(**kwargs):
+    request_started.disconnect(dispatch_uid='inventory_app.jobs.start_runner')
+    start_threads()
+
+
+def wait_for_threads(timeout=None):
+    # Block until the in-process job threads have drained the queue, e.g.
+    # before shutting down. Returns False if `timeout` seconds pass first.
+    with _executor_lock:
+        return _executor_lock.wait_for(lambda: _active == 0, timeout)
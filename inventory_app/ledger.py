@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import StockMovement, StockSnapshot
+
+
+def movements_for(changes, reason=None, created_at=None):
+    # StockMovement rows for a list of (before, after) item changes. Only
+    # changes to the amount are recorded; creation and deletion always are.
+    created_at = created_at or timezone.now()
+    movements = []
+    for before, after in changes:
+        if before is None:
+            kind, item_id, delta = 'create', after['id'], after['amount']
+        elif after is None:
+            kind, item_id, delta = 'delete', before['id'], -before['amount']
+        else:
+            kind, item_id, delta = 'update', after['id'], after['amount'] - before['amount']
+            if not delta:
+                continue
+        movements.append(StockMovement(
+            item_id=item_id, delta=delta, reason=reason or kind, created_at=created_at,
+        ))
+    return movements
+
+
+def record_changes(changes, reason=None):
+    # One INSERT for everything a single write reported, in the same
+    # transaction as the write, so the ledger never disagrees with the items
+    StockMovement.objects.bulk_create(movements_for(changes, reason))
+
+
+def _latest_snapshot(item_id, when=None):
+    snapshots = StockSnapshot.objects.filter(item_id=item_id)
+    if when is not None:
+        snapshots = snapshots.filter(taken_at__lte=when)
+    return snapshots.order_by('-movement_id')
+
+
+def stock_as_of(when, item_ids=None):
+    # {item id: amount on hand at `when`}. Each item starts from its latest
+    # snapshot taken by then and replays only the movements recorded after
+    # it. Items that did not exist at `when` are left out.
+    snapshots = StockSnapshot.objects.filter(
+        pk=Subquery(_latest_snapshot(OuterRef('item_id'), when).values('pk')[:1])
+    )
+    movements = StockMovement.objects.filter(
+        created_at__lte=when,
+        pk__gt=Coalesce(Subquery(_latest_snapshot(OuterRef('item_id'), when).values('movement_id')[:1]), 0),
+    )
+    if item_ids is not None:
+        snapshots = snapshots.filter(item_id__in=item_ids)
+        movements = movements.filter(item_id__in=item_ids)
+
+    state = {item_id: [amount, exists] for item_id, amount, exists in snapshots.values_list('item_id', 'amount', 'exists')}
+    tail = movements.order_by().values('item_id').annotate(total=Sum('delta'), last=Max('pk'))
+    last = {}
+    for row in tail:
+        state.setdefault(row['item_id'], [0, False])[0] += row['total']
+        last[row['last']] = row['item_id']
+    # Whether an item exists after its tail depends on the last movement
+    for pk, reason in StockMovement.objects.filter(pk__in=last).values_list('pk', 'reason'):
+        state[last[pk]][1] = reason != 'delete'
+    return {item_id: amount for item_id, (amount, exists) in state.items() if exists}
+
+
+def take_snapshots():
+    # Snapshot every item with movements since the last run, so as-of queries
+    # never replay more than one snapshot period of the ledger. Every earlier
+    # movement is covered by an item's latest snapshot already, so only the
+    # new ones are read. Returns the number of snapshots written.
+    with transaction.atomic():
+        floor = StockSnapshot.objects.aggregate(floor=Max('movement_id'))['floor'] or 0
+        new = list(
+            StockMovement.objects.filter(pk__gt=floor)
+            .order_by()
+            .values('item_id')
+            .annotate(total=Sum('delta'), last=Max('pk'), taken_at=Max('created_at'))
+        )
+        if not new:
+            return 0
+        previous = {
+            snapshot.item_id: snapshot
+            for snapshot in StockSnapshot.objects.filter(
+                pk=Subquery(_latest_snapshot(OuterRef('item_id')).values('pk')[:1]),
+                item_id__in=[row['item_id'] for row in new],
+            )
+        }
+        deleted = set(
+            StockMovement.objects.filter(pk__in=[row['last'] for row in new], reason='delete')
+            .values_list('item_id', flat=True)
+        )
+        snapshots = []
+        for row in new:
+            before = previous.get(row['item_id'])
+            snapshots.append(StockSnapshot(
+                item_id=row['item_id'],
+                amount=(before.amount if before else 0) + row['total'],
+                exists=row['item_id'] not in deleted,
+                movement_id=row['last'],
+                taken_at=max(row['taken_at'], before.taken_at) if before else row['taken_at'],
+            ))
+        StockSnapshot.objects.bulk_create(snapshots)
+    return len(snapshots)
@@ -0,0 +1,259 @@
+import datetime
+import itertools
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .benchmarks import seed_items, seed_locations
+from . import jobs
+from .models import Employee, Item, Job, Location
+from .rollups import rebuild_rollups
+
+LOADTEST_PASSWORD = 'loadtest-password'
+
+
+def seed_users(count, batch_size=2000):
+    # Employees with their users, all in the employee group. The password is
+    # hashed once and shared, since hashing dominates creating a user.
+    password = make_password(LOADTEST_PASSWORD)
+    users = User.objects.bulk_create(
+        (User(username=f'loadtest{number:06d}', password=password) for number in range(count)),
+        batch_size=batch_size,
+    )
+    Employee.objects.bulk_create(
+        (Employee(user=user, name=f'Employee {user.username}', position='Clerk') for user in users),
+        batch_size=batch_size,
+    )
+    group, created = Group.objects.get_or_create(name='employee')
+    User.groups.through.objects.bulk_create(
+        (User.groups.through(user=user, group=group) for user in users),
+        batch_size=batch_size,
+    )
+    return users
+
+
+class LoadContext:
+    # State shared by the clients of one run
+    def __init__(self, item_ids, deletable_ids, usernames, location_ids=(), employee_ids=(), job_ids=None):
+        self.item_ids = item_ids
+        self.deletable_ids = deletable_ids
+        self.usernames = usernames
+        self.location_ids = location_ids
+        self.employee_ids = employee_ids
+        # {user id: id of a finished export job of theirs}
+        self.job_ids = job_ids or {}
+        self.sequence = itertools.count()
+
+    def unique(self, prefix):
+        return f'{prefix} {next(self.sequence):08d}'
+
+
+class LoadClient(Client):
+    # A test client that remembers who it logged in as, for the routes that
+    # only show users their own objects
+    user = None
+
+    def force_login(self, user, backend=None):
+        super().force_login(user, backend)
+        self.user = user
+
+
+def seed_jobs(users):
+    # A finished export job for each user, with a small result file
+    job_ids = {}
+    for user in users:
+        job = Job.objects.create(kind='export', params={'format': 'csv'}, owner=user, status=Job.DONE, finished_at=timezone.now())
+        jobs.write_result(job, [b'Name,Category,Cost,Amount\r\n'], 'inventory_list.csv', 'text/csv')
+        job.save(update_fields=['result_file', 'result_name', 'content_type'])
+        job_ids[user.pk] = job.pk
+    return job_ids
+
+
+def _item_form(context, rng):
+    return {
+        'name': context.unique('Loadtest item'),
+        'category': rng.choice([value for value, label in Item.CATEGORY]),
+        'cost': round(rng.uniform(0.5, 50), 2),
+        'amount': rng.randint(0, 500),
+    }
+
+
+def _csv_upload(context, rng):
+    rows = [f"{context.unique('Loadtest import')},Dairy,1.5,{rng.randint(0, 50)}" for _ in range(20)]
+    content = '\n'.join(['Name,Category,Cost,Amount'] + rows).encode()
+    return {'file': SimpleUploadedFile('items.csv', content, content_type='text/csv')}
+
+
+def _as_of(rng):
+    # A point in the past week, as the stock-as-of API takes it
+    return (timezone.now() - datetime.timedelta(hours=rng.randint(0, 7 * 24))).isoformat()
+
+
+def _transfer_route(context, rng):
+    source, destination = rng.sample(context.location_ids, 2)
+    return {'source': source, 'destination': destination}
+
+
+# Routes driven by the load test: (name, needs login, request function).
+# Each function sends one request through a test client.
+ROUTES = [
+    ('index', False, lambda client, context, rng: client.get(reverse('index'))),
+    ('inventory', False, lambda client, context, rng: client.get(reverse('inventory'), {'sort': rng.choice(['name', '-amount', 'category'])})),
+    ('item-search', False, lambda client, context, rng: client.get(reverse('item-search'), {'q': rng.choice(['item 01', 'dairy', 'bev'])})),
+    ('item-detail', False, lambda client, context, rng: client.get(reverse('item-detail', args=[rng.choice(context.item_ids)]))),
+    ('add-item', True, lambda client, context, rng: client.post(reverse('add-item'), _item_form(context, rng))),
+    ('item-update', True, lambda client, context, rng: client.post(
+        reverse('item-update', args=[rng.choice(context.item_ids)]), _item_form(context, rng),
+    )),
+    ('item-delete', True, lambda client, context, rng: client.post(reverse('item-delete', args=[context.deletable_ids.pop()]))),
+    ('item-import', True, lambda client, context, rng: client.post(reverse('item-import'), _csv_upload(context, rng))),
+    ('item-bulk-edit', True, lambda client, context, rng: client.get(
+        reverse('item-bulk-edit'), {'category': rng.choice([value for value, label in Item.CATEGORY])},
+    )),
+    ('stock-adjust', True, lambda client, context, rng: client.post(
+        reverse('stock-adjust'), {'item': rng.choice(context.item_ids), 'delta': rng.choice([-1, 1])},
+    )),
+    ('item-adjust', True, lambda client, context, rng: client.post(
+        reverse('item-adjust', args=[rng.choice(context.item_ids)]), {'delta': rng.choice([-1, 1])},
+    )),
+    ('stock-transfer', True, lambda client, context, rng: client.post(
+        reverse('stock-transfer'), {'item': rng.choice(context.item_ids), 'quantity': 1, **_transfer_route(context, rng)},
+    )),
+    ('inventory-dashboard', True, lambda client, context, rng: client.get(reverse('inventory-dashboard'))),
+    ('low-stock', True, lambda client, context, rng: client.get(reverse('low-stock'))),
+    ('purchase-list', True, lambda client, context, rng: client.get(reverse('purchase-list'), {'format': 'csv'})),
+    ('inventory-valuation', True, lambda client, context, rng: client.get(reverse('inventory-valuation'))),
+    ('export-items', True, lambda client, context, rng: client.get(reverse('export-items'), {'format': 'csv'})),
+    ('download-to-excel', True, lambda client, context, rng: client.get(reverse('download-to-excel'))),
+    ('api-item-list', False, lambda client, context, rng: client.get(reverse('api-item-list'))),
+    ('api-item-detail', False, lambda client, context, rng: client.get(reverse('api-item-detail', args=[rng.choice(context.item_ids)]))),
+    # The job routes measure queueing and polling; jobs are left to a worker
+    ('job-export', True, lambda client, context, rng: client.post(reverse('job-export') + '?format=csv')),
+    ('job-import', True, lambda client, context, rng: client.post(reverse('job-import'), _csv_upload(context, rng))),
+    ('job-rebuild-rollups', True, lambda client, context, rng: client.post(reverse('job-rebuild-rollups'))),
+    ('job-status', True, lambda client, context, rng: client.get(reverse('job-status', args=[context.job_ids[client.user.pk]]))),
+    ('job-download', True, lambda client, context, rng: client.get(reverse('job-download', args=[context.job_ids[client.user.pk]]))),
+    ('metrics', False, lambda client, context, rng: client.get(reverse('metrics'))),
+    ('api-stock-as-of', False, lambda client, context, rng: client.get(
+        reverse('api-stock-as-of'), {'as_of': _as_of(rng), 'item': rng.choice(context.item_ids)},
+    )),
+    ('register_page', False, lambda client, context, rng: client.post(reverse('register_page'), {
+        'username': context.unique('newuser').replace(' ', ''), 'email': '',
+        'password1': LOADTEST_PASSWORD, 'password2': LOADTEST_PASSWORD,
+    })),
+    ('login', False, lambda client, context, rng: client.post(reverse('login'), {
+        'username': rng.choice(context.usernames), 'password': LOADTEST_PASSWORD,
+    })),
+    ('user_page', True, lambda client, context, rng: client.get(reverse('user_page', args=[rng.choice(context.employee_ids)]))),
+    # Updates the logged-in user's own employee record, whatever the pk
+    ('user_update', True, lambda client, context, rng: client.post(
+        reverse('user_update', args=[rng.choice(context.employee_ids)]),
+        {'name': context.unique('Employee'), 'position': 'Clerk'},
+    )),
+    # Only a client's first request ends a session; the rest log out a client
+    # that is logged out already
+    ('logout', True, lambda client, context, rng: client.post(reverse('logout'))),
+]
+
+
+def _consume(response):
+    if response.streaming:
+        for chunk in response.streaming_content:
+            pass
+    response.close()
+
+
+def _percentile(sorted_values, percent):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+def run_route(name, login, send, context, users, requests, concurrency):
+    # Send `requests` requests to one route from `concurrency` clients at once
+    timings, query_counts, statuses = [], [], []
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def client_loop(seed):
+        rng = random.Random(seed)
+        # Server errors are counted, not raised
+        client = LoadClient(raise_request_exception=False)
+        if login:
+            client.force_login(rng.choice(users))
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = send(client, context, rng)
+                _consume(response)
+                elapsed = time.perf_counter() - start
+            with lock:
+                timings.append(elapsed)
+                query_counts.append(len(queries))
+                statuses.append(response.status_code)
+        connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(client_loop, seed) for seed in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        'route': name,
+        'requests': len(timings),
+        'errors': sum(status >= 500 for status in statuses),
+        'statuses': {str(status): statuses.count(status) for status in sorted(set(statuses))},
+        'throughput_rps': round(len(timings) / wall, 1),
+        'p50_ms': round(_percentile(timings, 50) * 1000, 2),
+        'p95_ms': round(_percentile(timings, 95) * 1000, 2),
+        'p99_ms': round(_percentile(timings, 99) * 1000, 2),
+        'queries_mean': round(statistics.mean(query_counts), 1),
+        'queries_max': max(query_counts),
+    }
+
+
+def run_loadtest(items=10000, users=100, requests=200, concurrency=8, routes=None):
+    # Seed the current (throwaway) database, then load every route in turn
+    cache.clear()
+    seed_items(items)
+    item_ids = list(Item.objects.values_list('pk', flat=True))
+    # One extra item for every delete request
+    doomed = Item.objects.bulk_create(
+        Item(name=f'Loadtest delete {number:06d}', category='Dairy', cost=1.0, amount=1) for number in range(requests)
+    )
+    deletable_ids = [item.pk for item in doomed]
+    # Par levels spread as in the reorder benchmark, so some items are low
+    Item.objects.update(reorder_level=(F('id') * 7919) % 100, target_level=(F('id') * 7919) % 100 + 200)
+    rebuild_rollups()
+    seed_locations(3)
+    location_ids = list(Location.objects.values_list('pk', flat=True))
+    seeded_users = seed_users(users)
+
+    employee_ids = list(Employee.objects.values_list('pk', flat=True))
+    job_ids = seed_jobs(seeded_users)
+
+    context = LoadContext(
+        item_ids, deletable_ids, [user.username for user in seeded_users], location_ids, employee_ids, job_ids,
+    )
+    results = []
+    for name, login, send in ROUTES:
+        if routes and name not in routes:
+            continue
+        results.append(run_route(name, login, send, context, seeded_users, requests, concurrency))
+    return results
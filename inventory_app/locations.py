@@ -0,0 +1,148 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Item, Location, LocationStock
+from .valuation import stock_value
+
+
+def default_location_id():
+    # The location that location-agnostic changes are booked to, or None to
+    # keep stock as company-wide totals only
+    return Location.objects.filter(is_default=True).values_list('pk', flat=True).first()
+
+
+def located_amount(amount):
+    # The part of an item's amount held at locations. A location never holds
+    # less than none, so an item counted below zero has no stock anywhere.
+    return max(amount, 0)
+
+
+def stock_deltas(changes):
+    # {item id: change in located amount} of a list of (before, after) item
+    # changes. Deleted items are left out: their stock rows go with them.
+    deltas = defaultdict(int)
+    for before, after in changes:
+        if after is None:
+            continue
+        deltas[after['id']] += located_amount(after['amount']) - (located_amount(before['amount']) if before is not None else 0)
+    return {item_id: delta for item_id, delta in deltas.items() if delta}
+
+
+def add_stock(location_id, deltas):
+    # Add {item id: delta} to the items' stock at one location with relative
+    # UPDATEs, one per distinct delta rather than one per item, so a bulk
+    # import costs a handful of statements. An item without a row there has
+    # none of its stock at the location, so the row is created with the delta.
+    # Decreases go through remove_stock(), which never takes a row below zero.
+    by_delta = defaultdict(list)
+    for item_id, delta in deltas.items():
+        by_delta[delta].append(item_id)
+
+    missing = {}
+    for delta, item_ids in by_delta.items():
+        rows = LocationStock.objects.filter(location_id=location_id, item_id__in=item_ids)
+        if rows.update(amount=F('amount') + delta) < len(item_ids):
+            missing.update(dict.fromkeys(item_ids, delta))
+    if not missing:
+        return
+
+    existing = set(
+        LocationStock.objects.filter(location_id=location_id, item_id__in=missing).values_list('item_id', flat=True)
+    )
+    new = {item_id: delta for item_id, delta in missing.items() if item_id not in existing}
+    try:
+        with transaction.atomic():
+            LocationStock.objects.bulk_create(
+                LocationStock(location_id=location_id, item_id=item_id, amount=delta) for item_id, delta in new.items()
+            )
+    except IntegrityError:
+        # Another writer created some of the rows first
+        add_stock(location_id, new)
+
+
+def remove_stock(quantities, first_location_id=None):
+    # Take {item id: quantity} away from the items' stock rows, from
+    # `first_location_id` first and then from the locations holding most,
+    # never leaving a row below zero. The rows are read locked and updated
+    # with one relative UPDATE per distinct quantity taken. Any part of a
+    # quantity the rows do not hold is left unbooked.
+    rows = (
+        LocationStock.objects.select_for_update()
+        .filter(item_id__in=quantities, amount__gt=0)
+        .values_list('pk', 'item_id', 'location_id', 'amount')
+    )
+    by_item = defaultdict(list)
+    for row in rows:
+        by_item[row[1]].append(row)
+
+    by_take = defaultdict(list)
+    for item_id, quantity in quantities.items():
+        item_rows = sorted(by_item[item_id], key=lambda row: (row[2] != first_location_id, -row[3], row[2]))
+        for pk, _, _, amount in item_rows:
+            if quantity <= 0:
+                break
+            take = min(quantity, amount)
+            by_take[take].append(pk)
+            quantity -= take
+    for take, pks in by_take.items():
+        LocationStock.objects.filter(pk__in=pks).update(amount=F('amount') - take)
+
+
+def book_deltas(location_id, deltas):
+    # Book {item id: delta} of located stock: increases to `location_id`,
+    # decreases from it first and then from wherever the item is held
+    increases = {item_id: delta for item_id, delta in deltas.items() if delta > 0}
+    decreases = {item_id: -delta for item_id, delta in deltas.items() if delta < 0}
+    with transaction.atomic():
+        if increases:
+            add_stock(location_id, increases)
+        if decreases:
+            remove_stock(decreases, location_id)
+
+
+def apply_changes(changes):
+    # Book location-agnostic item changes, keeping the sum of an item's stock
+    # rows equal to its located amount: increases go to the default location,
+    # and decreases are taken from it and then from the other locations
+    deltas = stock_deltas(changes)
+    if not deltas:
+        return
+    location_id = default_location_id()
+    if location_id is not None:
+        book_deltas(location_id, deltas)
+
+
+def book_unlocated_stock():
+    # Book to the default location whatever part of each item's located
+    # amount its stock rows do not account for, or take away what they hold
+    # beyond it, after writes that bypass items_changed (bulk seeding, raw
+    # SQL). Returns the number of items corrected.
+    location_id = default_location_id()
+    if location_id is None:
+        return 0
+    rows = (
+        Item.objects.annotate(located=Coalesce(Sum('location_stock__amount'), 0))
+        .exclude(located=Greatest('amount', 0))
+        .values_list('pk', 'amount', 'located')
+    )
+    deltas = {item_id: located_amount(amount) - located for item_id, amount, located in rows}
+    book_deltas(location_id, deltas)
+    return len(deltas)
+
+
+def location_totals():
+    # [{id, name, is_default, item_count, total_amount, total_value}] for
+    # every location from one aggregate query over location_stock_location_idx.
+    # item_count counts the items with stock there.
+    return list(
+        Location.objects.order_by('name')
+        .annotate(
+            item_count=Count('stock', filter=~Q(stock__amount=0)),
+            total_amount=Sum('stock__amount'),
+            total_value=Sum(stock_value('stock__amount', 'stock__item__cost')),
+        )
+        .values('id', 'name', 'is_default', 'item_count', 'total_amount', 'total_value')
+    )
@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from inventory_app.benchmarks import SUITES
+
+
+class Command(BaseCommand):
+    help = 'Benchmark inventory code paths against a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=sorted(SUITES))
+        parser.add_argument('--items', type=int, default=10000, help='Number of items to seed')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case')
+        parser.add_argument('--concurrency', type=int, default=32, help='Simultaneous clients (concurrency suite)')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads (concurrency suite)')
+        parser.add_argument(
+            '--latency-ms', type=float, default=5,
+            help='Delay added to every query to stand in for a database server (concurrency suite)',
+        )
+        parser.add_argument('--seconds', type=float, default=3, help='Run time per profile (sqlite suite)')
+        parser.add_argument('--locations', type=int, default=20, help='Stores besides the default location (locations suite)')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        results = SUITES[options['suite']](**options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write('  '.join(f'{key}={value}' for key, value in result.items()))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app.forecasting import HISTORY_DAYS, SMOOTHING_ALPHA, forecast_demand
+
+
+class Command(BaseCommand):
+    help = 'Forecast daily demand for every item from the stock ledger and store it for the item pages; schedule it daily'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=HISTORY_DAYS, help='Days of consumption history to read')
+        parser.add_argument('--alpha', type=float, default=SMOOTHING_ALPHA, help='Exponential smoothing weight of the newest day')
+
+    def handle(self, *args, **options):
+        if options['days'] < 7:
+            raise CommandError('--days must be at least 7, to see every weekday')
+        if not 0 < options['alpha'] <= 1:
+            raise CommandError('--alpha must be between 0 and 1')
+
+        start = time.perf_counter()
+        count = forecast_demand(days=options['days'], alpha=options['alpha'])
+        self.stdout.write(
+            f"Forecast {count} item(s) from {options['days']} days of history in {time.perf_counter() - start:.2f}s"
+        )
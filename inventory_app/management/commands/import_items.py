@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app.imports import IMPORT_BATCH_SIZE, ImportFileError, import_items, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Create or update items from a CSV or XLSX file, matching existing items by name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows written per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_items(read_rows(file, options['path']), batch_size=options['batch_size'])
+        except (OSError, ImportFileError) as error:
+            raise CommandError(error)
+
+        for line, errors in result.errors:
+            messages = '; '.join(f'{field}: {" ".join(field_errors)}' for field, field_errors in errors.items())
+            self.stderr.write(f'Line {line}: {messages}')
+        self.stdout.write(
+            f'Created {result.created}, updated {result.updated}, unchanged {result.unchanged}, '
+            f'rejected {len(result.errors)}'
+        )
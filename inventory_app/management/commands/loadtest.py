@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from inventory_app.benchmarks import benchmark_database
+from inventory_app.loadtest import ROUTES, run_loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and load every inventory route through the test client, '
+        'reporting latency percentiles, throughput and query counts as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help='Number of items to seed')
+        parser.add_argument('--users', type=int, default=100, help='Number of employee users to seed')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+        parser.add_argument('--concurrency', type=int, default=8, help='Simultaneous clients')
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help='Only load this route (by URL name); may be repeated',
+        )
+        parser.add_argument('--output', help='Write the report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        names = [name for name, login, send in ROUTES]
+        unknown = set(options['routes'] or []) - set(names)
+        if unknown:
+            raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(names)}")
+
+        # Queued jobs are left for a worker that never comes, so they do not
+        # run in the background while other routes are timed
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                    INVENTORY_JOB_RUNNER='worker', INVENTORY_JOB_DIR=os.path.join(directory, 'jobs'),
+                ), \
+                benchmark_database(os.path.join(directory, 'loadtest.sqlite3')):
+            results = run_loadtest(
+                items=options['items'],
+                users=options['users'],
+                requests=options['requests'],
+                concurrency=options['concurrency'],
+                routes=options['routes'],
+            )
+            database = {
+                'engine': connection.settings_dict['ENGINE'],
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            }
+
+        report = {
+            'django': django.get_version(),
+            'database': database,
+            'async_views': settings.INVENTORY_ASYNC_VIEWS,
+            'items': options['items'],
+            'users': options['users'],
+            'requests_per_route': options['requests'],
+            'concurrency': options['concurrency'],
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+            self.stdout.write(f"Wrote {len(results)} route result(s) to {options['output']}")
+        else:
+            self.stdout.write(output)
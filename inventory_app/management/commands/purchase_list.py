@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app.exports import available_exporters
+from inventory_app.reorder import PURCHASE_COLUMNS, purchase_rows
+
+
+class Command(BaseCommand):
+    help = 'Write every item below its reorder level, with how much to order, to a purchase list file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to write, e.g. purchase_list.csv')
+        parser.add_argument('--format', help='Export format; defaults to the one matching the file extension')
+
+    def handle(self, *args, **options):
+        exporters = available_exporters()
+        export_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.')
+        if export_format not in exporters:
+            raise CommandError(f"Unknown export format {export_format!r}. Choose one of: {', '.join(exporters)}")
+
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        try:
+            with open(options['path'], 'wb') as file:
+                for chunk in exporters[export_format].stream(PURCHASE_COLUMNS, counted(purchase_rows())):
+                    file.write(chunk)
+        except OSError as error:
+            raise CommandError(error)
+        self.stdout.write(f"Wrote {count} item(s) to order to {options['path']}")
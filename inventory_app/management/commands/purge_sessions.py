@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app.sessions import PURGE_BATCH_SIZE, purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired sessions from the database in small batches. '
+        'Schedule it (e.g. hourly from cron) instead of clearsessions, which deletes them all in one statement.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help='Sessions deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        deleted = purge_expired_sessions(options['batch_size'], options['pause'])
+        self.stdout.write(f'Deleted {deleted} expired session(s)')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app.rollups import find_drift, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-category inventory rollups from the item table and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Only report drift, and exit with an error if there is any',
+        )
+
+    def handle(self, *args, **options):
+        drift = find_drift()
+        for category, stored, expected in drift:
+            self.stdout.write(f'{category}: stored {stored}, expected {expected}')
+
+        if options['check']:
+            if drift:
+                raise CommandError(f'{len(drift)} category rollup(s) have drifted')
+            self.stdout.write('Rollups match the item table')
+            return
+
+        totals = rebuild_rollups()
+        self.stdout.write(f'Rebuilt {len(totals)} category rollup(s), {len(drift)} had drifted')
@@ -0,0 +1,73 @@
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from inventory_app.jobs import maintain_jobs, run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (exports, imports, rollup rebuilds). '
+        'Start several of these processes for a process pool; each claims jobs atomically.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1, help='Jobs run at once by this process')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs, then exit')
+        parser.add_argument(
+            '--stale-after', type=int, default=settings.INVENTORY_JOB_STALE_AFTER,
+            help='Requeue jobs that have been running for this many seconds when starting',
+        )
+        parser.add_argument(
+            '--keep-days', type=int, default=settings.INVENTORY_JOB_KEEP_DAYS,
+            help='Delete finished jobs and their files after this many days',
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1:
+            raise CommandError('--threads must be at least 1')
+        requeued, purged = maintain_jobs(options['stale_after'], options['keep_days'])
+        self.stdout.write(f'Requeued {requeued} stale job(s), purged {purged} old job(s)')
+
+        name = f'{socket.gethostname()}-{os.getpid()}'
+        stop = threading.Event()
+
+        def work(number):
+            worker = f'{name}-{number}'
+            count = 0
+            while not stop.is_set():
+                ran = run_pending(worker, stop)
+                count += ran
+                if options['once']:
+                    break
+                if not ran:
+                    stop.wait(options['poll'])
+            return count
+
+        def pooled_work(number):
+            try:
+                return work(number)
+            finally:
+                connections.close_all()
+
+        if options['threads'] == 1:
+            # A job interrupted here is requeued by the next run as stale
+            count = work(0)
+        else:
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                futures = [executor.submit(pooled_work, number) for number in range(options['threads'])]
+                try:
+                    while not all(future.done() for future in futures):
+                        time.sleep(0.2)
+                except KeyboardInterrupt:
+                    # Let running jobs finish, but claim no new ones
+                    stop.set()
+                count = sum(future.result() for future in futures)
+        self.stdout.write(f'Ran {count} job(s)')
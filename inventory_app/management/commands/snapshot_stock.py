@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory_app.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Snapshot the amount of every item with stock movements since the last run; schedule it periodically'
+
+    def handle(self, *args, **options):
+        count = take_snapshots()
+        self.stdout.write(f'Wrote {count} stock snapshot(s)')
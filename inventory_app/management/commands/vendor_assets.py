@@ -0,0 +1,51 @@
+import os
+import urllib.request
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory_app.assets import VENDOR_ASSETS, integrity
+
+
+class Command(BaseCommand):
+    help = (
+        'Download the pinned third-party static files (Bootstrap) into inventory_app/static/, '
+        'checking each against its integrity hash. Commit the files so pages work offline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only verify the vendored files, without downloading')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for each download')
+
+    def handle(self, *args, **options):
+        static_dir = os.path.join(apps.get_app_config('inventory_app').path, 'static')
+        problems = []
+        for name, asset in VENDOR_ASSETS.items():
+            path = os.path.join(static_dir, *asset['path'].split('/'))
+            if options['check']:
+                try:
+                    with open(path, 'rb') as file:
+                        data = file.read()
+                except FileNotFoundError:
+                    problems.append(f'{name}: {asset["path"]} is missing')
+                    continue
+                if integrity(data) != asset['integrity']:
+                    problems.append(f'{name}: {asset["path"]} does not match its integrity hash')
+                continue
+
+            try:
+                with urllib.request.urlopen(asset['url'], timeout=options['timeout']) as response:
+                    data = response.read()
+            except OSError as error:
+                raise CommandError(f'Could not download {name} from {asset["url"]}: {error}')
+            if integrity(data) != asset['integrity']:
+                raise CommandError(f'{name} from {asset["url"]} does not match its integrity hash')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(data)
+            self.stdout.write(f'Vendored {name} ({len(data)} bytes) to {asset["path"]}')
+
+        if problems:
+            raise CommandError('; '.join(problems) + '. Run manage.py vendor_assets to fetch them.')
+        if options['check']:
+            self.stdout.write(f'{len(VENDOR_ASSETS)} vendored asset(s) OK')
@@ -0,0 +1,199 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Timings of the request being handled. A context variable rather than a
+# thread local, so the queries and templates an async view runs through
+# sync_to_async are still counted against its request.
+_current = ContextVar('inventory_request_timings', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Histograms kept per view: name -> (help text, buckets, RequestTimings attribute)
+HISTOGRAMS = {
+    'inventory_request_duration_seconds': ('Time to build the response', LATENCY_BUCKETS, 'wall_time'),
+    'inventory_template_duration_seconds': ('Time spent rendering templates', LATENCY_BUCKETS, 'template_time'),
+    'inventory_db_duration_seconds': ('Time spent in SQL queries', LATENCY_BUCKETS, 'sql_time'),
+    'inventory_db_queries': ('Number of SQL queries', QUERY_COUNT_BUCKETS, 'sql_count'),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf bucket, not yet cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+# (metric name, view name) -> Histogram, for this process only. Each worker
+# of a multi-process server keeps its own, so scrape every worker.
+_histograms = {}
+_lock = threading.Lock()
+
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+
+
+class RequestTimings:
+    def __init__(self, path):
+        self.path = path
+        self.wall_time = 0
+        self.template_time = 0
+        self.sql_time = 0
+        self.sql_count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook: time every query of the request
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.sql_time += elapsed
+            self.sql_count += 1
+            threshold = settings.INVENTORY_SLOW_QUERY_MS
+            if threshold is not None and elapsed * 1000 >= threshold:
+                # Parameters may hold personal data or credentials, so they
+                # are only logged at DEBUG
+                logger.warning('Slow query (%.1f ms) on %s: %s', elapsed * 1000, self.path, sql)
+                logger.debug('Slow query params: %r', params)
+
+    def server_timing(self):
+        return ', '.join([
+            f'total;dur={self.wall_time * 1000:.2f}',
+            f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"',
+            f'template;dur={self.template_time * 1000:.2f}',
+        ])
+
+
+def observe(view, timings):
+    with _lock:
+        for name, (help_text, buckets, attribute) in HISTOGRAMS.items():
+            histogram = _histograms.get((name, view))
+            if histogram is None:
+                histogram = _histograms[name, view] = Histogram(buckets)
+            histogram.observe(getattr(timings, attribute))
+
+
+def render_metrics():
+    # The histograms in the Prometheus text exposition format
+    lines = []
+    with _lock:
+        for name, (help_text, buckets, attribute) in HISTOGRAMS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, view), histogram in sorted(_histograms.items()):
+                if metric != name:
+                    continue
+                label = view.replace('\\', '\\\\').replace('"', '\\"')
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {count}')
+                lines.append(f'{name}_sum{{view="{label}"}} {histogram.sum}')
+                lines.append(f'{name}_count{{view="{label}"}} {histogram.count}')
+    return '\n'.join(lines) + '\n'
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+
+class MetricsMiddleware:
+    # Times every request: wall time, template rendering and SQL (count and
+    # time). The totals go out in a Server-Timing header and into the
+    # per-view histograms served at /metrics. Goes first in MIDDLEWARE so the
+    # other middleware is timed too. The body of a streaming response is
+    # produced after the middleware returns and is not included.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(request.path)
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.wrap_queries(stack, timings)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings(request.path)
+        token = _current.set(timings)
+        start = time.perf_counter()
+        # Database connections belong to a thread, so the wrappers go on the
+        # connections of the thread that runs this request's sync code
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.wrap_queries)(stack, timings)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self.finish(request, response, timings, start)
+
+    def wrap_queries(self, stack, timings):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timings))
+
+    def finish(self, request, response, timings, start):
+        timings.wall_time = time.perf_counter() - start
+        response['Server-Timing'] = timings.server_timing()
+        observe(_view_name(request), timings)
+        return response
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings = _current.get()
+            if timings is not None:
+                timings.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    # The Django template backend, timing each template a view renders for
+    # MetricsMiddleware. Includes and extends count towards their parent.
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    Item = apps.get_model('inventory_app', 'Item')
+    CategoryRollup = apps.get_model('inventory_app', 'CategoryRollup')
+    totals = (
+        Item.objects.order_by()
+        .values('category')
+        .annotate(
+            item_count=models.Count('id'),
+            total_amount=models.Sum('amount'),
+            total_value=models.Sum(models.F('amount') * models.F('cost')),
+        )
+    )
+    CategoryRollup.objects.bulk_create(
+        CategoryRollup(
+            category=row['category'],
+            item_count=row['item_count'],
+            total_amount=row['total_amount'] or 0,
+            total_value=row['total_value'] or 0,
+        )
+        for row in totals
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0008_item_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=200, unique=True)),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_amount', models.IntegerField(default=0)),
+                ('total_value', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:43
+
+from django.db import migrations, models
+
+
+def create_item_version(apps, schema_editor):
+    TableVersion = apps.get_model('inventory_app', 'TableVersion')
+    TableVersion.objects.create(name='item', version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0009_categoryrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_item_version, migrations.RunPython.noop),
+    ]
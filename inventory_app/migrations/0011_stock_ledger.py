@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def record_opening_balances(apps, schema_editor):
+    Item = apps.get_model('inventory_app', 'Item')
+    StockMovement = apps.get_model('inventory_app', 'StockMovement')
+    now = django.utils.timezone.now()
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(item_id=item_id, delta=amount, reason='opening', created_at=now)
+            for item_id, amount in Item.objects.values_list('id', 'amount').iterator()
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0010_tableversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('exists', models.BooleanField(default=True)),
+                ('movement_id', models.BigIntegerField()),
+                ('taken_at', models.DateTimeField()),
+                ('item', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory_app.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'movement_id'], name='snapshot_item_idx'), models.Index(fields=['movement_id'], name='snapshot_movement_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('opening', 'Opening balance'), ('create', 'Created'), ('update', 'Updated'), ('delete', 'Deleted'), ('import', 'Imported'), ('adjustment', 'Stock adjustment')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory_app.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'id'], name='movement_item_idx'), models.Index(fields=['created_at'], name='movement_created_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0011_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='reorder_level',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='target_level',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('amount__lt', models.F('reorder_level'))), fields=['category', 'name', 'id'], name='item_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0012_item_reorder_levels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('moving_average_7', models.FloatField()),
+                ('moving_average_28', models.FloatField()),
+                ('smoothed', models.FloatField()),
+                ('weekday_factors', models.JSONField()),
+                ('next_week', models.JSONField()),
+                ('history_days', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+                ('item', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='forecast', to='inventory_app.item')),
+            ],
+        ),
+    ]
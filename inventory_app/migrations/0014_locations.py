@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_default_location(apps, schema_editor):
+    # All existing stock starts out at one default location
+    Item = apps.get_model('inventory_app', 'Item')
+    Location = apps.get_model('inventory_app', 'Location')
+    LocationStock = apps.get_model('inventory_app', 'LocationStock')
+    location = Location.objects.create(name='Main', is_default=True)
+    LocationStock.objects.bulk_create(
+        (
+            LocationStock(location=location, item_id=item_id, amount=amount)
+            for item_id, amount in Item.objects.exclude(amount=0).values_list('id', 'amount').iterator()
+        ),
+        batch_size=2000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0013_item_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('is_default', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LocationStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_stock', to='inventory_app.item')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock', to='inventory_app.location')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='location',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('is_default',), name='location_single_default'),
+        ),
+        migrations.AddIndex(
+            model_name='locationstock',
+            index=models.Index(fields=['location', 'item'], name='location_stock_location_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='locationstock',
+            constraint=models.UniqueConstraint(fields=('item', 'location'), name='location_stock_unique'),
+        ),
+        migrations.RunPython(create_default_location, migrations.RunPython.noop),
+    ]
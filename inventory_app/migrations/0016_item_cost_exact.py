@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # First of three steps moving Item.cost from a float to a decimal: a
+    # nullable column for the exact cost, filled in batches by 0017
+
+    dependencies = [
+        ('inventory_app', '0015_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='cost_exact',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:05
+
+from django.db import migrations, models, transaction
+from django.db.models.functions import Cast, Round
+
+# Items converted per transaction
+BATCH_SIZE = 5000
+
+
+def copy_costs(apps, schema_editor):
+    # Copy every float cost into cost_exact, rounded to the cent, with one
+    # UPDATE per range of ids. Each batch commits on its own, so a large table
+    # is never locked for the whole conversion, and a rerun after an
+    # interruption only redoes the rows not copied yet.
+    Item = apps.get_model('inventory_app', 'Item')
+    exact = models.DecimalField(max_digits=10, decimal_places=2)
+    bounds = Item.objects.aggregate(low=models.Min('id'), high=models.Max('id'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        with transaction.atomic():
+            Item.objects.filter(id__gte=start, id__lt=start + BATCH_SIZE, cost_exact__isnull=True).update(
+                cost_exact=Round(Cast('cost', exact), 2),
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('inventory_app', '0016_item_cost_exact'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_costs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def rebuild_rollup_values(apps, schema_editor):
+    # Recompute the rollup values from the exact costs, dropping the float
+    # error the stored totals had accumulated
+    Item = apps.get_model('inventory_app', 'Item')
+    CategoryRollup = apps.get_model('inventory_app', 'CategoryRollup')
+    values = (
+        Item.objects.order_by()
+        .values('category')
+        .annotate(
+            total_value=models.Sum(
+                models.ExpressionWrapper(
+                    models.F('amount') * models.F('cost'),
+                    output_field=models.DecimalField(max_digits=16, decimal_places=2),
+                )
+            )
+        )
+    )
+    for row in values:
+        CategoryRollup.objects.filter(category=row['category']).update(total_value=row['total_value'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0017_copy_item_cost'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='item',
+            name='cost',
+        ),
+        migrations.RenameField(
+            model_name='item',
+            old_name='cost_exact',
+            new_name='cost',
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='cost',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='categoryrollup',
+            name='total_value',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=16),
+        ),
+        migrations.RunPython(rebuild_rollup_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+def clear_negative_stock(apps, schema_editor):
+    # Rows taken below zero by decreases charged to the default location
+    # regardless of what it held. Zero them, then move the decreases onto
+    # the locations that do hold the items, so each item's rows add up to
+    # its amount again.
+    Item = apps.get_model('inventory_app', 'Item')
+    LocationStock = apps.get_model('inventory_app', 'LocationStock')
+    negative = dict(LocationStock.objects.filter(amount__lt=0).values_list('item_id', 'amount'))
+    if not negative:
+        return
+    LocationStock.objects.filter(amount__lt=0).update(amount=0)
+    for item_id in negative:
+        amount = max(Item.objects.get(pk=item_id).amount, 0)
+        rows = list(LocationStock.objects.filter(item_id=item_id, amount__gt=0).order_by('-amount', 'location_id'))
+        excess = sum(row.amount for row in rows) - amount
+        for row in rows:
+            if excess <= 0:
+                break
+            take = min(excess, row.amount)
+            row.amount -= take
+            row.save(update_fields=['amount'])
+            excess -= take
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory_app', '0018_item_cost_decimal'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_negative_stock, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='locationstock',
+            constraint=models.CheckConstraint(check=models.Q(('amount__gte', 0)), name='location_stock_amount_gte_0'),
+        ),
+    ]
@@ -1,9 +1,24 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Create your models here.
 
+CENT = Decimal('0.01')
+
+
+def to_cents(value):
+    # A cost or stock value as a two-place Decimal. Floats convert as printed
+    # rather than from their binary expansion, so 1.1 is 1.10, and so do the
+    # sums SQLite returns for decimal expressions.
+    if value is None:
+        return None
+    return Decimal(repr(value) if isinstance(value, float) else value).quantize(CENT)
+
+
 class Item(models.Model):
     CATEGORY = [
         ("Dairy", "Dairy"),
@@ -16,13 +31,203 @@ class Item(models.Model):
     
     name = models.CharField(max_length=200)
     category = models.CharField(max_length=200, choices=CATEGORY)
-    cost = models.FloatField(blank=True)
+    # Exact to the cent, so totals and valuations add up without float drift
+    cost = models.DecimalField(max_digits=10, decimal_places=2, blank=True)
     amount = models.IntegerField()
+    # Par levels: below reorder_level the item is low on stock and should be
+    # ordered back up to target_level. A reorder level of 0 never reorders.
+    reorder_level = models.PositiveIntegerField(default=0)
+    target_level = models.PositiveIntegerField(default=0)
+
+    # Fields reported to items_changed receivers
+    TRACKED_FIELDS = ('id', 'name', 'category', 'cost', 'amount')
     
+    class Meta:
+        # Composite indexes matching the sort orders of the inventory list
+        indexes = [
+            models.Index(fields=['name', 'id'], name='item_name_idx'),
+            models.Index(fields=['category', 'name', 'id'], name='item_category_idx'),
+            models.Index(fields=['amount', 'id'], name='item_amount_idx'),
+            # Partial index of only the low-stock items, in purchase list order
+            models.Index(
+                fields=['category', 'name', 'id'],
+                condition=models.Q(amount__lt=models.F('reorder_level')),
+                name='item_low_stock_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the values as loaded, e.g. for forms to tell what an edit
+        # changed. Saves and deletes read the stored values again.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The item_saving receiver reads the stored values this save replaces,
+        # so the read and the write are one transaction and no other write
+        # can land between them
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def tracked_values(self):
+        values = {field: getattr(self, field) for field in self.TRACKED_FIELDS}
+        # A cost assigned as a float or string is reported as the stored
+        # decimal, so receivers never mix it with the Decimals loaded from the DB
+        values['cost'] = to_cents(values['cost'])
+        return values
+
     def get_absolute_url(self):
         return reverse('item-detail', args=[str(self.id)])
 
 
+class CategoryRollup(models.Model):
+    # Per-category totals, kept up to date from items_changed and rebuilt by
+    # the rebuild_rollups command
+    category = models.CharField(max_length=200, unique=True)
+    item_count = models.IntegerField(default=0)
+    total_amount = models.IntegerField(default=0)
+    total_value = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+
+class Location(models.Model):
+    # A kitchen, store or commissary holding stock. Changes that do not name
+    # a location (the item form, imports, plain stock adjustments) add to the
+    # default one, and take from it first and then from the others.
+    name = models.CharField(max_length=200, unique=True)
+    is_default = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['is_default'], condition=models.Q(is_default=True), name='location_single_default'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class LocationStock(models.Model):
+    # The amount of an item held at one location, never below zero.
+    # Item.amount stays the company-wide total, kept equal to the sum of these
+    # rows (an item counted below zero has none anywhere).
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name='stock')
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='location_stock')
+    amount = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'location'], name='location_stock_unique'),
+            models.CheckConstraint(check=models.Q(amount__gte=0), name='location_stock_amount_gte_0'),
+        ]
+        indexes = [
+            models.Index(fields=['location', 'item'], name='location_stock_location_idx'),
+        ]
+
+
+class TableVersion(models.Model):
+    # Counter bumped on every write to a table, used to build ETags and
+    # cache keys without reading the table itself
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class StockMovement(models.Model):
+    # Append-only ledger of every change to an item's amount. Rows outlive
+    # the item they describe, so the item id is kept without a constraint.
+    REASONS = [
+        ("opening", "Opening balance"),
+        ("create", "Created"),
+        ("update", "Updated"),
+        ("delete", "Deleted"),
+        ("import", "Imported"),
+        ("adjustment", "Stock adjustment"),
+    ]
+
+    item = models.ForeignKey(Item, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+')
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASONS)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'id'], name='movement_item_idx'),
+            models.Index(fields=['created_at'], name='movement_created_idx'),
+        ]
+
+
+class StockSnapshot(models.Model):
+    # An item's amount once every movement up to and including `movement_id`
+    # is applied, so as-of queries only replay the movements after it.
+    # `taken_at` is the time of the latest of those movements.
+    item = models.ForeignKey(Item, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='+')
+    amount = models.IntegerField()
+    exists = models.BooleanField(default=True)
+    movement_id = models.BigIntegerField()
+    taken_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'movement_id'], name='snapshot_item_idx'),
+            models.Index(fields=['movement_id'], name='snapshot_movement_idx'),
+        ]
+
+
+class ItemForecast(models.Model):
+    # Daily demand forecast for an item, written by the forecast_demand
+    # command. Every run replaces the whole table, so rows of deleted items
+    # only last until the next run.
+    item = models.OneToOneField(Item, on_delete=models.DO_NOTHING, db_constraint=False, related_name='forecast')
+    moving_average_7 = models.FloatField()
+    moving_average_28 = models.FloatField()
+    # Exponentially smoothed daily demand, with the weekday pattern taken out
+    smoothed = models.FloatField()
+    # Demand on each weekday (Monday first) relative to the average day
+    weekday_factors = models.JSONField()
+    # [{'date', 'weekday', 'quantity'}] for each of the next seven days
+    next_week = models.JSONField()
+    history_days = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+
+class Job(models.Model):
+    # A long task (export, import, rollup rebuild) queued in the database and
+    # run by the in-process job threads or the run_jobs command
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS, default=QUEUED)
+    owner = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    # Summary for the status endpoint, and the file to download, relative to
+    # INVENTORY_JOB_DIR
+    result = models.JSONField(null=True, blank=True)
+    result_file = models.CharField(max_length=255, blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest queued job; finished jobs stay out of this index
+            models.Index(fields=['created_at', 'id'], condition=models.Q(status='queued'), name='job_queued_idx'),
+        ]
+
+
 class Employee(models.Model):
     user = models.OneToOneField(User, null=True, on_delete=models.CASCADE)
     name = models.CharField(max_length=200)
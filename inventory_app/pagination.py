@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise Http404('Invalid cursor')
+    if not isinstance(values, list):
+        raise Http404('Invalid cursor')
+    return values
+
+
+def _after(keys, values, descending):
+    # Rows strictly after `values` in (k1, k2, ...) order, written as
+    # k1 >= v1 AND (k1 > v1 OR (k1 = v1 AND (k2 > v2 OR ...))) so the leading
+    # comparison can drive an index range scan.
+    lookup = 'lt' if descending else 'gt'
+    condition = Q(**{f'{keys[-1]}__{lookup}': values[-1]})
+    for key, value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+        condition = Q(**{f'{key}__{lookup}': value}) | (Q(**{key: value}) & condition)
+    return Q(**{f'{keys[0]}__{lookup}e': values[0]}) & condition
+
+
+class KeysetPage:
+    # One page of a keyset-paginated queryset. It mirrors the parts of
+    # django.core.paginator.Page that templates use, with cursors in place of
+    # page numbers.
+    def __init__(self, object_list, keys, has_next, has_previous):
+        self.object_list = object_list
+        self.keys = keys
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def _cursor(self, obj):
+        return encode_cursor([getattr(obj, key) for key in self.keys])
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return self._cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            return self._cursor(self.object_list[0])
+        return None
+
+
+def _keyset_query(queryset, keys, page_size, after, before, descending):
+    # The query for one page, and a function turning its rows into the page
+    if before:
+        values = decode_cursor(before)
+        if len(values) != len(keys):
+            raise Http404('Invalid cursor')
+        ordering = [key if descending else f'-{key}' for key in keys]
+        query = queryset.filter(_after(keys, values, not descending)).order_by(*ordering)[:page_size + 1]
+        return query, lambda rows: KeysetPage(rows[:page_size][::-1], keys, True, len(rows) > page_size)
+
+    ordering = [f'-{key}' if descending else key for key in keys]
+    queryset = queryset.order_by(*ordering)
+    if after:
+        values = decode_cursor(after)
+        if len(values) != len(keys):
+            raise Http404('Invalid cursor')
+        queryset = queryset.filter(_after(keys, values, descending))
+    return queryset[:page_size + 1], lambda rows: KeysetPage(rows[:page_size], keys, len(rows) > page_size, bool(after))
+
+
+def keyset_paginate(queryset, keys, page_size, after=None, before=None, descending=False):
+    # Fetch the page after (or before) a cursor without OFFSET, so the cost of
+    # a page does not grow with how deep it is. `keys` must end in a unique
+    # field so the ordering is total.
+    query, page = _keyset_query(queryset, keys, page_size, after, before, descending)
+    return page(list(query))
+
+
+async def akeyset_paginate(queryset, keys, page_size, after=None, before=None, descending=False):
+    # keyset_paginate() for async views
+    query, page = _keyset_query(queryset, keys, page_size, after, before, descending)
+    return page([row async for row in query])
@@ -0,0 +1,48 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .exports import ROW_CHUNK_SIZE
+from .models import Item, to_cents
+from .valuation import stock_value
+
+# (field, label) pairs written to the purchase list export
+PURCHASE_COLUMNS = [
+    ('name', 'Name'),
+    ('category', 'Category'),
+    ('amount', 'On Hand'),
+    ('reorder_level', 'Reorder Level'),
+    ('target_level', 'Target Level'),
+    ('order_quantity', 'Order Quantity'),
+    ('order_cost', 'Order Cost'),
+]
+
+# Keys the low-stock list is ordered and paginated by, matching item_low_stock_idx
+LOW_STOCK_KEYS = ('category', 'name', 'pk')
+
+
+def low_stock():
+    # Every item below its reorder level, with the quantity that brings it
+    # back up to its target (or at least to the reorder level) and what that
+    # costs, worked out by the database in a single query. The filter is the
+    # condition of the partial index item_low_stock_idx, so only the low items
+    # are read however many items there are.
+    return (
+        Item.objects.filter(amount__lt=F('reorder_level'))
+        .annotate(order_quantity=Greatest('target_level', 'reorder_level') - F('amount'))
+        .annotate(order_cost=stock_value('order_quantity'))
+    )
+
+
+def purchase_rows(chunk_size=ROW_CHUNK_SIZE):
+    # Plain tuples of PURCHASE_COLUMNS for the exporters, read in chunks. The
+    # order cost is computed, so it comes back unrounded and is put in cents
+    # like the item costs.
+    fields = [field for field, label in PURCHASE_COLUMNS]
+    rows = (
+        low_stock()
+        .order_by(*LOW_STOCK_KEYS)
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+    cost = fields.index('order_cost')
+    return (row[:cost] + (to_cents(row[cost]),) + row[cost + 1:] for row in rows)
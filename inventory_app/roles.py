@@ -0,0 +1,80 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+# Upper bound on how long another process can see stale roles when the cache
+# backend is not shared between processes
+ROLE_CACHE_TIMEOUT = 300
+
+_GENERATION_KEY = 'inventory:roles:generation'
+_GROUPS_KEY = 'inventory:roles:groups'
+
+
+def _generation():
+    # Bumped whenever memberships change in a way that cannot be traced to
+    # specific users, which orphans every cached membership at once
+    generation = cache.get(_GENERATION_KEY)
+    if generation is None:
+        generation = 0
+        cache.add(_GENERATION_KEY, generation, None)
+    return generation
+
+
+def _user_key(user_id):
+    return f'inventory:roles:user:{_generation()}:{user_id}'
+
+
+def group_names():
+    # {group id: name} for every group, shared by all users
+    names = cache.get(_GROUPS_KEY)
+    if names is None:
+        names = dict(Group.objects.values_list('id', 'name'))
+        cache.set(_GROUPS_KEY, names, ROLE_CACHE_TIMEOUT)
+    return names
+
+
+def get_group_id(name):
+    # The cached map is reloaded once before giving up, in case the group was
+    # created by another process
+    for attempt in range(2):
+        for group_id, group_name in group_names().items():
+            if group_name == name:
+                return group_id
+        invalidate_groups()
+    raise Group.DoesNotExist(f'Group {name!r} does not exist.')
+
+
+def get_user_group_ids(user):
+    key = _user_key(user.pk)
+    group_ids = cache.get(key)
+    if group_ids is None:
+        group_ids = frozenset(user.groups.values_list('id', flat=True))
+        cache.set(key, group_ids, ROLE_CACHE_TIMEOUT)
+    return group_ids
+
+
+def get_user_roles(user):
+    # Group names of the user, resolved at most once per request and served
+    # from the cache afterwards
+    if not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, '_inventory_roles', None)
+    if roles is None:
+        names = group_names()
+        roles = frozenset(names[group_id] for group_id in get_user_group_ids(user) if group_id in names)
+        user._inventory_roles = roles
+    return roles
+
+
+def invalidate_users(user_ids):
+    cache.delete_many([_user_key(user_id) for user_id in user_ids])
+
+
+def invalidate_all_users():
+    try:
+        cache.incr(_GENERATION_KEY)
+    except ValueError:
+        cache.set(_GENERATION_KEY, 1, None)
+
+
+def invalidate_groups():
+    cache.delete(_GROUPS_KEY)
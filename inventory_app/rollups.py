@@ -0,0 +1,110 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from .models import CategoryRollup, Item, to_cents
+from .valuation import stock_value
+
+
+def _value(values):
+    return values['amount'] * (values['cost'] or 0)
+
+
+def category_deltas(changes):
+    # {category: [item_count, total_amount, total_value]} net of a list of
+    # (before, after) item changes
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for before, after in changes:
+        if before is not None:
+            delta = deltas[before['category']]
+            delta[0] -= 1
+            delta[1] -= before['amount']
+            delta[2] -= _value(before)
+        if after is not None:
+            delta = deltas[after['category']]
+            delta[0] += 1
+            delta[1] += after['amount']
+            delta[2] += _value(after)
+    return {category: delta for category, delta in deltas.items() if any(delta)}
+
+
+def _add_to_rollup(category, item_count, total_amount, total_value):
+    return CategoryRollup.objects.filter(category=category).update(
+        item_count=F('item_count') + item_count,
+        total_amount=F('total_amount') + total_amount,
+        total_value=F('total_value') + total_value,
+    )
+
+
+def apply_changes(changes):
+    # Fold item changes into the rollup rows with relative UPDATEs, so
+    # concurrent writers never overwrite each other's totals
+    with transaction.atomic():
+        for category, delta in category_deltas(changes).items():
+            if _add_to_rollup(category, *delta):
+                continue
+            try:
+                with transaction.atomic():
+                    CategoryRollup.objects.create(
+                        category=category,
+                        item_count=delta[0],
+                        total_amount=delta[1],
+                        total_value=delta[2],
+                    )
+            except IntegrityError:
+                # Another writer created the row first
+                _add_to_rollup(category, *delta)
+
+
+def compute_rollups():
+    # {category: (item_count, total_amount, total_value)} from one aggregate query
+    rows = (
+        Item.objects.order_by()
+        .values('category')
+        .annotate(
+            item_count=Count('id'),
+            total_amount=Sum('amount'),
+            total_value=Sum(stock_value()),
+        )
+    )
+    return {
+        row['category']: (row['item_count'], row['total_amount'] or 0, to_cents(row['total_value'] or 0))
+        for row in rows
+    }
+
+
+def find_drift():
+    # [(category, stored totals or None, expected totals or None)] for every
+    # category whose stored rollup does not match the item table
+    expected = compute_rollups()
+    stored = {
+        row.category: (row.item_count, row.total_amount, row.total_value)
+        for row in CategoryRollup.objects.all()
+    }
+    drift = []
+    for category in sorted(set(expected) | set(stored)):
+        have = stored.get(category)
+        want = expected.get(category)
+        if have is not None and want is None and not any(have):
+            continue
+        if have is None or want is None or have != want:
+            drift.append((category, have, want))
+    return drift
+
+
+def rebuild_rollups():
+    # Replace every rollup row with freshly aggregated totals
+    with transaction.atomic():
+        totals = compute_rollups()
+        CategoryRollup.objects.exclude(category__in=totals).delete()
+        CategoryRollup.objects.bulk_create(
+            [
+                CategoryRollup(category=category, item_count=count, total_amount=amount, total_value=value)
+                for category, (count, amount, value) in totals.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['category'],
+            update_fields=['item_count', 'total_amount', 'total_value'],
+        )
+    return totals
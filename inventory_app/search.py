@@ -0,0 +1,114 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import Q
+
+from .models import Item
+
+SEARCH_LIMIT = 50
+
+FTS_TABLE = 'inventory_app_item_fts'
+ITEM_TABLE = Item._meta.db_table
+
+# External-content FTS5 index over Item.name and Item.category. It stores only
+# the token index and reads the text back from the item table.
+CREATE_FTS_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, category,
+        content='{ITEM_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+
+# Triggers keep the index in step with every write to the item table,
+# including bulk_create(), queryset.update() and raw SQL
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {ITEM_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, category) VALUES (new.id, new.name, new.category);
+        END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {ITEM_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, category) VALUES ('delete', old.id, old.name, old.category);
+        END
+    """,
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF name, category ON {ITEM_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, category) VALUES ('delete', old.id, old.name, old.category);
+            INSERT INTO {FTS_TABLE}(rowid, name, category) VALUES (new.id, new.name, new.category);
+        END
+    """,
+}
+
+# Whether each database alias has the FTS5 index, checked once per process
+_fts_ready = {}
+
+
+def ensure_search_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    # Create the FTS5 table and its triggers if they are missing. Runs after
+    # every migrate: SQLite rebuilds a table to alter it, which drops the
+    # triggers on the old copy, so they are restored here and the index is
+    # rebuilt once to pick up anything written while they were gone.
+    connection = connections[using]
+    _fts_ready.pop(using, None)
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        if ITEM_TABLE not in connection.introspection.table_names(cursor):
+            return
+        try:
+            cursor.execute(CREATE_FTS_TABLE)
+        except OperationalError:
+            # SQLite built without FTS5
+            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [ITEM_TABLE])
+        existing = {row[0] for row in cursor.fetchall()}
+        for name, sql in FTS_TRIGGERS.items():
+            cursor.execute(sql)
+        if not existing.issuperset(FTS_TRIGGERS):
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _search_ready(connection):
+    if connection.alias not in _fts_ready:
+        ready = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                ready = cursor.fetchone() is not None
+        _fts_ready[connection.alias] = ready
+    return _fts_ready[connection.alias]
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def search_items(query, limit=SEARCH_LIMIT, using=DEFAULT_DB_ALIAS):
+    # Items whose name or category contain words starting with every term in
+    # `query`, best match first (name hits weigh more than category hits)
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    connection = connections[using]
+    if _search_ready(connection):
+        match = ' '.join('"{}"*'.format(term) for term in terms)
+        return list(Item.objects.using(using).raw(
+            f"""
+            SELECT {ITEM_TABLE}.* FROM {FTS_TABLE}
+            JOIN {ITEM_TABLE} ON {ITEM_TABLE}.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), {ITEM_TABLE}.name
+            LIMIT %s
+            """,
+            [match, limit],
+        ))
+
+    # Other backends fall back to a substring match on both columns
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(category__icontains=term)
+    return list(Item.objects.using(using).filter(condition).order_by('name', 'pk')[:limit])
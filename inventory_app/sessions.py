@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions import middleware
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+
+# Expired sessions deleted per transaction by purge_expired_sessions
+PURGE_BATCH_SIZE = 1000
+
+
+class UnchangedSessionMixin:
+    # Remembers a session's data as loaded, so a request that marks it as
+    # modified without changing anything, e.g. by writing back the value it
+    # read, does not save it again
+
+    _loaded_key = None
+    _loaded_state = None
+
+    def load(self):
+        data = super().load()
+        self._loaded_key = self.session_key
+        self._loaded_state = self.serializer().dumps(data)
+        return data
+
+    def is_unchanged(self):
+        # False for a new, flushed or cycled session: its key has changed
+        if self._loaded_state is None or self.session_key != self._loaded_key:
+            return False
+        return self.serializer().dumps(self._session) == self._loaded_state
+
+
+class SessionMiddleware(middleware.SessionMiddleware):
+    # Django's SessionMiddleware for the configured engine, skipping the save
+    # (a django_session write, or a new cookie) when the session data is
+    # what was loaded
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.SessionStore = type('SessionStore', (UnchangedSessionMixin, self.SessionStore), {})
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is not None and session.modified and not settings.SESSION_SAVE_EVERY_REQUEST and session.is_unchanged():
+            session.modified = False
+        return super().process_response(request, response)
+
+
+def purge_expired_sessions(batch_size=PURGE_BATCH_SIZE, pause=0, now=None):
+    # Delete the expired rows of django_session a batch at a time, each batch
+    # in its own short transaction with an optional pause between them, so
+    # the purge never holds SQLite's write lock for long. clearsessions
+    # deletes them all in one statement. Returns the number deleted.
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        keys = list(
+            Session.objects.filter(expire_date__lt=now).order_by('expire_date').values_list('session_key', flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+        with transaction.atomic():
+            deleted += Session.objects.filter(session_key__in=keys, expire_date__lt=now).delete()[0]
+        if len(keys) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return deleted
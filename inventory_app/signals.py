@@ -0,0 +1,112 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from . import fragments, ledger, locations, roles, rollups, versions
+from .models import Item
+
+# Sent after Item rows change, whether through Item.save()/delete() or bulk
+# writes that bypass model signals (bulk_create, upserts, queryset updates).
+# `changes` is a list of (before, after) dicts of Item.TRACKED_FIELDS values;
+# `before` is None for new items and `after` is None for deleted ones. Bulk
+# writers may pass a `reason` ('import', 'adjustment') for the stock ledger,
+# and a `location` id when they already booked the change to that location's
+# stock; other changes are booked to the default location.
+items_changed = Signal()
+
+
+def _stored_values(instance):
+    return Item.objects.filter(pk=instance.pk).values(*Item.TRACKED_FIELDS).first()
+
+
+@receiver(pre_save, sender=Item)
+def item_saving(sender, instance, raw, **kwargs):
+    # The values being overwritten, read inside Item.save()'s transaction.
+    # Those remembered when the instance was loaded may be out of date: an
+    # adjustment or another request may have changed the row since.
+    if raw or instance.pk is None:
+        return
+    instance._loaded_values = _stored_values(instance)
+
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    before = None if created else getattr(instance, '_loaded_values', None)
+    after = instance.tracked_values()
+    instance._loaded_values = after
+    items_changed.send(sender=Item, changes=[(before, after)])
+
+
+@receiver(pre_delete, sender=Item)
+def item_deleting(sender, instance, **kwargs):
+    # Sent inside the deletion's transaction, like item_saving
+    instance._loaded_values = _stored_values(instance)
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    before = getattr(instance, '_loaded_values', None) or instance.tracked_values()
+    items_changed.send(sender=Item, changes=[(before, None)])
+
+
+@receiver(items_changed)
+def update_rollups(sender, changes, **kwargs):
+    rollups.apply_changes(changes)
+
+
+@receiver(items_changed)
+def record_stock_movements(sender, changes, reason=None, **kwargs):
+    ledger.record_changes(changes, reason)
+
+
+@receiver(items_changed)
+def update_location_stock(sender, changes, location=None, **kwargs):
+    if location is None:
+        locations.apply_changes(changes)
+
+
+@receiver(items_changed)
+def bump_item_version(sender, changes, **kwargs):
+    versions.bump_version(versions.ITEM_TABLE)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # user.groups.add(...): only this user is affected
+        roles.invalidate_users([instance.pk])
+    elif pk_set:
+        # group.user_set.add(...): the affected users are in pk_set
+        roles.invalidate_users(pk_set)
+    else:
+        # group.user_set.clear() does not say which users were removed
+        roles.invalidate_all_users()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    # Drop anything cached under a reused primary key
+    if created:
+        roles.invalidate_users([instance.pk])
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, **kwargs):
+    roles.invalidate_groups()
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, **kwargs):
+    # Deleting a group drops its memberships without sending m2m_changed
+    roles.invalidate_groups()
+    roles.invalidate_all_users()
+
+
+@receiver(items_changed)
+def invalidate_item_fragments(sender, changes, **kwargs):
+    pks = {values['id'] for change in changes for values in change if values is not None}
+    fragments.invalidate_items(pks)
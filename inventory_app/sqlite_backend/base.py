@@ -0,0 +1,37 @@
+from django.db.backends.sqlite3 import base
+
+# Pragmas for a file database shared by several server threads or processes:
+# WAL lets readers carry on while one writer commits, and busy_timeout makes a
+# blocked writer wait instead of failing with "database is locked"
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # The stock SQLite backend with two extra OPTIONS:
+    #   'pragmas': {name: value} run on every new connection
+    #   'transaction_mode': 'IMMEDIATE' makes atomic() take the write lock up
+    #       front. With the default deferred BEGIN, a transaction that reads
+    #       and then writes fails immediately when another writer holds the
+    #       lock, because SQLite cannot wait for it without deadlocking.
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict['OPTIONS'].get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,83 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .locations import add_stock
+from .models import Item, LocationStock
+from .signals import items_changed
+
+
+class StockAdjustmentError(Exception):
+    def __init__(self, item_id, message):
+        super().__init__(message)
+        self.item_id = item_id
+
+
+def _adjust_location_stock(item_id, location_id, delta, minimum):
+    # Apply one adjustment to an item's stock at a location, guarded like
+    # adjust_stock() guards the item's total. A location never holds less
+    # than none of an item, whatever the minimum.
+    floor = max(minimum or 0, 0)
+    rows = LocationStock.objects.filter(item_id=item_id, location_id=location_id)
+    if rows.filter(amount__gte=floor - delta).update(amount=F('amount') + delta):
+        return
+    # A missing row means none of the item is held there
+    if rows.exists() or delta < floor:
+        raise StockAdjustmentError(item_id, f'Item {item_id} would drop below {floor} at location {location_id}')
+    add_stock(location_id, {item_id: delta})
+
+
+def adjust_stock(adjustments, location_id=None):
+    # Apply (item id, delta, minimum) adjustments in one transaction. Each one
+    # is a single relative UPDATE, so concurrent adjustments add up instead of
+    # overwriting each other. `minimum` (or None) is the lowest amount the
+    # item may be left with; if any adjustment would break its guard or names
+    # a missing item, none of them are applied. With a `location_id` the
+    # stock at that location is adjusted and guarded, and the item's total
+    # follows. Returns {item id: new total amount}.
+    totals = defaultdict(int)
+    with transaction.atomic():
+        for item_id, delta, minimum in adjustments:
+            if location_id is not None:
+                _adjust_location_stock(item_id, location_id, delta, minimum)
+                minimum = None
+            items = Item.objects.filter(pk=item_id)
+            if minimum is not None:
+                items = items.filter(amount__gte=minimum - delta)
+            if not items.update(amount=F('amount') + delta):
+                if minimum is not None and Item.objects.filter(pk=item_id).exists():
+                    raise StockAdjustmentError(item_id, f'Item {item_id} would drop below {minimum}')
+                raise StockAdjustmentError(item_id, f'Item {item_id} does not exist')
+            totals[item_id] += delta
+
+        # The rows are write-locked by now, so this read sees exactly our changes
+        after = {row['id']: row for row in Item.objects.filter(pk__in=totals).values(*Item.TRACKED_FIELDS)}
+        changes = [
+            ({**row, 'amount': row['amount'] - totals[item_id]}, row)
+            for item_id, row in after.items()
+            if totals[item_id]
+        ]
+        items_changed.send(sender=Item, changes=changes, reason='adjustment', location=location_id)
+
+    return {item_id: row['amount'] for item_id, row in after.items()}
+
+
+def transfer_stock(item_id, source_id, destination_id, quantity):
+    # Move `quantity` of an item from one location to another as a pair of
+    # relative UPDATEs in one transaction: the source is only debited if it
+    # holds enough, and the item's total does not change. Returns
+    # {location id: new amount} for both locations.
+    if quantity <= 0:
+        raise StockAdjustmentError(item_id, 'Transfer quantity must be positive')
+    if source_id == destination_id:
+        raise StockAdjustmentError(item_id, 'Transfer source and destination are the same location')
+    with transaction.atomic():
+        rows = LocationStock.objects.filter(item_id=item_id, location_id=source_id, amount__gte=quantity)
+        if not rows.update(amount=F('amount') - quantity):
+            raise StockAdjustmentError(item_id, f'Location {source_id} holds less than {quantity} of item {item_id}')
+        add_stock(destination_id, {item_id: quantity})
+        return dict(
+            LocationStock.objects.filter(item_id=item_id, location_id__in=[source_id, destination_id])
+            .values_list('location_id', 'amount')
+        )
@@ -0,0 +1,22 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from ..assets import VENDOR_ASSETS, vendored
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor_stylesheet(name):
+    # A <link> to the vendored copy of a stylesheet, served with our static
+    # files, or to the pinned CDN copy until vendor_assets has fetched it.
+    # The integrity hash makes the browser refuse a copy that differs from
+    # the pinned version.
+    asset = VENDOR_ASSETS[name]
+    if vendored(name):
+        return format_html('<link href="{}" rel="stylesheet" integrity="{}" />', static(asset['path']), asset['integrity'])
+    return format_html(
+        '<link href="{}" rel="stylesheet" integrity="{}" crossorigin="anonymous" />',
+        asset['url'], asset['integrity'],
+    )
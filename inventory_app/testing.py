@@ -0,0 +1,42 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@contextmanager
+def isolated_caches():
+    # Swap the configured caches for empty private ones while tests, load
+    # tests or benchmarks run against a throwaway database. Cached roles and
+    # fragments are keyed by primary keys of that database, so they must not
+    # reach the live cache, and clearing the cache must not empty it. File
+    # caches move to a temporary directory, keeping their cost; any other
+    # backend becomes a local-memory cache.
+    with tempfile.TemporaryDirectory() as directory:
+        caches = {}
+        for alias, config in settings.CACHES.items():
+            if config['BACKEND'] == FILE_CACHE:
+                caches[alias] = {**config, 'LOCATION': os.path.join(directory, alias)}
+            else:
+                caches[alias] = {'BACKEND': LOCMEM_CACHE, 'LOCATION': f'isolated-{alias}'}
+        with override_settings(CACHES=caches):
+            yield
+
+
+class TestRunner(DiscoverRunner):
+    # Django's test runner, with the caches isolated for the whole run
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._isolated_caches = isolated_caches()
+        self._isolated_caches.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._isolated_caches.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -1,10 +1,60 @@
 # IMPORTS FOR UNIT TESTS 
-from django.test import TestCase, SimpleTestCase, LiveServerTestCase, Client
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, LiveServerTestCase, Client
 from django.urls import reverse, resolve
 from django.contrib.auth.models import User, Group
 from .models import *
 from .views import *
 from .forms import *
+from io import BytesIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from .decorators import allowed_users
+from .roles import get_user_roles
+from .search import search_items
+from unittest import mock, skipUnless
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from .imports import import_items, read_rows
+from .rollups import find_drift
+from .stock import StockAdjustmentError, adjust_stock, transfer_stock
+from .locations import book_unlocated_stock, location_totals
+from . import jobs
+import json
+from openpyxl import load_workbook
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+import datetime
+from .ledger import stock_as_of, take_snapshots
+import importlib
+from asgiref.sync import sync_to_async
+import os
+import tempfile
+from django.db.utils import ConnectionHandler
+from .sqlite_backend.base import PRODUCTION_PRAGMAS
+from django.urls import clear_url_caches
+from django.conf import settings
+from . import urls
+from .metrics import reset_metrics
+from .benchmarks import STARTUP_CASES, startup_profile
+from .exports import EXPORT_COLUMNS, available_exporters
+from .valuation import cached_valuation_report, valuation_report
+from decimal import Decimal
+from django.contrib.staticfiles.storage import staticfiles_storage
+from .assets import VENDOR_ASSETS, check_vendor_assets, vendored
+import gzip
+from importlib import import_module
+from django.contrib.sessions.models import Session
+from .sessions import SessionMiddleware, purge_expired_sessions
+from .reorder import LOW_STOCK_KEYS, low_stock
+from .forecasting import consumption_history, exponential_smoothing, forecast_demand
+import numpy as np
+from .testing import isolated_caches
+from .loadtest import LOADTEST_PASSWORD, ROUTES, LoadContext, run_route, seed_jobs, seed_users
 
 # IMPORTS FOR SELENIUM
 import time
@@ -139,7 +189,38 @@ class TestViews(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get('Content-Disposition'), 'attachment; filename=inventory_list.xlsx')
         self.assertEqual(response.get('Content-Type'), 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        self.assertTrue(response.content)  # Check that the response has content
+        self.assertTrue(b''.join(response.streaming_content))  # Check that the response has content
+
+    def test_download_to_excel_rows(self):
+        response = self.client.get(reverse('download-to-excel'))
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ('Name', 'Category', 'Cost', 'Amount'))
+        self.assertEqual(rows[1], ('Test Item', 'Test Category', 2.5, 10))
+
+    def test_export_items_csv(self):
+        response = self.client.get(reverse('export-items'), {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get('Content-Disposition'), 'attachment; filename=inventory_list.csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['Name,Category,Cost,Amount', 'Test Item,Test Category,2.50,10'])
+
+    def test_export_items_accept_header(self):
+        response = self.client.get(reverse('export-items'), HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(rows, [{'name': 'Test Item', 'category': 'Test Category', 'cost': 2.5, 'amount': 10}])
+
+    def test_export_items_malformed_quality(self):
+        accept = 'text/csv;q=abc, application/x-ndjson;q=0.5'
+        response = self.client.get(reverse('export-items'), HTTP_ACCEPT=accept)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        response = self.client.get(reverse('export-items'), HTTP_ACCEPT='text/csv;q=abc')
+        self.assertEqual(response.status_code, 406)
+
+    def test_export_items_unknown_format(self):
+        response = self.client.get(reverse('export-items'), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 406)
 
     def test_add_item_post_view(self):
         response = self.client.post(reverse('add-item'), {
@@ -213,7 +294,7 @@ class TestViews(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get('Content-Disposition'), 'attachment; filename=inventory_list.xlsx')
         self.assertEqual(response.get('Content-Type'), 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        self.assertTrue(response.content)  # Check that the response has content
+        self.assertTrue(b''.join(response.streaming_content))  # Check that the response has content
 
     def test_invalid_item_form_post_view(self):
         response = self.client.post(reverse('add-item'), {
@@ -230,6 +311,1353 @@ class TestViews(TestCase):
         self.assertFalse(form.is_valid())
         self.assertTrue(form.errors)
 
+# Test cases for bulk item imports
+class ImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.group, created = Group.objects.get_or_create(name='employee')
+        self.user.groups.add(self.group)
+        Employee.objects.create(user=self.user, name='Test Employee', position='Test Position')
+        self.item = Item.objects.create(name='Brisket', category='Protein', cost=12.0, amount=3)
+        self.client.login(username='testuser', password='testpass')
+
+    def test_import_csv_upserts_items(self):
+        upload = SimpleUploadedFile('items.csv', (
+            b'Name,Category,Cost,Amount\n'
+            b'Brisket,Protein,,8\n'
+            b'Milk,Dairy,1.25,20\n'
+            b',Dairy,1.0,2\n'
+            b'Bagel,Bread,0.5,-\n'
+        ))
+        response = self.client.post(reverse('item-import'), {'file': upload})
+        self.assertEqual(response.status_code, 200)
+
+        result = response.context['result']
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual([line for line, errors in result.errors], [4, 5])
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.amount, 8)
+        self.assertEqual(self.item.cost, 12.0)  # a blank cost keeps the current one
+        self.assertTrue(Item.objects.filter(name='Milk', category='Dairy', amount=20).exists())
+
+    def test_import_rejects_missing_columns(self):
+        upload = SimpleUploadedFile('items.csv', b'Name,Amount\nMilk,2\n')
+        response = self.client.post(reverse('item-import'), {'file': upload})
+        self.assertTrue(response.context['form'].errors)
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_import_rejects_unreadable_files(self):
+        uploads = [
+            SimpleUploadedFile('items.csv', 'Name,Category,Cost,Amount\nCrème,Dairy,1,2\n'.encode('latin-1')),
+            SimpleUploadedFile('items.xlsx', b'not a workbook'),
+        ]
+        for upload in uploads:
+            response = self.client.post(reverse('item-import'), {'file': upload})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['form'].errors['file'])
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_import_xlsx(self):
+        rows = [('Milk', 'Dairy', 1.25, 20), ('Brisket', 'Protein', 12.0, 5)]
+        upload = BytesIO(b''.join(EXPORTERS['xlsx'].stream(EXPORT_COLUMNS, rows)))
+        result = import_items(read_rows(upload, 'items.xlsx'))
+        self.assertEqual((result.created, result.updated, result.errors), (1, 1, []))
+
+# Test cases for inventory list pagination
+class PaginationTests(TestCase):
+    def setUp(self):
+        # Seeded without signals, so start from an empty fragment cache
+        cache.clear()
+        Item.objects.bulk_create(
+            Item(name=f'Item {number:03d}', category='Dairy', cost=1.0, amount=number % 7)
+            for number in range(120)
+        )
+
+    def walk(self, sort):
+        names, params = [], {'sort': sort}
+        while True:
+            response = self.client.get(reverse('inventory'), params)
+            page = response.context['page_obj']
+            names += [item.name for item in page]
+            if not page.has_next():
+                return names, page
+            params = {'sort': sort, 'after': page.next_cursor}
+
+    def test_keyset_pages_cover_every_item_once(self):
+        names, last_page = self.walk('name')
+        self.assertEqual(names, sorted(Item.objects.values_list('name', flat=True)))
+
+        response = self.client.get(reverse('inventory'), {'sort': 'name', 'before': last_page.previous_cursor})
+        self.assertEqual([item.name for item in response.context['page_obj']], names[50:100])
+
+    def test_keyset_sort_by_amount_descending(self):
+        names, last_page = self.walk('-amount')
+        expected = Item.objects.order_by('-amount', '-pk').values_list('name', flat=True)
+        self.assertEqual(names, list(expected))
+
+    def test_keyset_page_does_not_count_rows(self):
+        first = self.client.get(reverse('inventory'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('inventory'), {'after': first.context['page_obj'].next_cursor})
+
+    def test_offset_pages(self):
+        response = self.client.get(reverse('inventory'), {'page': 3})
+        self.assertEqual(len(response.context['item_list']), 20)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('inventory'), {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+# Test cases for role resolution used by allowed_users
+class RoleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.group, created = Group.objects.get_or_create(name='employee')
+        self.user.groups.add(self.group)
+        Employee.objects.create(user=self.user, name='Test Employee', position='Test Position')
+
+    def test_roles_are_cached(self):
+        self.assertEqual(get_user_roles(User.objects.get(pk=self.user.pk)), {'employee'})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_roles(User(pk=self.user.pk)), {'employee'})
+
+    def test_membership_changes_invalidate_cache(self):
+        get_user_roles(User.objects.get(pk=self.user.pk))
+        self.group.user_set.remove(self.user)
+        self.assertEqual(get_user_roles(User.objects.get(pk=self.user.pk)), frozenset())
+
+        manager = Group.objects.create(name='manager')
+        self.user.groups.add(manager)
+        self.assertEqual(get_user_roles(User.objects.get(pk=self.user.pk)), {'manager'})
+
+    def test_allowed_users_accepts_several_roles(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        view = allowed_users(allowed_roles=['manager', 'employee'])(lambda request: HttpResponse('ok'))
+        self.assertEqual(view(request).content, b'ok')
+
+        request.user = User.objects.create_user(username='other', password='testpass')
+        self.assertEqual(view(request).content, b'You are not authorized to view this page')
+
+    def test_protected_view_has_no_authorization_queries_when_warm(self):
+        self.client.login(username='testuser', password='testpass')
+        cold = CaptureQueriesContext(connection)
+        with cold:
+            self.client.get(reverse('add-item'))
+        with self.assertNumQueries(len(cold.captured_queries) - 2):
+            self.client.get(reverse('add-item'))
+
+# Test cases for loading the signed-in Employee with the user
+class CurrentEmployeeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.employee = Employee.objects.create(user=self.user, name='Test Employee', position='Test Position')
+        self.item = Item.objects.create(name='Test Item', category='Bread', cost=2.5, amount=10)
+
+    def test_page_costs_one_auth_query(self):
+        self.client.login(username='testuser', password='testpass')
+        # session, user joined with employee, item
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('item-detail', args=[self.item.id]))
+        self.assertEqual(response.context['current_employee'], self.employee)
+        self.assertContains(response, reverse('user_page', args=[self.employee.pk]))
+
+    def test_session_from_model_backend(self):
+        # Sessions started before EmployeeBackend name ModelBackend
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('item-detail', args=[self.item.id]))
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(response.context['current_employee'], self.employee)
+
+    def test_user_without_employee(self):
+        User.objects.create_user(username='admin', password='testpass')
+        self.client.login(username='admin', password='testpass')
+        response = self.client.get(reverse('index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['current_employee'])
+        self.assertContains(response, 'Logout')
+
+# Test cases for item search
+class SearchTests(TestCase):
+    def setUp(self):
+        self.brisket = Item.objects.create(name='Smoked Brisket', category='Protein', cost=12.0, amount=3)
+        self.milk = Item.objects.create(name='Whole Milk', category='Dairy', cost=1.25, amount=20)
+        self.protein_bar = Item.objects.create(name='Protein Bar', category='Bread', cost=2.0, amount=5)
+
+    def test_prefix_match_ranks_name_above_category(self):
+        self.assertEqual(search_items('prot'), [self.protein_bar, self.brisket])
+        self.assertEqual(search_items('smok bris'), [self.brisket])
+        self.assertEqual(search_items('"; DROP'), [])
+
+    def test_index_follows_writes(self):
+        self.milk.name = 'Oat Milk'
+        self.milk.save()
+        Item.objects.bulk_create([Item(name='Goat Cheese', category='Dairy', cost=4.0, amount=1)])
+        self.brisket.delete()
+
+        self.assertEqual([item.name for item in search_items('oat')], ['Oat Milk'])
+        self.assertEqual([item.name for item in search_items('goat')], ['Goat Cheese'])
+        self.assertEqual(search_items('brisket'), [])
+
+    def test_like_fallback(self):
+        with mock.patch.dict('inventory_app.search._fts_ready', {'default': False}):
+            self.assertEqual(search_items('ilk'), [self.milk])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('item-search'), {'q': 'milk'})
+        self.assertEqual(list(response.context['item_list']), [self.milk])
+        self.assertTemplateUsed(response, 'inventory_app/item_list.html')
+
+        response = self.client.get(reverse('item-search'), {'q': ''})
+        self.assertRedirects(response, reverse('inventory'))
+
+# Test cases for the per-category rollups
+class RollupTests(TestCase):
+    def stored(self):
+        return {
+            row.category: (row.item_count, row.total_amount, row.total_value)
+            for row in CategoryRollup.objects.exclude(item_count=0)
+        }
+
+    def test_rollups_follow_item_writes(self):
+        milk = Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+        Item.objects.create(name='Cheese', category='Dairy', cost=4.0, amount=2)
+        brisket = Item.objects.create(name='Brisket', category='Protein', cost=12.0, amount=3)
+        self.assertEqual(self.stored(), {'Dairy': (2, 12, 23.0), 'Protein': (1, 3, 36.0)})
+
+        milk = Item.objects.get(pk=milk.pk)
+        milk.category = 'Beverage'
+        milk.amount = 4
+        milk.save()
+        brisket.delete()
+        self.assertEqual(self.stored(), {'Dairy': (1, 2, 8.0), 'Beverage': (1, 4, 6.0)})
+        self.assertEqual(find_drift(), [])
+
+    def test_rollups_follow_imports(self):
+        Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+        rows = [(2, {'name': 'Milk', 'category': 'Dairy', 'cost': '1.5', 'amount': '6'}),
+                (3, {'name': 'Bagel', 'category': 'Bread', 'cost': '0.5', 'amount': '12'})]
+        import_items(iter(rows))
+        self.assertEqual(self.stored(), {'Dairy': (1, 6, 9.0), 'Bread': (1, 12, 6.0)})
+
+    def test_rebuild_command_reports_and_fixes_drift(self):
+        Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+        CategoryRollup.objects.filter(category='Dairy').update(total_amount=99)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--check', stdout=StringIO())
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(find_drift(), [])
+
+    def test_dashboard_view(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        Employee.objects.create(user=user, name='Test Employee', position='Test Position')
+        Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+        self.client.login(username='testuser', password='testpass')
+
+        response = self.client.get(reverse('inventory-dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'inventory_app/dashboard.html')
+        self.assertEqual(response.context['totals'], {'item_count': 1, 'total_amount': 10, 'total_value': 15.0})
+
+# Test cases for atomic stock adjustments
+class StockAdjustmentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        self.milk = Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+        self.bread = Item.objects.create(name='Bread', category='Bread', cost=2.0, amount=4)
+        self.client.login(username='testuser', password='testpass')
+
+    def post_json(self, adjustments):
+        return self.client.post(
+            reverse('stock-adjust'), json.dumps({'adjustments': adjustments}), content_type='application/json'
+        )
+
+    def test_adjustments_are_relative(self):
+        adjust_stock([(self.milk.pk, -3, None)])
+        adjust_stock([(self.milk.pk, 5, None)])
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.amount, 12)
+        self.assertEqual(find_drift(), [])
+
+    def test_batch_in_one_request(self):
+        response = self.post_json([
+            {'item': self.milk.pk, 'delta': -2},
+            {'item': self.bread.pk, 'delta': 6, 'min': 0},
+            {'item': self.milk.pk, 'delta': -1},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'items': {str(self.milk.pk): 7, str(self.bread.pk): 10}})
+        self.assertEqual(CategoryRollup.objects.get(category='Dairy').total_amount, 7)
+
+    def test_guard_failure_rolls_back_batch(self):
+        response = self.post_json([
+            {'item': self.milk.pk, 'delta': -2},
+            {'item': self.bread.pk, 'delta': -5, 'min': 0},
+        ])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['item'], self.bread.pk)
+        self.assertEqual(Item.objects.get(pk=self.milk.pk).amount, 10)
+
+    def test_single_item_form_post(self):
+        response = self.client.post(reverse('item-adjust', args=[self.bread.pk]), {'delta': '-4', 'min': '0'})
+        self.assertEqual(response.json(), {'items': {str(self.bread.pk): 0}})
+
+        response = self.client.post(reverse('item-adjust', args=[self.bread.pk]), {'delta': 'lots'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_entries_must_be_objects(self):
+        self.assertEqual(self.post_json([5]).status_code, 400)
+        response = self.client.post(
+            reverse('item-adjust', args=[self.bread.pk]), json.dumps({'adjustments': [5]}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('delta', response.json()['errors']['0'])
+
+    def test_out_of_range_numbers(self):
+        entries = [
+            {'item': self.milk.pk, 'delta': 10**30},
+            {'item': self.milk.pk, 'delta': 1, 'min': -10**30},
+            {'item': 10**30, 'delta': 1},
+        ]
+        for entry in entries:
+            self.assertEqual(self.post_json([entry]).status_code, 400)
+        self.assertEqual(Item.objects.get(pk=self.milk.pk).amount, 10)
+
+    def test_missing_item(self):
+        response = self.post_json([{'item': 999, 'delta': 1}])
+        self.assertEqual(response.status_code, 409)
+
+# Test cases for the read-only JSON API
+class ApiTests(TestCase):
+    def setUp(self):
+        self.item = Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+
+    def test_item_list(self):
+        response = self.client.get(reverse('api-item-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'items': [{'id': self.item.pk, 'name': 'Milk', 'category': 'Dairy', 'cost': 1.5, 'amount': 10}],
+            'next_after': None,
+        })
+        self.assertTrue(response['ETag'].startswith('"items-'))
+        self.assertIn('Last-Modified', response)
+
+    def test_conditional_get_skips_item_rows(self):
+        etag = self.client.get(reverse('api-item-detail', args=[self.item.pk]))['ETag']
+        # only the version counter is read
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api-item-detail', args=[self.item.pk]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.item.amount = 11
+        self.item.save()
+        response = self.client.get(reverse('api-item-detail', args=[self.item.pk]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['amount'], 11)
+
+    def test_bulk_writes_change_etag(self):
+        etag = self.client.get(reverse('api-item-list'))['ETag']
+        adjust_stock([(self.item.pk, 1, None)])
+        response = self.client.get(reverse('api-item-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_item_detail_missing(self):
+        response = self.client.get(reverse('api-item-detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+# Test cases for the versioned fragment cache
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.item = Item.objects.create(name='Test Item', category='Bread', cost=2.5, amount=10)
+
+    def test_list_hit_skips_item_queries(self):
+        self.client.get(reverse('inventory'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('inventory'))
+        self.assertContains(response, 'Test Item')
+        self.assertFalse([query for query in queries if 'inventory_app_item' in query['sql']])
+
+    def test_detail_hit_skips_item_query(self):
+        url = reverse('item-detail', args=[self.item.id])
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'Test Item')
+
+    def test_writes_invalidate(self):
+        detail = reverse('item-detail', args=[self.item.id])
+        self.client.get(reverse('inventory'))
+        self.client.get(detail)
+
+        self.item.name = 'Renamed Item'
+        self.item.save()
+        self.assertContains(self.client.get(reverse('inventory')), 'Renamed Item')
+        self.assertContains(self.client.get(detail), 'Renamed Item')
+
+        adjust_stock([(self.item.id, 5, None)])
+        self.assertContains(self.client.get(detail), '15')
+
+        self.item.delete()
+        self.assertContains(self.client.get(reverse('inventory')), 'Inventory is empty.')
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+    def test_other_items_keep_their_fragment(self):
+        other = Item.objects.create(name='Other Item', category='Dairy', cost=1.0, amount=1)
+        url = reverse('item-detail', args=[self.item.id])
+        self.client.get(url)
+        other.amount = 2
+        other.save()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_fragments_vary_by_page_and_user(self):
+        Item.objects.create(name='Another Item', category='Dairy', cost=1.0, amount=1)
+        with mock.patch.object(ItemListView, 'paginate_by', 1):
+            first = self.client.get(reverse('inventory'))
+            second = self.client.get(reverse('inventory'), {'after': first.context['page_obj'].next_cursor})
+        self.assertContains(first, 'Another Item')
+        self.assertNotContains(second, 'Another Item')
+        self.assertContains(second, 'Test Item')
+
+        self.assertNotContains(first, 'Delete')
+        User.objects.create_user(username='testuser', password='testpass')
+        self.client.login(username='testuser', password='testpass')
+        self.assertContains(self.client.get(reverse('inventory')), 'Delete')
+
+    @override_settings(INVENTORY_FRAGMENT_TIMEOUT=0)
+    def test_zero_timeout_disables_cache(self):
+        url = reverse('item-detail', args=[self.item.id])
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+# Test cases for the stock movement ledger
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.start = timezone.now()
+
+    def at(self, days):
+        return mock.patch('django.utils.timezone.now', return_value=self.start + datetime.timedelta(days=days))
+
+    def movements(self, item):
+        return list(StockMovement.objects.filter(item_id=item.pk).order_by('pk').values_list('delta', 'reason'))
+
+    def test_records_every_write(self):
+        item = Item.objects.create(name='Test Item', category='Bread', cost=2.5, amount=10)
+        item.amount = 7
+        item.save()
+        item.cost = 3.0
+        item.save()
+        adjust_stock([(item.pk, 5, None)])
+        import_items(read_rows(BytesIO(b'Name,Category,Cost,Amount\nTest Item,Bread,3.0,20\n'), 'items.csv'))
+        pk = item.pk
+        Item.objects.get(pk=pk).delete()
+
+        self.assertEqual(self.movements(item), [
+            (10, 'create'), (-3, 'update'), (5, 'adjustment'), (8, 'import'), (-20, 'delete'),
+        ])
+
+    def test_save_after_concurrent_adjustment(self):
+        # As in updateItem: the item is loaded, adjusted elsewhere, then saved
+        milk = Item.objects.create(name='Milk', category='Dairy', cost=1.0, amount=10)
+        loaded = Item.objects.get(pk=milk.pk)
+        adjust_stock([(milk.pk, 5, None)])
+        loaded.amount = 12
+        loaded.save()
+
+        self.assertEqual(self.movements(milk), [(10, 'create'), (5, 'adjustment'), (-3, 'update')])
+        self.assertEqual(sum(LocationStock.objects.filter(item=milk).values_list('amount', flat=True)), 12)
+        self.assertEqual(find_drift(), [])
+
+        loaded = Item.objects.get(pk=milk.pk)
+        adjust_stock([(milk.pk, -2, None)])
+        loaded.delete()
+        self.assertEqual(sum(delta for delta, reason in self.movements(milk)), 0)
+        self.assertEqual(find_drift(), [])
+
+    def test_as_of_replays_from_snapshots(self):
+        with self.at(0):
+            milk = Item.objects.create(name='Milk', category='Dairy', cost=1.0, amount=10)
+            bread = Item.objects.create(name='Bread', category='Bread', cost=1.0, amount=4)
+        with self.at(1):
+            adjust_stock([(milk.pk, -3, 0)])
+        with self.at(2):
+            self.assertEqual(take_snapshots(), 2)
+            self.assertEqual(take_snapshots(), 0)
+        with self.at(3):
+            adjust_stock([(milk.pk, 6, None), (bread.pk, -4, 0)])
+        with self.at(4):
+            bread_pk = bread.pk
+            bread.delete()
+        bread.pk = bread_pk
+
+        day = lambda days: self.start + datetime.timedelta(days=days, hours=12)
+        self.assertEqual(stock_as_of(self.start - datetime.timedelta(days=1)), {})
+        self.assertEqual(stock_as_of(day(0)), {milk.pk: 10, bread.pk: 4})
+        self.assertEqual(stock_as_of(day(1)), {milk.pk: 7, bread.pk: 4})
+        self.assertEqual(stock_as_of(day(3)), {milk.pk: 13, bread.pk: 0})
+        self.assertEqual(stock_as_of(day(4)), {milk.pk: 13})
+        self.assertEqual(stock_as_of(day(4), [bread.pk]), {})
+
+        # Snapshots do not change the answers, and bound the movements read
+        with self.at(5):
+            self.assertEqual(take_snapshots(), 2)
+        self.assertEqual(stock_as_of(day(1)), {milk.pk: 7, bread.pk: 4})
+        self.assertEqual(stock_as_of(day(5)), {milk.pk: 13})
+        self.assertFalse(StockSnapshot.objects.get(item_id=bread.pk, movement_id__gt=3).exists)
+
+    def test_one_insert_per_bulk_write(self):
+        items = [Item.objects.create(name=f'Item {number}', category='Dairy', cost=1.0, amount=10) for number in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            adjust_stock([(item.pk, 1, None) for item in items])
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "inventory_app_stockmovement"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_api(self):
+        with self.at(0):
+            item = Item.objects.create(name='Milk', category='Dairy', cost=1.0, amount=10)
+        with self.at(1):
+            adjust_stock([(item.pk, -3, 0)])
+
+        response = self.client.get(reverse('api-stock-as-of'), {'as_of': self.start.date().isoformat()})
+        self.assertEqual(response.json()['items'], {str(item.pk): 10})
+        response = self.client.get(reverse('api-stock-as-of'), {'as_of': (self.start + datetime.timedelta(days=2)).isoformat(), 'item': item.pk})
+        self.assertEqual(response.json()['items'], {str(item.pk): 7})
+        self.assertEqual(self.client.get(reverse('api-stock-as-of'), {'as_of': 'friday'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api-stock-as-of'), {'as_of': '2026-02-30'}).status_code, 400)
+
+    def test_snapshot_command(self):
+        Item.objects.create(name='Milk', category='Dairy', cost=1.0, amount=10)
+        out = StringIO()
+        call_command('snapshot_stock', stdout=out)
+        self.assertIn('Wrote 1 stock snapshot(s)', out.getvalue())
+
+# Test cases for the async (ASGI) views
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.route_views(True)
+        self.addCleanup(self.route_views, False)
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        Employee.objects.create(user=self.user, name='Test Employee', position='Test Position')
+        self.user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        self.item = Item.objects.create(name='Test Item', category='Bread', cost=2.5, amount=10)
+
+    def route_views(self, use_async):
+        with override_settings(INVENTORY_ASYNC_VIEWS=use_async):
+            importlib.reload(urls)
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    def test_routes(self):
+        self.assertEqual(resolve(reverse('index')).func, async_index)
+        self.assertEqual(resolve(reverse('inventory')).func.view_class, AsyncItemListView)
+        self.assertEqual(resolve(reverse('item-detail', args=[1])).func.view_class, AsyncItemDetailView)
+        self.assertEqual(resolve(reverse('export-items')).func, async_export_items)
+
+    async def test_pages(self):
+        response = await self.async_client.get(reverse('index'))
+        self.assertEqual(response.status_code, 200)
+
+        for _ in range(2):
+            # Rendered, then served from the fragment cache
+            response = await self.async_client.get(reverse('inventory'))
+            self.assertContains(response, 'Test Item')
+            response = await self.async_client.get(reverse('item-detail', args=[self.item.pk]))
+            self.assertContains(response, 'Test Item')
+
+        response = await self.async_client.get(reverse('inventory'), {'page': 1})
+        self.assertContains(response, 'Test Item')
+        response = await self.async_client.get(reverse('item-detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_keyset_pages(self):
+        await Item.objects.acreate(name='Another Item', category='Dairy', cost=1.0, amount=1)
+        with mock.patch.object(AsyncItemListView, 'paginate_by', 1):
+            first = await self.async_client.get(reverse('inventory'))
+            second = await self.async_client.get(reverse('inventory'), {'after': first.context['page_obj'].next_cursor})
+        self.assertContains(first, 'Another Item')
+        self.assertContains(second, 'Test Item')
+        self.assertNotContains(second, 'Another Item')
+
+    async def test_export_streams(self):
+        response = await self.async_client.get(reverse('export-items'), {'format': 'csv'})
+        self.assertEqual(response.status_code, 302)
+
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get(reverse('export-items'), {'format': 'csv'})
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content.decode().splitlines(), ['Name,Category,Cost,Amount', 'Test Item,Bread,2.50,10'])
+
+        response = await self.async_client.get(reverse('download-to-excel'))
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = list(load_workbook(BytesIO(content)).active.values)
+        self.assertEqual(rows, [('Name', 'Category', 'Cost', 'Amount'), ('Test Item', 'Bread', 2.5, 10)])
+
+# Test cases for the production SQLite profile
+class SqliteProfileTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.handler = ConnectionHandler({'default': {
+            'ENGINE': 'inventory_app.sqlite_backend',
+            'NAME': os.path.join(directory.name, 'test.sqlite3'),
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'pragmas': PRODUCTION_PRAGMAS},
+        }})
+        self.database = self.handler['default']
+        self.addCleanup(self.database.close)
+
+    def pragma(self, name):
+        with self.database.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('mmap_size'), PRODUCTION_PRAGMAS['mmap_size'])
+        self.assertEqual(self.pragma('foreign_keys'), 1)
+
+    def test_transactions_take_the_write_lock(self):
+        self.database.ensure_connection()
+        with CaptureQueriesContext(self.database) as queries:
+            self.database.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+            self.database.rollback()
+            self.database.set_autocommit(True)
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+# Test cases for the seeded load test
+class LoadtestTests(TransactionTestCase):
+    def test_seed_users(self):
+        users = seed_users(3)
+        self.assertEqual(Employee.objects.filter(user__in=users).count(), 3)
+        self.assertTrue(all(user.groups.filter(name='employee').exists() for user in users))
+        self.assertTrue(self.client.login(username=users[0].username, password=LOADTEST_PASSWORD))
+
+    def test_run_route(self):
+        Item.objects.create(name='Test Item', category='Bread', cost=2.5, amount=10)
+        context = LoadContext(list(Item.objects.values_list('pk', flat=True)), [], [])
+        name, login, send = next(route for route in ROUTES if route[0] == 'item-detail')
+        result = run_route(name, login, send, context, [], requests=3, concurrency=1)
+        self.assertEqual(result['requests'], 3)
+        self.assertEqual(result['statuses'], {'200': 3})
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['queries_max'], 0)
+
+    def test_job_routes_read_own_jobs(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(INVENTORY_JOB_DIR=directory):
+            users = seed_users(2)
+            context = LoadContext([], [], [], job_ids=seed_jobs(users))
+            name, login, send = next(route for route in ROUTES if route[0] == 'job-download')
+            result = run_route(name, login, send, context, users, requests=3, concurrency=1)
+        self.assertEqual(result['statuses'], {'200': 3})
+
+    def test_routes_cover_every_url(self):
+        names = {pattern.name for pattern in urls.urlpatterns if getattr(pattern, 'name', None)}
+        self.assertEqual(names - {name for name, login, send in ROUTES}, set())
+
+    def test_caches_are_isolated(self):
+        # Tests, like load tests and benchmarks, never use the live caches
+        self.assertNotEqual(str(settings.CACHES['default']['LOCATION']), str(settings.BASE_DIR / 'cache'))
+        cache.set('isolation', 1)
+        with isolated_caches():
+            self.assertIsNone(cache.get('isolation'))
+            cache.set('isolation', 2)
+        self.assertEqual(cache.get('isolation'), 1)
+
+    def test_unknown_route(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest', '--route', 'no-such-route', stdout=StringIO())
+
+# Test cases for request metrics
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        self.item = Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(';')[0], part.split(';', 1)[1]) for part in response['Server-Timing'].split(', ')
+        )
+
+    def test_server_timing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('inventory'))
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'total', 'db', 'template'})
+        self.assertIn(f'desc="{len(queries)} queries"', timing['db'])
+        self.assertGreater(float(timing['template'].split('=')[1]), 0)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('inventory'))
+        self.client.get(reverse('inventory'))
+        self.client.get(reverse('api-item-detail', args=[self.item.pk]))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE inventory_request_duration_seconds histogram', body)
+        self.assertIn('inventory_request_duration_seconds_count{view="inventory"} 2', body)
+        self.assertIn('inventory_request_duration_seconds_bucket{view="inventory",le="+Inf"} 2', body)
+        self.assertIn('inventory_db_queries_count{view="api-item-detail"} 1', body)
+
+    def test_slow_query_log(self):
+        with override_settings(INVENTORY_SLOW_QUERY_MS=0), self.assertLogs('inventory_app.metrics', 'WARNING') as logs:
+            self.client.get(reverse('api-item-detail', args=[self.item.pk]))
+        self.assertIn('/api/items/', logs.output[0])
+        with override_settings(INVENTORY_SLOW_QUERY_MS=0), self.assertLogs('inventory_app.metrics', 'WARNING') as logs:
+            self.client.get(reverse('item-search'), {'q': 'zebracakes'})
+        self.assertFalse(any('zebracakes' in line for line in logs.output))
+        with override_settings(INVENTORY_SLOW_QUERY_MS=None), self.assertNoLogs('inventory_app.metrics'):
+            self.client.get(reverse('api-item-detail', args=[self.item.pk]))
+
+    async def test_async_request(self):
+        response = await self.async_client.get(reverse('api-item-detail', args=[self.item.pk]))
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+# Test cases for worker startup cost
+class StartupTests(SimpleTestCase):
+    def test_views_skip_heavy_packages(self):
+        # numpy, openpyxl and friends load on the first export, not at startup
+        profile = startup_profile(STARTUP_CASES['wsgi+urls'])
+        self.assertEqual(profile['heavy'], [])
+        self.assertGreater(profile['import_ms'], 0)
+
+    def test_exporters_need_their_packages(self):
+        self.assertIn('xlsx', available_exporters())
+        with mock.patch('inventory_app.exports.is_installed', return_value=False):
+            self.assertEqual(set(available_exporters()), {'csv', 'jsonl'})
+
+# Test cases for low-stock detection and the purchase list
+class ReorderTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        Employee.objects.create(user=self.user, name='Test Employee', position='Test Position')
+        self.user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        self.client.login(username='testuser', password='testpass')
+        self.milk = Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=3, reorder_level=10, target_level=40)
+        self.bread = Item.objects.create(name='Bread', category='Bread', cost=2.0, amount=4, reorder_level=5)
+        Item.objects.create(name='Apples', category='Fruit', cost=0.5, amount=10, reorder_level=10, target_level=20)
+        Item.objects.create(name='Salt', category='Protein', cost=0.5, amount=0)
+
+    def test_low_stock(self):
+        # Below the reorder level only; without a target, order up to the reorder level
+        suggestions = {item.name: (item.order_quantity, item.order_cost) for item in low_stock()}
+        self.assertEqual(suggestions, {'Milk': (37, 55.5), 'Bread': (1, 2.0)})
+
+    def test_low_stock_query_uses_partial_index(self):
+        plan = low_stock().order_by(*LOW_STOCK_KEYS).explain()
+        self.assertIn('item_low_stock_idx', plan)
+
+    def test_low_stock_view(self):
+        with mock.patch('inventory_app.views.LOW_STOCK_PAGE_SIZE', 1):
+            response = self.client.get(reverse('low-stock'))
+            self.assertContains(response, 'Bread')
+            self.assertNotContains(response, 'Milk')
+            response = self.client.get(reverse('low-stock'), {'after': response.context['page_obj'].next_cursor})
+        self.assertContains(response, 'Milk')
+        self.assertContains(response, '37')
+
+    def test_purchase_list(self):
+        response = self.client.get(reverse('purchase-list'), {'format': 'csv'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename=purchase_list.csv')
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows, [
+            'Name,Category,On Hand,Reorder Level,Target Level,Order Quantity,Order Cost',
+            'Bread,Bread,4,5,0,1,2.00',
+            'Milk,Dairy,3,10,40,37,55.50',
+        ])
+
+    def test_purchase_list_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'purchase_list.jsonl')
+            out = StringIO()
+            call_command('purchase_list', path, stdout=out)
+            with open(path) as file:
+                self.assertEqual([json.loads(line)['name'] for line in file], ['Bread', 'Milk'])
+        self.assertIn('Wrote 2 item(s)', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('purchase_list', 'purchase_list.txt', stdout=StringIO())
+
+    def test_import_levels(self):
+        content = b'Name,Category,Cost,Amount,Reorder Level,Target Level\nMilk,Dairy,1.5,3,,\nEggs,Protein,3,2,6,24\n'
+        result = import_items(read_rows(BytesIO(content), 'items.csv'))
+        self.assertEqual((result.created, result.unchanged, result.errors), (1, 1, []))
+        self.assertEqual(
+            {item.name: item.order_quantity for item in low_stock()},
+            {'Milk': 37, 'Bread': 1, 'Eggs': 22},
+        )
+
+    def test_form_levels(self):
+        data = {'name': 'Eggs', 'category': 'Protein', 'cost': 3, 'amount': 12}
+        form = ItemForm(data={**data, 'reorder_level': '', 'target_level': ''})
+        self.assertTrue(form.is_valid())
+        self.assertEqual((form.cleaned_data['reorder_level'], form.cleaned_data['target_level']), (0, 0))
+        form = ItemForm(data={**data, 'reorder_level': 10, 'target_level': 5})
+        self.assertFalse(form.is_valid())
+        self.assertIn('target_level', form.errors)
+
+# Test cases for demand forecasting
+class ForecastTests(TestCase):
+    # A Sunday
+    today = datetime.date(2026, 10, 18)
+
+    def setUp(self):
+        cache.clear()
+        self.milk = Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=100)
+        self.bread = Item.objects.create(name='Bread', category='Bread', cost=2.0, amount=10)
+        # Four weeks of 2 units a weekday and 6 a day at weekends
+        self.consume(self.milk, {offset: 6 if (self.today - datetime.timedelta(days=offset)).weekday() >= 5 else 2 for offset in range(28)})
+        # Neither deliveries nor deletions nor days outside the history are demand
+        StockMovement.objects.bulk_create([
+            StockMovement(item=self.milk, delta=50, reason='adjustment', created_at=self.noon(0)),
+            StockMovement(item=self.bread, delta=-10, reason='delete', created_at=self.noon(0)),
+            StockMovement(item=self.milk, delta=-99, reason='update', created_at=self.noon(28)),
+        ])
+
+    def noon(self, offset):
+        day = self.today - datetime.timedelta(days=offset)
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+
+    def consume(self, item, used_by_offset):
+        StockMovement.objects.bulk_create(
+            StockMovement(item=item, delta=-used, reason='adjustment', created_at=self.noon(offset))
+            for offset, used in used_by_offset.items()
+        )
+
+    def test_history(self):
+        item_ids, matrix = consumption_history(self.today, 28)
+        self.assertEqual(item_ids.tolist(), [self.milk.pk, self.bread.pk])
+        self.assertEqual(matrix.shape, (2, 28))
+        self.assertEqual(matrix[0].sum(), 4 * (5 * 2 + 2 * 6))
+        self.assertEqual(matrix[1].sum(), 0)
+
+    def test_forecast_demand(self):
+        self.assertEqual(forecast_demand(self.today, days=28), 2)
+        milk = ItemForecast.objects.get(item=self.milk)
+        self.assertAlmostEqual(milk.moving_average_7, 22 / 7, places=3)
+        self.assertAlmostEqual(milk.smoothed, 22 / 7, places=3)
+        self.assertEqual([round(factor, 2) for factor in milk.weekday_factors], [0.64] * 5 + [1.91] * 2)
+        self.assertEqual(milk.next_week[0], {'date': '2026-10-19', 'weekday': 'Mon', 'quantity': 2.0})
+        self.assertEqual([day['quantity'] for day in milk.next_week], [2.0] * 5 + [6.0] * 2)
+        bread = ItemForecast.objects.get(item=self.bread)
+        self.assertEqual((bread.smoothed, bread.weekday_factors), (0, [1.0] * 7))
+
+    def test_exponential_smoothing(self):
+        matrix = np.random.default_rng(1).uniform(0, 10, (3, 20))
+        level = matrix[:, 0].copy()
+        for day in range(1, 20):
+            level = 0.3 * matrix[:, day] + 0.7 * level
+        np.testing.assert_allclose(exponential_smoothing(matrix, 0.3), level)
+
+    def test_detail_page(self):
+        url = reverse('item-detail', args=[self.milk.pk])
+        self.assertNotContains(self.client.get(url), 'Demand Forecast')
+        forecast_demand(self.today, days=28)
+        response = self.client.get(url)
+        self.assertContains(response, 'Demand Forecast')
+        self.assertContains(response, 'Mon 2026-10-19')
+        # The cached page follows a new run
+        self.consume(self.milk, {0: 30})
+        forecast_demand(self.today, days=28)
+        self.assertContains(self.client.get(url), '7.4 (7 days)')
+
+    def test_command(self):
+        out = StringIO()
+        call_command('forecast_demand', stdout=out)
+        self.assertIn('Forecast 2 item(s) from 56 days', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('forecast_demand', '--days', '3', stdout=StringIO())
+
+# Test cases for multi-location stock
+class LocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        self.main = Location.objects.get_or_create(is_default=True, defaults={'name': 'Main'})[0]
+        self.store = Location.objects.create(name='Store')
+        self.milk = Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+        self.client.login(username='testuser', password='testpass')
+
+    def stock(self):
+        return dict(LocationStock.objects.filter(item=self.milk).values_list('location__name', 'amount'))
+
+    def test_item_changes_are_booked_to_default_location(self):
+        self.assertEqual(self.stock(), {'Main': 10})
+        self.milk.amount = 7
+        self.milk.save()
+        adjust_stock([(self.milk.pk, 2, None)])
+        self.assertEqual(self.stock(), {'Main': 9})
+
+    def test_import_books_to_default_location(self):
+        import_items(read_rows(BytesIO(b'Name,Category,Cost,Amount\nMilk,Dairy,1.5,4\nEggs,Dairy,3,12\n'), 'items.csv'))
+        self.assertEqual(self.stock(), {'Main': 4})
+        self.assertEqual(LocationStock.objects.get(item__name='Eggs', location=self.main).amount, 12)
+
+    def test_transfer_moves_stock_between_locations(self):
+        self.assertEqual(transfer_stock(self.milk.pk, self.main.pk, self.store.pk, 4), {self.main.pk: 6, self.store.pk: 4})
+        with self.assertRaises(StockAdjustmentError):
+            transfer_stock(self.milk.pk, self.store.pk, self.main.pk, 5)
+        self.assertEqual(self.stock(), {'Main': 6, 'Store': 4})
+        self.milk.refresh_from_db()
+        self.assertEqual(self.milk.amount, 10)
+
+    def test_unlocated_decrease_is_spread_over_locations(self):
+        transfer_stock(self.milk.pk, self.main.pk, self.store.pk, 8)
+        self.milk.refresh_from_db()
+        self.milk.amount = 1
+        self.milk.save()
+        # Main's 2 go first, the rest comes from the store
+        self.assertEqual(self.stock(), {'Main': 0, 'Store': 1})
+        adjust_stock([(self.milk.pk, -3, None)])
+        self.assertEqual(self.stock(), {'Main': 0, 'Store': 0})
+        adjust_stock([(self.milk.pk, 4, None)])
+        self.assertEqual(self.stock(), {'Main': 2, 'Store': 0})
+
+    def test_location_stock_never_goes_below_zero(self):
+        with self.assertRaises(StockAdjustmentError):
+            adjust_stock([(self.milk.pk, -1, None)], location_id=self.store.pk)
+        self.assertEqual(self.stock(), {'Main': 10})
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            LocationStock.objects.filter(item=self.milk).update(amount=-1)
+
+    def test_transfer_view(self):
+        data = {'item': self.milk.pk, 'source': self.main.pk, 'destination': self.store.pk, 'quantity': 3}
+        response = self.client.post(reverse('stock-transfer'), data)
+        self.assertEqual(response.json(), {'locations': {str(self.main.pk): 7, str(self.store.pk): 3}})
+        response = self.client.post(reverse('stock-transfer'), {**data, 'quantity': 30})
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(reverse('stock-transfer'), {**data, 'destination': self.main.pk})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('stock-transfer'), {**data, 'quantity': 10**30})
+        self.assertEqual(response.status_code, 400)
+
+    def test_adjustment_at_location_is_guarded_there(self):
+        response = self.client.post(reverse('item-adjust', args=[self.milk.pk]), {'delta': '-1', 'min': '0', 'location': self.store.pk})
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(reverse('item-adjust', args=[self.milk.pk]), {'delta': '5', 'location': self.store.pk})
+        self.assertEqual(response.json(), {'items': {str(self.milk.pk): 15}})
+        self.assertEqual(self.stock(), {'Main': 10, 'Store': 5})
+        self.assertEqual(find_drift(), [])
+
+    def test_totals_and_location_export_use_one_query(self):
+        transfer_stock(self.milk.pk, self.main.pk, self.store.pk, 4)
+        with self.assertNumQueries(1):
+            totals = {row['name']: (row['item_count'], row['total_amount'], row['total_value']) for row in location_totals()}
+        self.assertEqual(totals, {'Main': (1, 6, 9.0), 'Store': (1, 4, 6.0)})
+        with self.assertNumQueries(1):
+            self.assertEqual(list(item_rows(location_id=self.store.pk)), [('Milk', 'Dairy', 1.5, 4)])
+
+    def test_book_unlocated_stock(self):
+        Item.objects.filter(pk=self.milk.pk).update(amount=25)
+        self.assertEqual(book_unlocated_stock(), 1)
+        self.assertEqual(self.stock(), {'Main': 25})
+        self.assertEqual(book_unlocated_stock(), 0)
+
+# Test cases for the bulk edit of the inventory list
+class BulkEditTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        self.client.login(username='testuser', password='testpass')
+
+    def create_items(self, count):
+        return [Item.objects.create(name=f'Item {number:03d}', category='Dairy', cost=1.0, amount=10) for number in range(count)]
+
+    def post_data(self, items, **edits):
+        # Every row as shown, with {index: {field: value}} edits applied
+        data = {'form-TOTAL_FORMS': len(items), 'form-INITIAL_FORMS': len(items), 'form-MIN_NUM_FORMS': 0, 'form-MAX_NUM_FORMS': 1000}
+        for index, item in enumerate(items):
+            row = {'id': item.pk, 'cost': item.cost, 'amount': item.amount, 'reorder_level': item.reorder_level, 'target_level': item.target_level}
+            row.update(edits.get(str(index), {}))
+            data.update({f'form-{index}-{field}': value for field, value in row.items()})
+        return data
+
+    def test_get_renders_every_row(self):
+        self.create_items(3)
+        response = self.client.get(reverse('item-bulk-edit'))
+        self.assertEqual(len(response.context['formset'].forms), 3)
+        self.assertContains(response, 'Item 002')
+
+    def test_post_applies_only_changed_rows(self):
+        items = self.create_items(3)
+        data = self.post_data(items, **{'0': {'amount': 4}, '2': {'cost': 2.5, 'amount': 12}})
+        response = self.client.post(reverse('item-bulk-edit'), data)
+        self.assertEqual(response.status_code, 302)
+        values = dict(Item.objects.values_list('name', 'amount'))
+        self.assertEqual(values, {'Item 000': 4, 'Item 001': 10, 'Item 002': 12})
+        self.assertEqual(Item.objects.get(pk=items[2].pk).cost, 2.5)
+        self.assertEqual(CategoryRollup.objects.get(category='Dairy').total_amount, 26)
+        self.assertEqual(StockMovement.objects.filter(reason='update').count(), 2)
+        self.assertEqual(find_drift(), [])
+
+    def test_queries_do_not_grow_with_rows(self):
+        counts = []
+        for count in (5, 5, 25):
+            Item.objects.all().delete()
+            items = self.create_items(count)
+            data = self.post_data(items, **{'0': {'amount': 1}})
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(reverse('item-bulk-edit'), data)
+            counts.append(len(queries))
+        # The first post also fills the role cache
+        self.assertEqual(counts[1], counts[2])
+
+    def test_invalid_row_saves_nothing(self):
+        items = self.create_items(2)
+        data = self.post_data(items, **{'0': {'amount': 3}, '1': {'reorder_level': 5, 'target_level': 1}})
+        response = self.client.post(reverse('item-bulk-edit'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['formset'].errors[1])
+        self.assertEqual(Item.objects.get(pk=items[0].pk).amount, 10)
+
+    def test_unknown_item_is_rejected(self):
+        items = self.create_items(1)
+        data = self.post_data(items)
+        data['form-0-id'] = items[0].pk + 100
+        response = self.client.post(reverse('item-bulk-edit'), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('id', response.context['formset'].errors[0])
+
+# Test cases for background jobs
+class JobTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(INVENTORY_JOB_RUNNER='worker', INVENTORY_JOB_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        Item.objects.create(name='Milk', category='Dairy', cost=1.5, amount=10)
+        self.client.login(username='testuser', password='testpass')
+
+    def test_export_job(self):
+        response = self.client.post(reverse('job-export') + '?format=csv')
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'queued')
+        self.assertEqual(self.client.get(reverse('job-download', args=[response.json()['id']])).status_code, 409)
+
+        self.assertEqual(jobs.run_pending('test'), 1)
+        status = self.client.get(status_url).json()
+        self.assertEqual(status['status'], 'done')
+        download = self.client.get(status['download_url'])
+        self.assertEqual(download['Content-Type'], 'text/csv')
+        self.assertIn(b'Milk,Dairy,1.50,10', b''.join(download.streaming_content))
+
+    def test_import_job(self):
+        upload = SimpleUploadedFile('items.csv', b'Name,Category,Cost,Amount\nEggs,Dairy,3,12\nBad,Dairy,x,1\n')
+        response = self.client.post(reverse('job-import'), {'file': upload})
+        self.assertEqual(response.status_code, 202)
+        jobs.run_pending('test')
+        result = self.client.get(response.json()['status_url']).json()['result']
+        self.assertEqual((result['created'], result['error_count']), (1, 1))
+        self.assertTrue(Item.objects.filter(name='Eggs').exists())
+        self.assertEqual(os.listdir(settings.INVENTORY_JOB_DIR), [])
+
+    def test_import_job_with_unreadable_file(self):
+        upload = SimpleUploadedFile('items.xlsx', b'not a workbook')
+        response = self.client.post(reverse('job-import'), {'file': upload})
+        jobs.run_pending('test')
+        job = Job.objects.get(pk=response.json()['id'])
+        self.assertEqual((job.status, job.error), (Job.FAILED, 'The file is not a valid .xlsx workbook'))
+        self.assertEqual(os.listdir(settings.INVENTORY_JOB_DIR), [])
+
+    def test_failed_job(self):
+        job = jobs.enqueue('rebuild_rollups')
+        with mock.patch.dict(jobs.JOB_HANDLERS, {'rebuild_rollups': mock.Mock(side_effect=ValueError('boom'))}):
+            jobs.run_pending('test')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (Job.FAILED, 'boom'))
+
+    def test_failed_job_removes_partial_result(self):
+        def broken_rows(**kwargs):
+            yield ('Milk', 'Dairy', 1.5, 10)
+            raise ValueError('disk full')
+
+        with mock.patch('inventory_app.jobs.item_rows', broken_rows):
+            job = jobs.run_job(jobs.enqueue('export', {'format': 'csv'}))
+        self.assertEqual((job.status, job.result_file), (Job.FAILED, ''))
+        self.assertEqual(os.listdir(settings.INVENTORY_JOB_DIR), [])
+
+    def test_claims_are_exclusive(self):
+        first, second = jobs.enqueue('rebuild_rollups'), jobs.enqueue('rebuild_rollups')
+        self.assertEqual(jobs.claim_job('a').pk, first.pk)
+        self.assertEqual(jobs.claim_job('b').pk, second.pk)
+        self.assertIsNone(jobs.claim_job('c'))
+
+    def test_jobs_are_private(self):
+        job = jobs.enqueue('rebuild_rollups', owner=User.objects.create_user(username='other', password='x'))
+        self.assertEqual(self.client.get(reverse('job-status', args=[job.pk])).status_code, 404)
+
+    def test_requeue_and_purge(self):
+        job = jobs.enqueue('export', {'format': 'csv'})
+        jobs.claim_job('crashed')
+        self.assertEqual(jobs.requeue_stale(timezone.now() + datetime.timedelta(seconds=1)), 1)
+        call_command('run_jobs', '--once', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(jobs.purge_jobs(timezone.now() + datetime.timedelta(seconds=1)), 1)
+        self.assertEqual(os.listdir(settings.INVENTORY_JOB_DIR), [])
+
+# Test cases for the in-process job threads
+class JobThreadTests(TransactionTestCase):
+    def test_thread_runner(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(INVENTORY_JOB_RUNNER='thread', INVENTORY_JOB_DIR=directory):
+            job = jobs.enqueue('rebuild_rollups')
+            self.assertTrue(jobs.wait_for_threads(timeout=10))
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.DONE)
+
+    def test_thread_runner_starts_with_first_request(self):
+        # Jobs left behind by a previous process: one still marked as
+        # running, and one finished long ago with its result file
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(jobs, '_next_maintenance', 0), \
+                override_settings(INVENTORY_JOB_RUNNER='thread', INVENTORY_JOB_DIR=directory):
+            stale = Job.objects.create(kind='rebuild_rollups', status=Job.RUNNING, started_at=timezone.now() - datetime.timedelta(hours=2))
+            with open(os.path.join(directory, 'old.csv'), 'w'):
+                pass
+            old = Job.objects.create(kind='export', status=Job.DONE, result_file='old.csv', created_at=timezone.now() - datetime.timedelta(days=30))
+
+            jobs.start_runner()
+            self.client.get(reverse('login'))
+            self.assertTrue(jobs.wait_for_threads(timeout=10))
+            stale.refresh_from_db()
+            self.assertEqual(stale.status, Job.DONE)
+            self.assertFalse(Job.objects.filter(pk=old.pk).exists())
+            self.assertEqual(os.listdir(directory), [])
+
+# Test cases for decimal costs and the valuation report
+class ValuationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.milk = Item.objects.create(name='Milk', category='Dairy', cost=1.1, amount=10)
+        Item.objects.create(name='Cheese', category='Dairy', cost='0.10', amount=3)
+        Item.objects.create(name='Brisket', category='Protein', cost=12.0, amount=3)
+
+    def test_costs_are_exact(self):
+        self.assertEqual(Item.objects.get(pk=self.milk.pk).cost, Decimal('1.10'))
+        # 0.1 * 3 and 1.1 * 10 would not add up exactly as floats
+        self.assertEqual(CategoryRollup.objects.get(category='Dairy').total_value, Decimal('11.30'))
+        self.assertEqual(find_drift(), [])
+
+    def test_report(self):
+        report = valuation_report(top=2)
+        self.assertEqual(report['total'], {'item_count': 3, 'total_amount': 16, 'total_value': Decimal('47.30')})
+        self.assertEqual(
+            [(row['category'], row['item_count'], row['total_value']) for row in report['categories']],
+            [('Protein', 1, Decimal('36.00')), ('Dairy', 2, Decimal('11.30'))],
+        )
+        self.assertEqual([(item['name'], item['value']) for item in report['top_items']],
+                         [('Brisket', Decimal('36.00')), ('Milk', Decimal('11.00'))])
+
+    def test_report_cached_until_item_write(self):
+        cached_valuation_report()
+        with self.assertNumQueries(0):
+            report = cached_valuation_report()
+        self.assertEqual(report['total']['total_value'], Decimal('47.30'))
+
+        self.milk.amount = 20
+        self.milk.save()
+        self.assertEqual(cached_valuation_report()['total']['total_value'], Decimal('58.30'))
+
+    def test_report_kept_for_fragment_timeout(self):
+        # A write the stamp does not see, as with another process's write to
+        # a per-process cache, shows once the cached report expires
+        with override_settings(INVENTORY_FRAGMENT_TIMEOUT=0):
+            cached_valuation_report()
+            Item.objects.filter(pk=self.milk.pk).update(amount=20)
+            self.assertEqual(cached_valuation_report()['total']['total_value'], Decimal('58.30'))
+
+    def test_report_view(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        Employee.objects.create(user=user, name='Test Employee', position='Test Position')
+        self.client.login(username='testuser', password='testpass')
+
+        response = self.client.get(reverse('inventory-valuation'), {'top': '1'})
+        self.assertTemplateUsed(response, 'inventory_app/valuation.html')
+        self.assertEqual(len(response.context['report']['top_items']), 1)
+        self.assertContains(response, '47.30')
+
+    def test_api_cost_is_a_number(self):
+        response = self.client.get(reverse('api-item-detail', args=[self.milk.pk]))
+        self.assertEqual(response.json()['cost'], 1.1)
+
+    def test_parquet_export_keeps_decimals(self):
+        import pyarrow.parquet as pq
+
+        exporter = available_exporters()['parquet']
+        rows = [('Milk', 'Dairy', Decimal('1.10'), 10), ('Cheese', 'Dairy', Decimal('1234.56'), 3)]
+        with mock.patch('inventory_app.exports.ROW_CHUNK_SIZE', 1):
+            content = b''.join(exporter.stream(EXPORT_COLUMNS, iter(rows)))
+        self.assertEqual(pq.read_table(BytesIO(content)).column('cost').to_pylist(), [Decimal('1.10'), Decimal('1234.56')])
+
+# Test cases for the static asset pipeline
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        settings_override = override_settings(STATIC_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.hashed = staticfiles_storage.stored_name('admin/css/base.css')
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.hashed, r'^admin/css/base\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.root, self.hashed), 'rb') as file:
+            original = file.read()
+        with open(os.path.join(self.root, self.hashed + '.gz'), 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), original)
+        # Images are compressed already and get no variant
+        logo = staticfiles_storage.stored_name('images/bbq_logo.gif')
+        self.assertFalse(os.path.exists(os.path.join(self.root, logo + '.gz')))
+
+    def test_hashed_files_are_served_compressed_and_immutable(self):
+        response = Client().get(settings.STATIC_URL + self.hashed, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        with open(os.path.join(self.root, self.hashed + '.gz'), 'rb') as file:
+            self.assertEqual(b''.join(response.streaming_content), file.read())
+
+    def test_plain_names_are_revalidated(self):
+        client = Client()
+        response = client.get(settings.STATIC_URL + 'admin/css/base.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response = client.get(settings.STATIC_URL + 'admin/css/base.css', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(client.get(settings.STATIC_URL + '../staticfiles.json').status_code, 404)
+
+    def test_pages_link_vendored_bootstrap(self):
+        asset = VENDOR_ASSETS['bootstrap']
+        vendored.cache_clear()
+        self.addCleanup(vendored.cache_clear)
+        # Before collectstatic, static files keep their plain names
+        with override_settings(STATIC_ROOT=os.path.join(self.root, 'uncollected')):
+            if not vendored('bootstrap'):
+                # Until vendor_assets has fetched the file, pages use the pinned CDN copy
+                response = self.client.get(reverse('index'))
+                self.assertContains(response, f'href="{asset["url"]}"')
+                self.assertContains(response, asset['integrity'])
+
+            static_dir = os.path.join(self.root, 'vendored')
+            os.makedirs(os.path.join(static_dir, *asset['path'].split('/')[:-1]))
+            with open(os.path.join(static_dir, *asset['path'].split('/')), 'w') as file:
+                file.write('body {}')
+            with override_settings(STATICFILES_DIRS=[static_dir]):
+                vendored.cache_clear()
+                response = self.client.get(reverse('index'))
+        self.assertContains(response, 'href="/static/vendor/bootstrap/5.3.1/css/bootstrap.min.css"')
+        self.assertContains(response, asset['integrity'])
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+
+    @skipUnless(vendored('bootstrap'), 'Bootstrap has not been vendored: run manage.py vendor_assets')
+    def test_vendored_bootstrap_matches_its_hash(self):
+        # The committed file itself, as the deployment check reads it
+        self.assertEqual(check_vendor_assets(None), [])
+        call_command('vendor_assets', '--check', stdout=StringIO())
+
+    def test_vendor_assets_check(self):
+        with mock.patch('inventory_app.management.commands.vendor_assets.apps.get_app_config') as app_config:
+            app_config.return_value.path = self.root
+            with self.assertRaisesMessage(CommandError, 'is missing'):
+                call_command('vendor_assets', '--check', stdout=StringIO())
+
+# Test cases for session storage and session writes
+class SessionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.user.groups.add(Group.objects.get_or_create(name='employee')[0])
+        Employee.objects.create(user=self.user, name='Test Employee', position='Test Position')
+
+    def run_middleware(self, view, session_key):
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+        return SessionMiddleware(view)(request), request
+
+    def stored_session(self, **data):
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store.update(data)
+        store.create()
+        return store.session_key
+
+    def test_unchanged_session_is_not_saved(self):
+        key = self.stored_session(cart='milk')
+
+        def rewrite(request):
+            request.session['cart'] = request.session['cart']
+            return HttpResponse()
+
+        with CaptureQueriesContext(connection) as queries:
+            response, request = self.run_middleware(rewrite, key)
+        self.assertTrue(request.session.accessed)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+    def test_changed_session_is_saved(self):
+        key = self.stored_session(cart='milk')
+
+        def change(request):
+            request.session['cart'] = 'bread'
+            return HttpResponse()
+
+        response, request = self.run_middleware(change, key)
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(import_module(settings.SESSION_ENGINE).SessionStore(key)['cart'], 'bread')
+
+    def assert_list_skips_session_table(self):
+        client = Client()
+        self.assertEqual(client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass'}).status_code, 302)
+        client.get(reverse('inventory'))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('inventory'))
+        self.assertEqual(response.context['user'], self.user)
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        CACHES={**settings.CACHES, 'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-sessions'}},
+    )
+    def test_cached_db_sessions(self):
+        self.assert_list_skips_session_table()
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions(self):
+        self.assert_list_skips_session_table()
+
+    def test_purge_expired_sessions_in_batches(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(session_key=f'expired{number:02d}', session_data='', expire_date=now - datetime.timedelta(days=1))
+            for number in range(5)
+        )
+        Session.objects.create(session_key='live', session_data='', expire_date=now + datetime.timedelta(days=1))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(purge_expired_sessions(batch_size=2, now=now), 5)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('DELETE')]), 3)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['live'])
+
+        out = StringIO()
+        call_command('purge_sessions', '--pause', '0', stdout=out)
+        self.assertIn('Deleted 0 expired session(s)', out.getvalue())
+
 # Test cases for forms in the inventory app
 class FormsTests(TestCase):
 
@@ -358,11 +1786,62 @@ class UrlsTests(SimpleTestCase):
         url = reverse('item-update', args=[1])
         self.assertEqual(resolve(url).func, updateItem)
 
+    def test_export_items_url(self):
+        # Test the export URL
+        url = reverse('export-items')
+        self.assertEqual(resolve(url).func, export_items)
+
+    def test_item_import_url(self):
+        # Test the item import URL
+        url = reverse('item-import')
+        self.assertEqual(resolve(url).func, importItems)
+
     def test_register_page_url(self):
         # Test the register page URL
         url = reverse('register_page')
         self.assertEqual(resolve(url).func, registerPage)
 
+    def test_api_stock_as_of_url(self):
+        # Test the stock as-of API URL
+        url = reverse('api-stock-as-of')
+        self.assertEqual(resolve(url).func, api_stock_as_of)
+
+    def test_low_stock_url(self):
+        # Test the low stock URL
+        url = reverse('low-stock')
+        self.assertEqual(resolve(url).func, lowStock)
+
+    def test_purchase_list_url(self):
+        # Test the purchase list URL
+        url = reverse('purchase-list')
+        self.assertEqual(resolve(url).func, purchaseList)
+
+    def test_item_bulk_edit_url(self):
+        # Test the bulk edit URL
+        url = reverse('item-bulk-edit')
+        self.assertEqual(resolve(url).func, bulkEditItems)
+
+    def test_stock_transfer_url(self):
+        # Test the stock transfer URL
+        url = reverse('stock-transfer')
+        self.assertEqual(resolve(url).func, transferStock)
+
+    def test_valuation_url(self):
+        # Test the inventory valuation URL
+        url = reverse('inventory-valuation')
+        self.assertEqual(resolve(url).func, valuationReport)
+
+    def test_job_status_url(self):
+        # Test the background job status URL
+        url = reverse('job-status', args=[1])
+        self.assertEqual(resolve(url).func, job_status)
+
+    def test_metrics_url(self):
+        # Test the Prometheus metrics URL
+        url = reverse('metrics')
+        self.assertEqual(url, '/metrics')
+        self.assertEqual(resolve(url).func, metrics)
+
     def test_employee_detail_url(self):
         # Test the employee detail URL
         url = reverse('user_page', args=[1])
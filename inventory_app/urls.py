@@ -1,15 +1,56 @@
+from django.conf import settings
 from django.urls import path, include
 from . import views
 
+# Under ASGI the read-heavy pages are served by their async views
+if settings.INVENTORY_ASYNC_VIEWS:
+    index_view = views.async_index
+    item_list_view = views.AsyncItemListView.as_view()
+    item_detail_view = views.AsyncItemDetailView.as_view()
+    download_view = views.async_download_to_excel
+    export_view = views.async_export_items
+else:
+    index_view = views.index
+    item_list_view = views.ItemListView.as_view()
+    item_detail_view = views.ItemDetailView.as_view()
+    download_view = views.download_to_excel
+    export_view = views.export_items
+
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('inventory/', views.ItemListView.as_view(), name = "inventory"),
-    path('inventory/<int:pk>/', views.ItemDetailView.as_view(), name = 'item-detail'),
+    path('', index_view, name='index'),
+    path('inventory/', item_list_view, name = "inventory"),
+    path('inventory/search/', views.ItemSearchView.as_view(), name='item-search'),
+    path('inventory/<int:pk>/', item_detail_view, name = 'item-detail'),
     path('inventory/add_item/', views.addItem, name='add-item'),
     path('inventory/delete_item/<int:pk>/', views.deleteItem, name='item-delete'),
     path('inventory/update_item/<int:pk>/', views.updateItem, name = 'item-update'),
+    path('inventory/import/', views.importItems, name='item-import'),
+    path('inventory/bulk_edit/', views.bulkEditItems, name='item-bulk-edit'),
+    path('inventory/adjust/', views.adjustStock, name='stock-adjust'),
+    path('inventory/transfer/', views.transferStock, name='stock-transfer'),
+    path('inventory/<int:pk>/adjust/', views.adjustStock, name='item-adjust'),
+    path('inventory/dashboard/', views.inventoryDashboard, name='inventory-dashboard'),
+    path('inventory/valuation/', views.valuationReport, name='inventory-valuation'),
+    path('inventory/low_stock/', views.lowStock, name='low-stock'),
+    path('inventory/purchase_list/', views.purchaseList, name='purchase-list'),
+
+    path('download-to-excel/', download_view, name='download-to-excel'),
+    path('export/', export_view, name='export-items'),
+
+    #read-only JSON API
+    path('api/items/', views.api_item_list, name='api-item-list'),
+    path('api/items/<int:pk>/', views.api_item_detail, name='api-item-detail'),
+    path('api/stock/', views.api_stock_as_of, name='api-stock-as-of'),
+
+    #background jobs: queue, poll, download
+    path('jobs/export/', views.job_export, name='job-export'),
+    path('jobs/import/', views.job_import, name='job-import'),
+    path('jobs/rebuild_rollups/', views.job_rebuild_rollups, name='job-rebuild-rollups'),
+    path('jobs/<int:pk>/', views.job_status, name='job-status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job-download'),
 
-    path('download-to-excel/', views.download_to_excel, name='download-to-excel'),
+    #Prometheus metrics, at the path scrapers expect by default
+    path('metrics', views.metrics, name='metrics'),
 
     #user authentication 
     path('accounts/', include('django.contrib.auth.urls')), 
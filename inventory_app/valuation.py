@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+from . import fragments
+from .models import Item, to_cents
+
+# Items listed in the report's top-by-value table
+TOP_ITEMS = 10
+
+# Wide enough for a whole category's value at the largest cost and amount
+VALUE_FIELD = DecimalField(max_digits=16, decimal_places=2)
+
+
+def stock_value(amount='amount', cost='cost'):
+    # amount * cost as an exact decimal. The database cannot infer a type for
+    # an integer times a decimal, so every valuation states it here.
+    return ExpressionWrapper(F(amount) * F(cost), output_field=VALUE_FIELD)
+
+
+def valuation_report(top=TOP_ITEMS):
+    # {'total', 'categories', 'top_items'} worked out by the database: one
+    # aggregate query per category and one for the `top` most valuable items.
+    # The grand total is the sum of the exact category totals, so it needs no
+    # third pass over the table.
+    categories = list(
+        Item.objects.order_by()
+        .values('category')
+        .annotate(item_count=Count('id'), total_amount=Sum('amount'), total_value=Sum(stock_value()))
+        .order_by('-total_value', 'category')
+    )
+    for row in categories:
+        row['total_value'] = to_cents(row['total_value'])
+    total = {
+        'item_count': sum(row['item_count'] for row in categories),
+        'total_amount': sum(row['total_amount'] for row in categories),
+        'total_value': sum(row['total_value'] for row in categories),
+    }
+    for row in categories:
+        row['share'] = row['total_value'] / total['total_value'] * 100 if total['total_value'] else 0
+    top_items = list(
+        Item.objects.annotate(value=stock_value())
+        .order_by('-value', 'pk')
+        .values('id', 'name', 'category', 'cost', 'amount', 'value')[:top]
+    )
+    for item in top_items:
+        item['value'] = to_cents(item['value'])
+    return {'total': total, 'categories': categories, 'top_items': top_items}
+
+
+def cached_valuation_report(top=TOP_ITEMS):
+    # valuation_report() cached under the item table's stamp, which every
+    # Item write replaces, so a report is computed once per change to the
+    # table however often it is viewed. It is kept as long as fragments are:
+    # only briefly with a per-process cache, which other processes' writes
+    # do not reach.
+    key = f'inventory:valuation:{fragments.table_stamp()}:{top}'
+    return cache.get_or_set(key, lambda: valuation_report(top), fragments.fragment_timeout())
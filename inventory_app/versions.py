@@ -0,0 +1,27 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TableVersion
+
+ITEM_TABLE = 'item'
+
+
+def bump_version(name):
+    with transaction.atomic():
+        if TableVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                TableVersion.objects.create(name=name, version=1)
+        except IntegrityError:
+            # Another writer created the row first
+            TableVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def get_version(name):
+    # The stored counter, or an unsaved version 0 if the table was never written
+    version = TableVersion.objects.filter(name=name).first()
+    if version is None:
+        version = TableVersion(name=name, version=0, updated_at=timezone.now())
+    return version
@@ -1,14 +1,41 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from asgiref.sync import sync_to_async
 from django.views import generic
 from django.contrib import messages
-from django.contrib.auth.models import Group
 from .models import *
-from .forms import ItemForm, CreateUserForm, EmployeeForm
+from .forms import (
+    BULK_EDIT_MAX_ROWS, ItemBulkEditFormSet, ItemForm, ItemImportForm, StockAdjustmentForm, StockLocationForm,
+    StockTransferForm, CreateUserForm, EmployeeForm,
+)
+from django.db import transaction
 from django.contrib.auth.decorators import login_required
-from .decorators import allowed_users
+from .decorators import allowed_users, async_login_required
+from .roles import get_group_id
 from django.contrib.auth.mixins import LoginRequiredMixin
-import pandas as pd
+from .exports import EXPORT_COLUMNS, EXPORTERS, ItemJSONEncoder, aitem_rows, available_exporters, item_rows, negotiate_format
+from .imports import ImportFileError, import_items, read_rows
+from .pagination import akeyset_paginate, keyset_paginate
+from .search import search_items, search_terms
+from .stock import StockAdjustmentError, adjust_stock, transfer_stock
+from .locations import location_totals
+from . import jobs
+from django.views.decorators.http import condition, require_POST
+from .versions import ITEM_TABLE, get_version
+from .fragments import (
+    aforecast_stamp, ahas_fragment, aitem_stamp, atable_stamp, forecast_stamp, fragment_timeout, item_stamp, table_stamp,
+)
+from django.utils.functional import SimpleLazyObject
+from .ledger import stock_as_of
+from .metrics import render_metrics
+from .valuation import TOP_ITEMS, cached_valuation_report
+from .reorder import LOW_STOCK_KEYS, PURCHASE_COLUMNS, low_stock, purchase_rows
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+import datetime
+import json
 
 
 def index(request):
@@ -17,9 +44,113 @@ def index(request):
 
 class ItemListView (generic.ListView):
     model = Item
+    context_object_name = 'item_list'
+    paginate_by = 50
+    # Sort options and the keys they order by; each ends in pk so the order is
+    # total, and each has a matching composite index on Item
+    sort_keys = {
+        'name': ('name', 'pk'),
+        'category': ('category', 'name', 'pk'),
+        'amount': ('amount', 'pk'),
+    }
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort', 'name')
+        if sort.lstrip('-') not in self.sort_keys:
+            return 'name'
+        return sort
+
+    def get_ordering(self):
+        sort = self.get_sort()
+        keys = self.sort_keys[sort.lstrip('-')]
+        if sort.startswith('-'):
+            return ['-' + key for key in keys]
+        return list(keys)
+
+    def paginate_queryset(self, queryset, page_size):
+        # ?page=N keeps classic OFFSET pagination; otherwise pages are fetched
+        # by cursor so deep pages cost the same as the first one
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        # The page is only fetched when the template uses it, so a fresh
+        # cached fragment costs no item query at all
+        page = SimpleLazyObject(lambda: self.get_keyset_page(queryset, page_size))
+        return (None, page, SimpleLazyObject(lambda: page.object_list), SimpleLazyObject(lambda: page.has_other_pages()))
+
+    def get_keyset_options(self):
+        sort = self.get_sort()
+        return {
+            'keys': self.sort_keys[sort.lstrip('-')],
+            'after': self.request.GET.get('after'),
+            'before': self.request.GET.get('before'),
+            'descending': sort.startswith('-'),
+        }
+
+    def get_keyset_page(self, queryset, page_size):
+        return keyset_paginate(queryset, page_size=page_size, **self.get_keyset_options())
+
+    def get_fragment_version(self):
+        return table_stamp()
+
+    def get_fragment_vary(self):
+        # What the cached list fragment depends on besides the item table and the user
+        return [self.get_sort()] + [self.request.GET.get(key, '') for key in ('after', 'before', self.page_kwarg)]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['sort'] = self.get_sort()
+        context['fragment_version'] = self.get_fragment_version()
+        context['fragment_vary'] = self.get_fragment_vary()
+        context['fragment_timeout'] = fragment_timeout()
+        return context
+
+class ItemSearchView(generic.ListView):
+    template_name = 'inventory_app/item_list.html'
+    context_object_name = 'item_list'
+
+    def get(self, request, *args, **kwargs):
+        if not search_terms(request.GET.get('q', '')):
+            return redirect('inventory')
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        # Ranked matches on name and category, best first
+        return search_items(self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
 
 class ItemDetailView(generic.DetailView):
     model = Item
+    template_name = 'inventory_app/item_detail.html'
+
+    def get_queryset(self):
+        # The stored forecast comes in the same query
+        return Item.objects.select_related('forecast')
+
+    def get_object(self, queryset=None):
+        # Loaded only when the template needs it; a fresh cached fragment skips the query
+        return SimpleLazyObject(lambda: super(ItemDetailView, self).get_object(queryset))
+
+    def get_context_data(self, **kwargs):
+        # Built directly, as SingleObjectMixin's truthiness check would load the item
+        context = {'object': self.object, 'item': self.object, 'view': self}
+        context['fragment_version'] = self.get_fragment_version()
+        context['fragment_timeout'] = fragment_timeout()
+        # The stored forecast is cached in a fragment of its own, replaced
+        # whenever the forecasts are recomputed
+        context['forecast_version'] = self.get_forecast_version()
+        context.update(kwargs)
+        return context
+
+    def get_fragment_version(self):
+        return item_stamp(self.kwargs['pk'])
+
+    def get_forecast_version(self):
+        return forecast_stamp()
 
 # Views that require login credentials. 
 @login_required(login_url='login')
@@ -92,14 +223,193 @@ def updateItem(request, pk):
     return render(request, 'inventory_app/item_update.html', context)
 
 
+# Keys the bulk edit is ordered and paginated by, matching item_category_idx
+BULK_EDIT_KEYS = ('category', 'name', 'pk')
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+def bulkEditItems(request):
+    # Edit a page of items at once, e.g. after a stock count: one POST
+    # validates every row against the items loaded in a single query and
+    # writes the changed fields in one transaction
+    category = request.GET.get('category', '')
+    items = Item.objects.filter(category=category) if category else Item.objects.all()
+
+    if request.method == 'POST':
+        with transaction.atomic():
+            formset = ItemBulkEditFormSet(request.POST, queryset=items.select_for_update())
+            if formset.is_valid():
+                changed = formset.save()
+                messages.success(request, f'Updated {len(changed)} item(s).')
+                return redirect(request.get_full_path())
+        page = None
+    else:
+        page = keyset_paginate(
+            items, BULK_EDIT_KEYS, BULK_EDIT_MAX_ROWS,
+            after=request.GET.get('after'), before=request.GET.get('before'),
+        )
+        formset = ItemBulkEditFormSet(queryset=page.object_list)
+
+    context = {'formset': formset, 'page_obj': page, 'category': category, 'categories': Item.CATEGORY}
+    return render(request, 'inventory_app/item_bulk_edit.html', context)
+
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+def importItems(request):
+    form = ItemImportForm()
+    result = None
+
+    if request.method == 'POST':
+        form = ItemImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                # Rows are read from the upload one at a time and written in batches
+                result = import_items(read_rows(upload.file, upload.name))
+            except ImportFileError as error:
+                form.add_error('file', str(error))
+
+    context = {'form': form, 'result': result}
+    return render(request, 'inventory_app/item_import.html', context)
+
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+def inventoryDashboard(request):
+    # Read the maintained per-category rollups: one row per category however many items there are
+    rollups = list(CategoryRollup.objects.filter(item_count__gt=0).order_by('category'))
+    totals = {
+        'item_count': sum(rollup.item_count for rollup in rollups),
+        'total_amount': sum(rollup.total_amount for rollup in rollups),
+        'total_value': sum(rollup.total_value for rollup in rollups),
+    }
+
+    # Per-location totals come from one aggregate query over the stock rows
+    context = {'rollups': rollups, 'totals': totals, 'locations': location_totals()}
+    return render(request, 'inventory_app/dashboard.html', context)
+
+
+VALUATION_MAX_TOP = 100
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+def valuationReport(request):
+    # Stock value in total, by category and for the most valuable items, from
+    # database aggregates cached until the next item write. ?top= sets how
+    # many items are listed.
+    top = request.GET.get('top', '')
+    top = min(int(top), VALUATION_MAX_TOP) if top.isdigit() and int(top) > 0 else TOP_ITEMS
+    context = {'report': cached_valuation_report(top), 'top': top}
+    return render(request, 'inventory_app/valuation.html', context)
+
+
+LOW_STOCK_PAGE_SIZE = 100
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+def lowStock(request):
+    # Items below their reorder level with suggested order quantities, read
+    # from the partial low-stock index a cursor page at a time
+    page = keyset_paginate(
+        low_stock(), LOW_STOCK_KEYS, LOW_STOCK_PAGE_SIZE,
+        after=request.GET.get('after'), before=request.GET.get('before'),
+    )
+    context = {'page_obj': page, 'formats': available_exporters()}
+    return render(request, 'inventory_app/low_stock.html', context)
+
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+def purchaseList(request):
+    # Every low-stock item and how much to order, in the format from ?format=
+    # or the Accept header
+    export_format = negotiate_format(request)
+    if export_format is None:
+        formats = ', '.join(available_exporters())
+        return HttpResponse('Export format not available. Choose one of: ' + formats, status=406)
+
+    return export_response(EXPORTERS[export_format], PURCHASE_COLUMNS, purchase_rows(), name='purchase_list')
+
+
+def _stock_adjustments(request, pk=None):
+    # Adjustments come as a JSON body {"adjustments": [{"item", "delta", "min"}, ...], "location": id}
+    # or as form fields for a single adjustment. Returns (adjustments, location id, errors).
+    if request.content_type == 'application/json':
+        try:
+            body = json.loads(request.body)
+            entries = body['adjustments']
+        except (ValueError, KeyError, TypeError):
+            return None, None, {'adjustments': ['Expected a JSON object with an "adjustments" list.']}
+        if not isinstance(entries, list):
+            return None, None, {'adjustments': ['Expected a JSON object with an "adjustments" list.']}
+        location = {'location': body.get('location')}
+    else:
+        entries = [request.POST.dict()]
+        location = {'location': request.POST.get('location')}
+
+    location_form = StockLocationForm(location)
+    if not location_form.is_valid():
+        return None, None, location_form.errors
+    location = location_form.cleaned_data['location']
+
+    adjustments = []
+    for number, entry in enumerate(entries):
+        # An entry that is not an object fails the form as an empty one
+        if not isinstance(entry, dict):
+            entry = {}
+        if pk is not None:
+            entry = {**entry, 'item': pk}
+        form = StockAdjustmentForm(entry)
+        if not form.is_valid():
+            return None, None, {str(number): form.errors}
+        adjustments.append((form.cleaned_data['item'], form.cleaned_data['delta'], form.cleaned_data['min']))
+    return adjustments, location and location.pk, None
+
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+@require_POST
+def adjustStock(request, pk=None):
+    adjustments, location_id, errors = _stock_adjustments(request, pk)
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    try:
+        amounts = adjust_stock(adjustments, location_id)
+    except StockAdjustmentError as error:
+        # Nothing was applied
+        return JsonResponse({'error': str(error), 'item': error.item_id}, status=409)
+
+    return JsonResponse({'items': {str(item_id): amount for item_id, amount in amounts.items()}})
+
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+@require_POST
+def transferStock(request):
+    # Move stock of one item between locations; the item's total is unchanged
+    form = StockTransferForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    data = form.cleaned_data
+    try:
+        amounts = transfer_stock(data['item'], data['source'].pk, data['destination'].pk, data['quantity'])
+    except StockAdjustmentError as error:
+        # Nothing was moved
+        return JsonResponse({'error': str(error), 'item': error.item_id}, status=409)
+
+    return JsonResponse({'locations': {str(location_id): amount for location_id, amount in amounts.items()}})
+
+
 def registerPage(request): 
     form = CreateUserForm(request.POST)
 
     if form.is_valid():
         user = form.save()
         username = form.cleaned_data.get('username')
-        group = Group.objects.get(name='employee')
-        user.groups.add(group)
+        user.groups.add(get_group_id('employee'))
         employee = Employee.objects.create(user = user)
         messages.success(request, 'Account was created for ' + username)
         return redirect('login')
@@ -113,26 +423,254 @@ class EmployeeDetailView(LoginRequiredMixin, generic.DetailView):
     context_object_name = 'employee'
     model = Employee
 
+def export_response(exporter, columns, rows, name='inventory_list'):
+    # Stream the export chunk by chunk so memory stays flat however many rows
+    # there are; async rows (from an async view) are streamed asynchronously
+    content = exporter.astream(columns, rows) if hasattr(rows, '__aiter__') else exporter.stream(columns, rows)
+    response = StreamingHttpResponse(content, content_type=exporter.content_type)
+    response['Content-Disposition'] = 'attachment; filename=' + exporter.filename(name)
+    return response
+
 @login_required(login_url='login')
 @allowed_users(allowed_roles='employee')
 def download_to_excel(request):
-    # Retrieve all items
-    items = Item.objects.all()
+    return export_response(EXPORTERS['xlsx'], EXPORT_COLUMNS, item_rows())
+
+def _export_location(request):
+    # The ?location= id to export, None for company-wide totals or False if invalid
+    location = request.GET.get('location')
+    if not location:
+        return None
+    try:
+        return int(location)
+    except ValueError:
+        return False
 
-    # Create a Pandas DataFrame from the item data
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+def export_items(request):
+    # Pick the format from ?format= or the Accept header, and optionally a
+    # single location's stock with ?location=
+    export_format = negotiate_format(request)
+    if export_format is None:
+        formats = ', '.join(available_exporters())
+        return HttpResponse('Export format not available. Choose one of: ' + formats, status=406)
+    location_id = _export_location(request)
+    if location_id is False:
+        return HttpResponse('Invalid location.', status=400)
+
+    return export_response(EXPORTERS[export_format], EXPORT_COLUMNS, item_rows(location_id=location_id))
+
+
+# Async versions of the read-heavy views, routed in place of the sync ones when
+# INVENTORY_ASYNC_VIEWS is on (django_project/asgi.py turns it on). They await
+# the ORM and the cache, so under an ASGI server a request waiting on the
+# database does not hold a thread; templates are still rendered by Django in a
+# worker thread.
+async def async_index(request):
+    return TemplateResponse(request, 'inventory_app/index.html')
+
+class AsyncItemListView(ItemListView):
+    page = None
+    fragment_version = None
+
+    async def get(self, request, *args, **kwargs):
+        if self.page_kwarg in request.GET:
+            # Offset pages need Paginator.count, which has no async form
+            return await sync_to_async(super().get)(request, *args, **kwargs)
+
+        self.fragment_version = await atable_stamp()
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        self.page = None
+        if not await ahas_fragment('item_list', [self.fragment_version, self.get_fragment_vary(), is_authenticated]):
+            self.page = await akeyset_paginate(self.get_queryset(), page_size=self.paginate_by, **self.get_keyset_options())
+        self.object_list = self.get_queryset()
+        return self.render_to_response(self.get_context_data())
+
+    def get_keyset_page(self, queryset, page_size):
+        # Fetched already, unless the fragment was cached; it is then only
+        # read if the fragment expires before the template is rendered
+        if self.page is None:
+            return super().get_keyset_page(queryset, page_size)
+        return self.page
+
+    def get_fragment_version(self):
+        if self.fragment_version is None:
+            return super().get_fragment_version()
+        return self.fragment_version
+
+class AsyncItemDetailView(ItemDetailView):
+    async def get(self, request, *args, **kwargs):
+        pk = self.kwargs['pk']
+        self.fragment_version = await aitem_stamp(pk)
+        self.forecast_version = await aforecast_stamp()
+        if await ahas_fragment('item_detail', [self.fragment_version, pk]):
+            self.object = self.get_object()
+        else:
+            try:
+                self.object = await self.get_queryset().aget(pk=pk)
+            except Item.DoesNotExist:
+                raise Http404('No item found matching the query')
+        return self.render_to_response(self.get_context_data())
+
+    def get_fragment_version(self):
+        return self.fragment_version
+
+    def get_forecast_version(self):
+        return self.forecast_version
+
+@async_login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+async def async_download_to_excel(request):
+    return export_response(EXPORTERS['xlsx'], EXPORT_COLUMNS, aitem_rows())
+
+@async_login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+async def async_export_items(request):
+    export_format = negotiate_format(request)
+    if export_format is None:
+        formats = ', '.join(available_exporters())
+        return HttpResponse('Export format not available. Choose one of: ' + formats, status=406)
+
+    location_id = _export_location(request)
+    if location_id is False:
+        return HttpResponse('Invalid location.', status=400)
+
+    return export_response(EXPORTERS[export_format], EXPORT_COLUMNS, aitem_rows(location_id=location_id))
+
+
+# Read-only JSON API for POS terminals and label printers
+API_ITEM_FIELDS = ('id', 'name', 'category', 'cost', 'amount')
+API_PAGE_SIZE = 1000
+
+def _item_version(request, *args, **kwargs):
+    # Read the item table version once per request for both validators
+    if not hasattr(request, '_item_version'):
+        request._item_version = get_version(ITEM_TABLE)
+    return request._item_version
+
+def _item_etag(request, *args, **kwargs):
+    return 'items-%d' % _item_version(request).version
+
+def _item_last_modified(request, *args, **kwargs):
+    return _item_version(request).updated_at
+
+@condition(etag_func=_item_etag, last_modified_func=_item_last_modified)
+def api_item_list(request):
+    # Items by id, API_PAGE_SIZE at a time; pass ?after=<last id> for the next page
+    items = Item.objects.order_by('pk').values(*API_ITEM_FIELDS)
+    after = request.GET.get('after')
+    if after:
+        if not after.isdigit():
+            return JsonResponse({'error': 'after must be an item id'}, status=400)
+        items = items.filter(pk__gt=int(after))
+
+    results = list(items[:API_PAGE_SIZE + 1])
+    next_after = results[API_PAGE_SIZE - 1]['id'] if len(results) > API_PAGE_SIZE else None
+    return JsonResponse({'items': results[:API_PAGE_SIZE], 'next_after': next_after}, encoder=ItemJSONEncoder)
+
+@condition(etag_func=_item_etag, last_modified_func=_item_last_modified)
+def api_item_detail(request, pk):
+    item = Item.objects.filter(pk=pk).values(*API_ITEM_FIELDS).first()
+    if item is None:
+        return JsonResponse({'error': 'Item not found'}, status=404)
+    return JsonResponse(item, encoder=ItemJSONEncoder)
+
+def api_stock_as_of(request):
+    # Amounts on hand at ?as_of=<ISO date or datetime>, optionally for ?item=<id>
+    value = request.GET.get('as_of', '')
+    try:
+        date = parse_date(value)
+        # A bare date means the end of that day
+        when = datetime.datetime.combine(date, datetime.time.max) if date else parse_datetime(value)
+    except ValueError:
+        when = None
+    if when is None:
+        return JsonResponse({'error': 'as_of must be an ISO date or datetime'}, status=400)
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+
+    item_ids = None
+    if 'item' in request.GET:
+        if not all(pk.isdigit() for pk in request.GET.getlist('item')):
+            return JsonResponse({'error': 'item must be an item id'}, status=400)
+        item_ids = [int(pk) for pk in request.GET.getlist('item')]
+    amounts = stock_as_of(when, item_ids)
+    return JsonResponse({'as_of': when, 'items': {str(pk): amount for pk, amount in sorted(amounts.items())}})
+
+# Background jobs: exports, imports and rollup rebuilds are queued and run
+# outside the request. The POST returns 202 with a status URL to poll, and
+# the result is downloaded from job_download once the job is done.
+def _job_accepted(job):
+    status_url = reverse('job-status', args=[job.pk])
+    response = JsonResponse({'id': job.pk, 'status': job.status, 'status_url': status_url}, status=202)
+    response['Location'] = status_url
+    return response
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+@require_POST
+def job_export(request):
+    export_format = negotiate_format(request)
+    if export_format is None:
+        return JsonResponse({'error': 'Export format not available. Choose one of: ' + ', '.join(available_exporters())}, status=406)
+    location_id = _export_location(request)
+    if location_id is False:
+        return JsonResponse({'error': 'Invalid location.'}, status=400)
+    return _job_accepted(jobs.enqueue('export', {'format': export_format, 'location': location_id}, request.user))
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+@require_POST
+def job_import(request):
+    form = ItemImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    upload = form.cleaned_data['file']
+    params = {'upload': jobs.save_upload(upload), 'filename': upload.name}
+    return _job_accepted(jobs.enqueue('import', params, request.user))
+
+@login_required(login_url='login')
+@allowed_users(allowed_roles='employee')
+@require_POST
+def job_rebuild_rollups(request):
+    return _job_accepted(jobs.enqueue('rebuild_rollups', owner=request.user))
+
+def _user_job(request, pk):
+    # A job is only visible to whoever queued it, and to superusers
+    job = Job.objects.filter(pk=pk).first()
+    if job is None or (job.owner_id != request.user.pk and not request.user.is_superuser):
+        raise Http404('Job not found')
+    return job
+
+@login_required(login_url='login')
+def job_status(request, pk):
+    job = _user_job(request, pk)
     data = {
-        'Name': [item.name for item in items],
-        'Category': [item.category for item in items],
-        'Cost': [item.cost for item in items],
-        'Amount': [item.amount for item in items],
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'result': job.result,
+        'error': job.error,
     }
-    df = pd.DataFrame(data)
-
-    # Create an Excel response
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=inventory_list.xlsx'
+    if job.status == Job.DONE and job.result_file:
+        data['download_url'] = reverse('job-download', args=[job.pk])
+    return JsonResponse(data)
 
-    # Write the DataFrame to the response
-    df.to_excel(response, index=False)
+@login_required(login_url='login')
+def job_download(request, pk):
+    job = _user_job(request, pk)
+    if job.status != Job.DONE or not job.result_file:
+        return JsonResponse({'error': 'The job has no result to download yet.', 'status': job.status}, status=409)
+    try:
+        file = open(jobs.job_path(job.result_file), 'rb')
+    except FileNotFoundError:
+        raise Http404('Job result not found')
+    return FileResponse(file, as_attachment=True, filename=job.result_name, content_type=job.content_type)
 
-    return response
\ No newline at end of file
+def metrics(request):
+    # Request histograms of this process, for Prometheus to scrape
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')